@@ -28,6 +28,12 @@ def _avg(values: list[float]) -> float:
     return sum(values) / len(values) if values else 0.0
 
 
+def _rate(counters: dict[str, float], prefix: str) -> str:
+    hits = counters.get(f"{prefix}_hits", 0)
+    total = hits + counters.get(f"{prefix}_misses", 0)
+    return f"{hits / total:.3f}" if total else "-"
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(
         description="Aggregate top1/top5 and timing metrics for predictions."
@@ -72,10 +78,13 @@ def main() -> int:
         extracts = []
         candidates = []
         resolves = []
+        counters: dict[str, float] = {}
         for doc in preds:
             m = getattr(doc, "metrics", None)
             if not m:
                 continue
+            for name, value in m.counters.items():
+                counters[name] = counters.get(name, 0) + value
             totals.append(m.total_s)
             if m.extract_s is not None:
                 extracts.append(m.extract_s)
@@ -93,6 +102,8 @@ def main() -> int:
                 f"{_avg(extracts):.3f}",
                 f"{_avg(candidates):.3f}",
                 f"{_avg(resolves):.3f}",
+                _rate(counters, "nominatim_cache"),
+                _rate(counters, "llm_cache"),
                 str(len(preds)),
             ]
         )
@@ -105,6 +116,8 @@ def main() -> int:
         "avg_extract_s",
         "avg_candidate_s",
         "avg_resolve_s",
+        "nominatim_cache_hit",
+        "llm_cache_hit",
         "docs",
     ]
 
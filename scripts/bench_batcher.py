@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Extraction throughput and latency with and without micro-batching.
+
+Starts a stub LLM with ``--slots`` parallel slots where every call costs
+a fixed overhead (queueing, prefill of the instructions) plus a small
+time per document in it, fires ``--docs`` extractions in bursts of
+``--burst`` concurrent documents, and reports documents per second, mean
+latency and the batch sizes actually formed for several
+``extract_batch_max_size`` values.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import re
+import statistics
+import time
+
+from stub_backends import StubRequest, StubResponse, StubServer, chat_completion
+
+from locitorium.config import AppConfig
+from locitorium.pipeline.extractor import extract_mentions
+from locitorium.pipeline.resources import PipelineResources
+
+_DOCUMENT = re.compile(r"DOCUMENT (\d+):\n")
+
+
+def _llm(slots: int, call_s: float, per_doc_s: float):
+    sem = asyncio.Semaphore(slots)
+
+    async def handle(request: StubRequest) -> StubResponse:
+        prompt = request.json()["messages"][0]["content"]
+        batched = "DOCUMENTS:\n" in prompt
+        n = len(_DOCUMENT.findall(prompt.split("DOCUMENTS:\n", 1)[1])) if batched else 1
+        async with sem:
+            await asyncio.sleep(call_s + per_doc_s * n)
+        mentions = [{"mention": "Tokyo"}]
+        if batched:
+            body = {
+                "documents": [
+                    {"document": i, "mentions": mentions} for i in range(1, n + 1)
+                ]
+            }
+        else:
+            body = {"mentions": mentions}
+        return StubResponse(payload=chat_completion(json.dumps(body)))
+
+    return handle
+
+
+async def _run(args: argparse.Namespace, batch_size: int) -> list[str]:
+    async with StubServer(_llm(args.slots, args.call, args.per_doc)) as server:
+        config = AppConfig(
+            openai_base_url=f"{server.url}/v1",
+            openai_model="stub",
+            extract_batch_max_size=batch_size,
+            extract_batch_max_wait_ms=args.wait_ms,
+        )
+        latencies: list[float] = []
+        async with PipelineResources(config) as resources:
+            llm = resources.llm_client(config)
+            batcher = resources.extract_batcher(config)
+
+            async def one(i: int) -> None:
+                start = time.perf_counter()
+                await extract_mentions(
+                    llm, f"Tokyo {i}", 20, tag=f"d{i}", batcher=batcher
+                )
+                latencies.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            for first in range(0, args.docs, args.burst):
+                last = min(first + args.burst, args.docs)
+                await asyncio.gather(*(one(i) for i in range(first, last)))
+            elapsed = time.perf_counter() - start
+            stats = resources.stats().get("extract_batcher", {})
+    return [
+        str(batch_size),
+        str(server.requests),
+        f"{args.docs / elapsed:.1f}",
+        f"{statistics.mean(latencies) * 1000:.0f}",
+        f"{stats.get('avg_batch_size', 1.0)}",
+        f"{stats.get('avg_wait_ms', 0.0)}",
+    ]
+
+
+async def _main(args: argparse.Namespace) -> None:
+    header = ["max batch", "LLM calls", "docs/s", "latency ms", "avg batch", "wait ms"]
+    print("| " + " | ".join(header) + " |")
+    print("| " + " | ".join("---" for _ in header) + " |")
+    for size in args.sizes:
+        print("| " + " | ".join(await _run(args, size)) + " |")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=64)
+    parser.add_argument("--burst", type=int, default=16)
+    parser.add_argument("--slots", type=int, default=2)
+    parser.add_argument("--call", type=float, default=0.1, help="s per call")
+    parser.add_argument("--per-doc", type=float, default=0.01, help="s per document")
+    parser.add_argument("--wait-ms", type=float, default=5.0)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 4, 8])
+    asyncio.run(_main(parser.parse_args()))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
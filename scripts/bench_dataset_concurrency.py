@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Wall time of run_dataset_stream at several document concurrencies.
+
+Runs the dataset through the full pipeline against a stub LLM (one
+mention per document) and a stub Nominatim, with ``--concurrency``
+documents in flight, and checks that predictions.jsonl still comes out
+in input order.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from stub_backends import (
+    StubRequest,
+    StubResponse,
+    StubServer,
+    chat_completion,
+    nominatim_handler,
+)
+
+from locitorium.config import AppConfig
+from locitorium.eval.io import iter_jsonl, read_jsonl
+from locitorium.pipeline.runner import run_dataset_stream
+
+
+def _llm(delay_s: float):
+    async def handle(request: StubRequest) -> StubResponse:
+        prompt = request.json()["messages"][0]["content"]
+        await asyncio.sleep(delay_s)
+        if prompt.startswith("Extract"):
+            text = prompt.rsplit("TEXT:\n", 1)[-1]
+            body = {"mentions": [{"mention": text.split()[0]}]}
+        else:
+            body = {"results": []}
+        return StubResponse(payload=chat_completion(json.dumps(body)))
+
+    return handle
+
+
+async def _run(args: argparse.Namespace, concurrency: int, out: Path) -> float:
+    async with (
+        StubServer(_llm(args.llm_delay)) as llm,
+        StubServer(nominatim_handler(delay_s=args.search_delay)) as nominatim,
+    ):
+        config = AppConfig(
+            openai_base_url=f"{llm.url}/v1",
+            nominatim_base_url=nominatim.url,
+            nominatim_cache_entries=0,
+        )
+        start = time.perf_counter()
+        await run_dataset_stream(
+            iter_jsonl(args.dataset), config, str(out), concurrency
+        )
+        return time.perf_counter() - start
+
+
+async def _main(args: argparse.Namespace) -> None:
+    expected = [doc["doc_id"] for doc in read_jsonl(args.dataset)]
+    header = ["concurrency", "docs", "wall_s", "docs/s", "in order"]
+    print("| " + " | ".join(header) + " |")
+    print("| " + " | ".join("---" for _ in header) + " |")
+    with tempfile.TemporaryDirectory() as tmp:
+        for concurrency in args.concurrency:
+            out = Path(tmp) / f"predictions_{concurrency}.jsonl"
+            elapsed = await _run(args, concurrency, out)
+            got = [row["doc_id"] for row in iter_jsonl(out)]
+            print(
+                f"| {concurrency} | {len(got)} | {elapsed:.2f} "
+                f"| {len(got) / elapsed:.1f} | {got == expected} |"
+            )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--dataset", type=Path, default=Path("data/phase0/dataset.jsonl")
+    )
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--llm-delay", type=float, default=0.05, help="s per call")
+    parser.add_argument("--search-delay", type=float, default=0.05, help="s/search")
+    asyncio.run(_main(parser.parse_args()))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Extract latency and top-1 accuracy: LLM vs. dictionary vs. hybrid.
+
+Offline part (always): runs the dictionary extractor over every document
+of the dataset and reports its per-document latency, how many documents
+hybrid mode would still send to the LLM, and a country-level top-1: the
+country of the first dictionary mention against the gold country.
+
+With ``--pipeline`` it also runs the full pipeline once per extract mode
+against the backends configured in the environment (``OPENAI_*``,
+``NOMINATIM_BASE_URL``, ``LOCITORIUM_GAZETTEER_PATH``) and reports the
+mean and p95 ``extract_s`` next to the scored top-1 accuracy.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from pathlib import Path
+
+from locitorium.config import config_from_env
+from locitorium.eval.io import load_gold, read_jsonl
+from locitorium.eval.metrics import topk_accuracy
+from locitorium.pipeline.dictionary import build_dictionary
+from locitorium.pipeline.runner import run_dataset
+
+
+def _p95(values: list[float]) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=20)[18]
+
+
+def _offline(docs: list[dict], gold_by_doc: dict, max_mentions: int) -> None:
+    start = time.perf_counter()
+    dictionary = build_dictionary()
+    build_ms = (time.perf_counter() - start) * 1000
+    latencies: list[float] = []
+    found = fallback = correct = 0
+    for doc in docs:
+        t0 = time.perf_counter()
+        mentions, ambiguous = dictionary.extract(doc["text"], max_mentions)
+        latencies.append(time.perf_counter() - t0)
+        if mentions:
+            found += 1
+        if not mentions or ambiguous:
+            fallback += 1
+        matches = dictionary.find(doc["text"])
+        gold = gold_by_doc[doc["doc_id"]]
+        if matches and gold.mentions:
+            correct += matches[0].country_code == gold.mentions[0].iso_country
+    n = len(docs)
+    print(f"dictionary: {len(dictionary)} names, built in {build_ms:.1f} ms")
+    header = ["docs", "with mentions", "hybrid LLM fallback", "country top-1"]
+    header += ["p50_ms", "p95_ms"]
+    print("| " + " | ".join(header) + " |")
+    print("| " + " | ".join("---" for _ in header) + " |")
+    print(
+        f"| {n} | {found / n:.2f} | {fallback / n:.2f} | {correct / n:.2f} "
+        f"| {statistics.median(latencies) * 1000:.3f} | {_p95(latencies) * 1000:.3f} |"
+    )
+
+
+def _pipeline(docs: list[dict], gold: list, modes: list[str]) -> None:
+    print()
+    print("| mode | extract_s mean | extract_s p95 | total_s mean | top1 |")
+    print("| --- | --- | --- | --- | --- |")
+    for mode in modes:
+        config = config_from_env(extract_mode=mode)
+        preds = asyncio.run(run_dataset(docs, config))
+        extract = [
+            p.metrics.extract_s for p in preds if p.metrics.extract_s is not None
+        ]
+        total = [p.metrics.total_s for p in preds]
+        top1 = topk_accuracy(gold, preds, k=1)["top1"]
+        print(
+            f"| {mode} | {statistics.mean(extract or [0.0]):.3f} | {_p95(extract):.3f} "
+            f"| {statistics.mean(total):.3f} | {top1:.3f} |"
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--dataset", type=Path, default=Path("data/phase0/dataset.jsonl")
+    )
+    parser.add_argument("--max-mentions", type=int, default=20)
+    parser.add_argument(
+        "--pipeline", action="store_true", help="also run the full pipeline per mode"
+    )
+    parser.add_argument("--modes", default="llm,dictionary,hybrid")
+    args = parser.parse_args()
+
+    docs = read_jsonl(args.dataset)
+    gold = load_gold(args.dataset)
+    _offline(docs, {g.doc_id: g for g in gold}, args.max_mentions)
+    if args.pipeline:
+        _pipeline(docs, gold, [m.strip() for m in args.modes.split(",") if m.strip()])
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
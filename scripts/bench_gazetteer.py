@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""Lookup microbenchmarks for the offline gazetteer index.
+
+Builds an index of ``--places`` synthetic places (or uses ``--index``),
+then times index open, hit and miss lookups, and ``GazetteerClient.search``
+against ``NominatimClient.search`` on a local stub ``/search`` (no cache),
+which is the floor of what the HTTP backend costs per candidate lookup.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import string
+import tempfile
+import time
+from pathlib import Path
+
+from stub_backends import StubServer, nominatim_handler
+
+from locitorium.clients.gazetteer import GazetteerClient
+from locitorium.clients.nominatim import NominatimClient
+from locitorium.gazetteer.index import GazetteerIndex, Place, build_index
+
+
+def _synthetic(n: int, seed: int) -> list[Place]:
+    rng = random.Random(seed)
+    places = []
+    for i in range(n):
+        name = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 12)))
+        places.append(
+            Place(
+                names=[name.title(), f"{name} {i % 97}"],
+                osm_type="node",
+                osm_id=i,
+                display_name=f"{name.title()}, Somewhere",
+                lat=f"{rng.uniform(-90, 90):.5f}",
+                lon=f"{rng.uniform(-180, 180):.5f}",
+                country_code="jp",
+                place_rank=rng.choice([8, 12, 16, 20]),
+                importance=round(rng.random(), 4),
+            )
+        )
+    return places
+
+
+def _per_call_us(fn, queries: list[str]) -> float:
+    start = time.perf_counter()
+    for q in queries:
+        fn(q)
+    return (time.perf_counter() - start) / len(queries) * 1e6
+
+
+async def _async_per_call_us(client, queries: list[str]) -> float:
+    start = time.perf_counter()
+    for q in queries:
+        await client.search(q)
+    return (time.perf_counter() - start) / len(queries) * 1e6
+
+
+async def _main(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.index
+        if path is None:
+            path = Path(tmp) / "bench.idx"
+            start = time.perf_counter()
+            stats = build_index(_synthetic(args.places, args.seed), path)
+            print(
+                f"built {stats['records']} places / {stats['names']} names, "
+                f"{stats['bytes'] / 1e6:.1f} MB in {time.perf_counter() - start:.2f}s"
+            )
+        start = time.perf_counter()
+        index = GazetteerIndex(path)
+        open_us = (time.perf_counter() - start) * 1e6
+        rng = random.Random(args.seed)
+        names = index.names()
+        hits = [rng.choice(names) for _ in range(args.lookups)]
+        misses = [f"zz{rng.random()}" for _ in range(args.lookups)]
+
+        rows = [
+            ["open", f"{open_us:.1f}"],
+            ["record_ids (hit)", f"{_per_call_us(index.record_ids, hits):.2f}"],
+            ["lookup (hit)", f"{_per_call_us(index.lookup, hits):.2f}"],
+            ["lookup (miss)", f"{_per_call_us(index.lookup, misses):.2f}"],
+        ]
+        index.close()
+
+        client = GazetteerClient(path)
+        rows.append(["GazetteerClient.search", f"{await _async_per_call_us(client, hits):.2f}"])
+        await client.aclose()
+
+        async with StubServer(nominatim_handler()) as server:
+            nominatim = NominatimClient(server.url)
+            sample = hits[: args.http_lookups]
+            us = await _async_per_call_us(nominatim, sample)
+            await nominatim.aclose()
+        rows.append(["NominatimClient.search (stub)", f"{us:.2f}"])
+
+    print("| operation | us/call |")
+    print("| --- | --- |")
+    for row in rows:
+        print("| " + " | ".join(row) + " |")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--places", type=int, default=200_000, help="synthetic places")
+    parser.add_argument("--index", type=Path, default=None, help="existing index file")
+    parser.add_argument("--lookups", type=int, default=50_000, help="timed lookups")
+    parser.add_argument(
+        "--http-lookups", type=int, default=500, help="timed stub Nominatim searches"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(_main(parser.parse_args()))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Connection reuse of LlmClient: per-call client vs. the shared pool.
+
+Starts a local stub ``/chat/completions`` endpoint, issues the same number
+of ``generate`` calls through a fresh client per call (the old behaviour)
+and through :class:`PipelineResources`, and reports how many TCP
+connections the stub accepted in each mode.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+from stub_backends import StubServer, llm_handler
+
+from locitorium.clients.llm import LlmClient
+from locitorium.config import AppConfig
+from locitorium.pipeline.resources import PipelineResources
+
+
+async def _per_call(base_url: str, calls: int, concurrency: int) -> None:
+    sem = asyncio.Semaphore(concurrency)
+
+    async def _one() -> None:
+        async with sem:
+            client = LlmClient(base_url, "stub")
+            try:
+                await client.generate("prompt", {"type": "object"})
+            finally:
+                await client.aclose()
+
+    await asyncio.gather(*(_one() for _ in range(calls)))
+
+
+async def _pooled(base_url: str, calls: int, concurrency: int) -> None:
+    config = AppConfig(openai_base_url=base_url, openai_model="stub")
+    sem = asyncio.Semaphore(concurrency)
+    async with PipelineResources(config) as resources:
+        client = resources.llm_client(config)
+
+        async def _one() -> None:
+            async with sem:
+                await client.generate("prompt", {"type": "object"})
+
+        await asyncio.gather(*(_one() for _ in range(calls)))
+
+
+async def _measure(mode: str, calls: int, concurrency: int, delay_s: float) -> list[str]:
+    async with StubServer(llm_handler(delay_s=delay_s)) as server:
+        base_url = f"{server.url}/v1"
+        start = time.perf_counter()
+        if mode == "per_call":
+            await _per_call(base_url, calls, concurrency)
+        else:
+            await _pooled(base_url, calls, concurrency)
+        elapsed = time.perf_counter() - start
+        return [
+            mode,
+            str(server.requests),
+            str(server.connections),
+            f"{server.requests / max(server.connections, 1):.1f}",
+            f"{elapsed:.3f}",
+        ]
+
+
+async def _main(args: argparse.Namespace) -> None:
+    header = ["mode", "requests", "connections", "requests/conn", "wall_s"]
+    print("| " + " | ".join(header) + " |")
+    print("| " + " | ".join("---" for _ in header) + " |")
+    for mode in ("per_call", "pooled"):
+        row = await _measure(mode, args.calls, args.concurrency, args.delay)
+        print("| " + " | ".join(row) + " |")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200, help="generate() calls")
+    parser.add_argument("--concurrency", type=int, default=8, help="calls in flight")
+    parser.add_argument(
+        "--delay", type=float, default=0.005, help="stub response delay (s)"
+    )
+    asyncio.run(_main(parser.parse_args()))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Fixed vs. adaptive (AIMD) Nominatim concurrency against a capacity ceiling.
+
+Starts a local stub ``/search`` that answers 503 (and slows down) beyond
+``--capacity`` concurrent requests, then runs the same burst of distinct
+searches through :class:`NominatimClient` with a low fixed in-flight
+limit, a high fixed limit and the adaptive limiter. Reports throughput,
+upstream 5xx responses, failed searches, latency percentiles and the
+limit the adaptive run settled on.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from stub_backends import StubRequest, StubResponse, StubServer, nominatim_handler
+
+from locitorium.clients.concurrency import AdaptiveLimit, RateLimiter
+from locitorium.clients.nominatim import NominatimClient
+
+
+def _limiter(mode: str, args: argparse.Namespace) -> RateLimiter:
+    if mode == "fixed_low":
+        return RateLimiter(max_in_flight=args.low)
+    if mode == "fixed_high":
+        return RateLimiter(max_in_flight=args.high)
+    return RateLimiter(
+        adaptive=AdaptiveLimit(initial=args.low, min_limit=1, max_limit=args.high)
+    )
+
+
+async def _measure(mode: str, args: argparse.Namespace) -> list[str]:
+    inner = nominatim_handler(
+        delay_s=args.delay, capacity=args.capacity, overload_delay_s=args.delay
+    )
+    errors = {"5xx": 0}
+
+    async def handler(request: StubRequest) -> StubResponse:
+        response = await inner(request)
+        if response.status >= 500:
+            errors["5xx"] += 1
+        return response
+
+    async with StubServer(handler) as server:
+        limiter = _limiter(mode, args)
+        client = NominatimClient(
+            server.url, max_connections=args.high, limiter=limiter
+        )
+        latencies: list[float] = []
+        failed = 0
+        sem = asyncio.Semaphore(args.callers)
+
+        async def _one(i: int) -> None:
+            nonlocal failed
+            async with sem:
+                start = time.perf_counter()
+                try:
+                    await client.search(f"place {i}")
+                except Exception:
+                    failed += 1
+                else:
+                    latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(_one(i) for i in range(args.searches)))
+        elapsed = time.perf_counter() - start
+        await client.aclose()
+
+    quantiles = statistics.quantiles(latencies, n=20) if len(latencies) > 1 else [0.0] * 19
+    return [
+        mode,
+        f"{len(latencies) / elapsed:.1f}",
+        str(errors["5xx"]),
+        str(failed),
+        f"{statistics.median(latencies) * 1000:.1f}" if latencies else "-",
+        f"{quantiles[18] * 1000:.1f}",
+        str(limiter.limit),
+    ]
+
+
+async def _main(args: argparse.Namespace) -> None:
+    header = ["mode", "searches/s", "upstream_5xx", "failed", "p50_ms", "p95_ms", "limit"]
+    print("| " + " | ".join(header) + " |")
+    print("| " + " | ".join("---" for _ in header) + " |")
+    for mode in ("fixed_low", "fixed_high", "adaptive"):
+        row = await _measure(mode, args)
+        print("| " + " | ".join(row) + " |")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--searches", type=int, default=400, help="distinct searches")
+    parser.add_argument("--callers", type=int, default=64, help="searches offered at once")
+    parser.add_argument("--capacity", type=int, default=8, help="stub capacity ceiling")
+    parser.add_argument("--low", type=int, default=2, help="fixed low / initial limit")
+    parser.add_argument("--high", type=int, default=32, help="fixed high / max limit")
+    parser.add_argument(
+        "--delay", type=float, default=0.01, help="stub response delay (s)"
+    )
+    asyncio.run(_main(parser.parse_args()))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
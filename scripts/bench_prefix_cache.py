@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""Time to first token with and without prompt-prefix caching.
+
+Sends an extract and a resolve prompt per document of the dataset, as a
+streamed completion, and reports the mean time to the first content
+delta per stage for three setups:
+
+``plain``
+    no hints: every request prefills its whole prompt.
+``cache_prompt``
+    ``cache_prompt`` only: a request reuses whatever its slot prefilled
+    last, which is the other stage's prompt when extract and resolve
+    take turns on the same slot.
+``cache_prompt+slots+warm-up``
+    extract and resolve pinned to their own slots, prefixes primed at
+    startup.
+
+By default it runs against a stub that imitates llama-server (a slot
+keeps the KV cache of its last prompt; prefill costs ``--prefill-ms``
+per 100 characters not shared with it; requests without a slot id take
+the first idle slot). ``--base-url`` points it at a
+real llama-server (``http://host:8080/v1``) started with ``--parallel``
+of at least 2.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from collections.abc import AsyncIterator
+
+from stub_backends import StubRequest, StubResponse, StubServer
+
+from locitorium.config import AppConfig
+from locitorium.eval.io import read_jsonl
+from locitorium.pipeline.resources import PipelineResources
+from locitorium.prompts.extract import ExtractOutput, build_prompt
+from locitorium.prompts.resolve import ResolveOutput
+from locitorium.prompts.resolve import build_prompt as build_resolve_prompt
+
+SETUPS = {
+    "plain": {},
+    "cache_prompt": {"llm_cache_prompt": True},
+    "cache_prompt+slots+warm-up": {
+        "llm_cache_prompt": True,
+        "llm_extract_slots": "0",
+        "llm_resolve_slots": "1",
+        "llm_warm_up": True,
+    },
+}
+
+
+def _common_prefix(a: str, b: str) -> int:
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
+def _llama_stub(slots: int, prefill_s_per_char: float):
+    cache = [""] * slots
+    busy = [False] * slots
+
+    async def handle(request: StubRequest) -> StubResponse:
+        body = request.json()
+        prompt = body["messages"][0]["content"]
+        slot = body.get("id_slot")
+        if slot is None:
+            slot = busy.index(False) if False in busy else 0
+        reused = 0
+        if body.get("cache_prompt"):
+            reused = _common_prefix(prompt, cache[slot])
+        cache[slot] = prompt
+        prefill = (len(prompt) - reused) * prefill_s_per_char
+
+        async def events() -> AsyncIterator[bytes]:
+            busy[slot] = True
+            try:
+                await asyncio.sleep(prefill)
+                chunk = {"choices": [{"delta": {"content": "{}"}}]}
+                yield f"data: {json.dumps(chunk)}\n\n".encode("utf-8")
+                yield b"data: [DONE]\n\n"
+            finally:
+                busy[slot] = False
+
+        return StubResponse(chunks=events(), content_type="text/event-stream")
+
+    return handle
+
+
+class _FirstDelta:
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+        self.first: float | None = None
+
+    def reset(self) -> None:
+        self.start = time.perf_counter()
+        self.first = None
+
+    def feed(self, delta: str) -> None:
+        if self.first is None:
+            self.first = time.perf_counter() - self.start
+
+
+async def _ttft(client, prompt: str, schema: dict) -> float:
+    listener = _FirstDelta()
+    try:
+        await client.generate(prompt, schema, listener=listener)
+    except ValueError:
+        pass  # the stub's "{}" is not a valid answer; only timing matters
+    return listener.first or 0.0
+
+
+async def _run(base_url: str, texts: list[str], overrides: dict) -> tuple[float, float]:
+    config = AppConfig(
+        openai_base_url=base_url,
+        openai_model=os.environ.get("OPENAI_MODEL", "stub"),
+        **overrides,
+    )
+    extract_ttft: list[float] = []
+    resolve_ttft: list[float] = []
+    async with PipelineResources(config) as resources:
+        if config.llm_warm_up:
+            await resources.warm_up(config)
+        extract_llm = resources.llm_client(config, stage="extract")
+        resolve_llm = resources.llm_client(config, stage="resolve")
+        for text in texts:
+            extract_ttft.append(
+                await _ttft(
+                    extract_llm, build_prompt(text), ExtractOutput.model_json_schema()
+                )
+            )
+            payload = [{"mention_id": "d:0", "mention": text[:10], "candidates": []}]
+            resolve_ttft.append(
+                await _ttft(
+                    resolve_llm,
+                    build_resolve_prompt(text, payload),
+                    ResolveOutput.model_json_schema(),
+                )
+            )
+    return statistics.mean(extract_ttft), statistics.mean(resolve_ttft)
+
+
+async def _main(args: argparse.Namespace) -> None:
+    texts = [doc["text"] for doc in read_jsonl(args.dataset)][: args.docs]
+    header = ["setup", "extract TTFT ms", "resolve TTFT ms"]
+    print("| " + " | ".join(header) + " |")
+    print("| " + " | ".join("---" for _ in header) + " |")
+    for label, overrides in SETUPS.items():
+        if args.base_url:
+            extract, resolve = await _run(args.base_url, texts, overrides)
+        else:
+            stub = _llama_stub(args.slots, args.prefill_ms / 1000 / 100)
+            async with StubServer(stub) as server:
+                extract, resolve = await _run(f"{server.url}/v1", texts, overrides)
+        print(f"| {label} | {extract * 1000:.1f} | {resolve * 1000:.1f} |")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dataset", default="data/phase0/dataset.jsonl")
+    parser.add_argument("--docs", type=int, default=20)
+    parser.add_argument("--base-url", help="real llama-server, e.g. http://h:8080/v1")
+    parser.add_argument("--slots", type=int, default=2, help="stub slots")
+    parser.add_argument(
+        "--prefill-ms", type=float, default=2.0, help="stub prefill per 100 chars"
+    )
+    asyncio.run(_main(parser.parse_args()))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Throughput of ``locitorium resolve`` at several request concurrencies.
+
+Feeds ``--records`` synthetic records through ``resolve_records`` against
+``--replicas`` stub locitorium servers whose ``/api`` answers after
+``--latency`` seconds (up to ``--server-slots`` requests at once each),
+balanced by a :class:`ServerPool`, and checks that the rows still come
+out in input order. With ``--down`` one more replica that refuses every
+connection is added to the pool; the per-server report shows how it
+was ejected.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from contextlib import AsyncExitStack
+
+from stub_backends import StubRequest, StubResponse, StubServer
+
+from locitorium.pipeline.balancer import ServerPool
+from locitorium.pipeline.stream import StreamOptions, resolve_records
+
+
+def _api(latency_s: float, slots: int):
+    gate = asyncio.Semaphore(slots)
+
+    async def handle(request: StubRequest) -> StubResponse:
+        text = request.query.get("q", "")
+        async with gate:
+            await asyncio.sleep(latency_s)
+        result = {
+            "mention_id": f"{text}:0",
+            "mention": text,
+            "status": "resolved",
+            "selected": None,
+            "candidates": [],
+        }
+        return StubResponse(
+            payload={"doc_id": text, "model_info": {}, "results": [result]}
+        )
+
+    return handle
+
+
+async def _run(
+    pool: ServerPool, records: list[dict], concurrency: int
+) -> tuple[float, bool]:
+    start = time.perf_counter()
+    ids = [
+        row["input_id"]
+        async for row in resolve_records(
+            records,
+            StreamOptions(),
+            servers=pool,
+            timeout_s=5.0,
+            concurrency=concurrency,
+        )
+        if row["status"] == "resolved"
+    ]
+    return time.perf_counter() - start, ids == [r["id"] for r in records]
+
+
+async def _main(args: argparse.Namespace) -> None:
+    records = [{"id": str(i), "text": f"Tokyo {i}"} for i in range(args.records)]
+    header = ["concurrency", "records", "wall_s", "records/s", "in order"]
+    print("| " + " | ".join(header) + " |")
+    print("| " + " | ".join("---" for _ in header) + " |")
+    async with AsyncExitStack() as stack:
+        urls = []
+        for _ in range(args.replicas):
+            server = StubServer(_api(args.latency, args.server_slots))
+            urls.append((await stack.enter_async_context(server)).url)
+        if args.down:
+            urls.append("http://127.0.0.1:9")  # discard port: nothing listens
+        for concurrency in args.concurrency:
+            pool = ServerPool(urls)
+            elapsed, in_order = await _run(pool, records, concurrency)
+            print(
+                f"| {concurrency} | {len(records)} | {elapsed:.2f} "
+                f"| {len(records) / elapsed:.1f} | {in_order} |"
+            )
+    print()
+    for line in pool.report():
+        print(line)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--latency", type=float, default=0.05, help="s per request")
+    parser.add_argument("--server-slots", type=int, default=16)
+    parser.add_argument("--replicas", type=int, default=1)
+    parser.add_argument("--down", action="store_true", help="add a dead replica")
+    asyncio.run(_main(parser.parse_args()))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""Resolve prompt size, latency and top-1: json vs. compact payloads.
+
+Offline part (always): gives every gold mention of the dataset ten
+Nominatim-like candidates (long display names; mentions in the same
+document share some places, as real search results do) and reports the
+estimated prompt tokens per document for each payload variant.
+
+With ``--pipeline`` it also runs the full pipeline once per variant
+against the backends configured in the environment (``OPENAI_*``,
+``NOMINATIM_BASE_URL``, ...) and reports the mean ``resolve_s``, the
+prompt tokens actually sent and the scored top-1 accuracy.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+from pathlib import Path
+
+from locitorium.config import config_from_env
+from locitorium.eval.io import load_gold, read_jsonl
+from locitorium.eval.metrics import topk_accuracy
+from locitorium.models.schema import Candidate, GoldDoc
+from locitorium.pipeline.resolve_payload import ResolvePayload, estimate_tokens
+from locitorium.pipeline.runner import run_dataset
+
+
+def _variants(budget: int) -> list[tuple[str, str, int | None]]:
+    """(label, resolve_payload, resolve_token_budget)"""
+    return [
+        ("json", "json", None),
+        ("compact", "compact", None),
+        (f"compact, budget {budget}", "compact", budget),
+    ]
+
+
+def _synthetic(
+    doc: GoldDoc, per_mention: int
+) -> dict[str, tuple[str, list[Candidate]]]:
+    shared = [
+        Candidate(
+            rank=i + 1,
+            osm_type="relation",
+            osm_id=1_000 + i,
+            display_name=(
+                f"Region {i}, Some Prefecture, Some Region, 100-000{i}, Country"
+            ),
+            lat="0",
+            lon="0",
+            bbox=[],
+            country_code="jp",
+            category="boundary",
+        )
+        for i in range(per_mention // 2)
+    ]
+    candidates = {}
+    for n, mention in enumerate(doc.mentions):
+        own = [
+            Candidate(
+                rank=i + 1,
+                osm_type="node",
+                osm_id=n * 100 + i,
+                display_name=(
+                    f"{mention.mention}, Block {i}, Ward {i}, City, County, "
+                    f"Prefecture, Region, 000-{i:04d}, Country"
+                ),
+                lat="0",
+                lon="0",
+                bbox=[],
+                country_code=mention.iso_country,
+                category="place",
+            )
+            for i in range(per_mention - len(shared))
+        ]
+        candidates[mention.mention_id] = (mention.mention, own + shared)
+    return candidates
+
+
+def _offline(gold: list[GoldDoc], per_mention: int, budget: int) -> None:
+    header = ["payload", "tokens mean", "tokens max"]
+    print("| " + " | ".join(header) + " |")
+    print("| " + " | ".join("---" for _ in header) + " |")
+    for label, fmt, token_budget in _variants(budget):
+        payload = ResolvePayload(format=fmt, token_budget=token_budget)
+        tokens = []
+        for doc in gold:
+            if not doc.mentions:
+                continue
+            candidates = _synthetic(doc, per_mention)
+            prompt = asyncio.run(payload.prompt(doc.text, candidates))
+            tokens.append(estimate_tokens(prompt))
+        print(f"| {label} | {statistics.mean(tokens):.0f} | {max(tokens)} |")
+
+
+def _pipeline(docs: list[dict], gold: list[GoldDoc], budget: int) -> None:
+    print()
+    print("| payload | resolve_s mean | prompt tokens mean | top1 |")
+    print("| --- | --- | --- | --- |")
+    for label, fmt, token_budget in _variants(budget):
+        config = config_from_env(
+            resolve_payload=fmt, resolve_token_budget=token_budget
+        )
+        preds = asyncio.run(run_dataset(docs, config))
+        resolve = [p.metrics.resolve_s for p in preds if p.metrics.resolve_s]
+        tokens = [
+            p.metrics.counters.get("resolve_prompt_tokens", 0)
+            for p in preds
+            if p.metrics.resolve_s
+        ]
+        top1 = topk_accuracy(gold, preds, k=1)["top1"]
+        print(
+            f"| {label} | {statistics.mean(resolve or [0.0]):.3f} "
+            f"| {statistics.mean(tokens or [0]):.0f} | {top1:.3f} |"
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--dataset", type=Path, default=Path("data/phase0/dataset.jsonl")
+    )
+    parser.add_argument("--candidates", type=int, default=10, help="per mention")
+    parser.add_argument("--budget", type=int, default=300, help="prompt tokens")
+    parser.add_argument(
+        "--pipeline", action="store_true", help="also run the full pipeline"
+    )
+    args = parser.parse_args()
+
+    gold = load_gold(args.dataset)
+    _offline(gold, args.candidates, args.budget)
+    if args.pipeline:
+        _pipeline(read_jsonl(args.dataset), gold, args.budget)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""resolve_s of one long resolve prompt vs. sharded concurrent prompts.
+
+Starts a stub LLM that imitates llama-server with ``--slots`` parallel
+slots: every request holds a slot for a prefill time plus a decode time
+per result it writes (one per mention in the prompt). Resolves the same
+documents of ``--mentions`` mentions with a single prompt and with
+:class:`ShardPolicy`, and reports the mean ``resolve_s`` of each.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import re
+import statistics
+import time
+
+from stub_backends import StubRequest, StubResponse, StubServer, chat_completion
+
+from locitorium.config import AppConfig
+from locitorium.models.schema import Candidate
+from locitorium.pipeline.resolver import ShardPolicy, resolve_candidates
+from locitorium.pipeline.resources import PipelineResources
+
+_MENTION_ID = re.compile(r'"mention_id": "([^"]+)"')
+
+
+def _llm(slots: int, prefill_s: float, decode_s: float):
+    sem = asyncio.Semaphore(slots)
+
+    async def handle(request: StubRequest) -> StubResponse:
+        prompt = request.json()["messages"][0]["content"]
+        ids = _MENTION_ID.findall(prompt)
+        async with sem:
+            await asyncio.sleep(prefill_s + decode_s * len(ids))
+        results = [
+            {"mention_id": mid, "mention": mid, "choice": 0, "status": "resolved"}
+            for mid in ids
+        ]
+        return StubResponse(payload=chat_completion(json.dumps({"results": results})))
+
+    return handle
+
+
+def _candidates(doc: int, mentions: int) -> dict[str, tuple[str, list[Candidate]]]:
+    return {
+        f"d{doc}:{i}": (
+            f"place {i}",
+            [
+                Candidate(
+                    rank=r + 1,
+                    osm_type="relation",
+                    osm_id=i * 10 + r,
+                    display_name=f"place {i}/{r}, Region, Country",
+                    lat="0",
+                    lon="0",
+                    bbox=[],
+                    country_code="jp",
+                )
+                for r in range(3)
+            ],
+        )
+        for i in range(mentions)
+    }
+
+
+async def _main(args: argparse.Namespace) -> None:
+    header = ["mode", "prompts/doc", "resolve_s mean"]
+    print("| " + " | ".join(header) + " |")
+    print("| " + " | ".join("---" for _ in header) + " |")
+    async with StubServer(_llm(args.slots, args.prefill, args.decode)) as server:
+        config = AppConfig(openai_base_url=f"{server.url}/v1", openai_model="stub")
+        policy = ShardPolicy(shard_size=args.shard_size, slots=args.slots)
+        async with PipelineResources(config) as resources:
+            llm = resources.llm_client(config)
+            for label, shards in (("single", None), ("sharded", policy)):
+                before = server.requests
+                times = []
+                for doc in range(args.docs):
+                    start = time.perf_counter()
+                    await resolve_candidates(
+                        llm,
+                        "text",
+                        _candidates(doc, args.mentions),
+                        tag=f"d{doc}_resolve",
+                        shards=shards,
+                    )
+                    times.append(time.perf_counter() - start)
+                prompts = (server.requests - before) / args.docs
+                print(f"| {label} | {prompts:.0f} | {statistics.mean(times):.3f} |")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=5)
+    parser.add_argument("--mentions", type=int, default=20)
+    parser.add_argument("--slots", type=int, default=4)
+    parser.add_argument("--shard-size", type=int, default=5)
+    parser.add_argument("--prefill", type=float, default=0.05, help="s per prompt")
+    parser.add_argument("--decode", type=float, default=0.03, help="s per result")
+    asyncio.run(_main(parser.parse_args()))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
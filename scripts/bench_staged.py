@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""Dataset throughput: one document per slot vs. per-stage worker pools.
+
+Runs synthetic documents (``--mentions`` place names each) through the
+full pipeline against a stub LLM with ``--llm-slots`` parallel slots
+(calls beyond that queue, like llama-server --parallel) and a stub
+Nominatim. The per-document runs use ``--concurrency``; the staged run
+uses ``--stage-workers`` (extract, candidates, resolve) and prints the
+per-stage utilization and queue depth next to the throughput.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from stub_backends import (
+    StubRequest,
+    StubResponse,
+    StubServer,
+    chat_completion,
+    nominatim_handler,
+)
+
+from locitorium.config import AppConfig
+from locitorium.eval.io import iter_jsonl
+from locitorium.pipeline.runner import run_dataset_stream
+
+PLACES = ["Tokyo", "Osaka", "Kyoto", "Nagoya", "Sapporo", "Fukuoka", "Kobe"]
+
+
+def _llm(args: argparse.Namespace):
+    slots = asyncio.Semaphore(args.llm_slots)
+
+    async def handle(request: StubRequest) -> StubResponse:
+        prompt = request.json()["messages"][0]["content"]
+        async with slots:
+            if prompt.startswith("Extract"):
+                await asyncio.sleep(args.extract_delay)
+                text = prompt.rsplit("TEXT:\n", 1)[-1]
+                words = [w for w in text.split() if w in PLACES]
+                body = {"mentions": [{"mention": w} for w in words]}
+            else:
+                await asyncio.sleep(args.resolve_delay)
+                body = {"results": []}
+        return StubResponse(payload=chat_completion(json.dumps(body)))
+
+    return handle
+
+
+def _docs(args: argparse.Namespace) -> list[dict]:
+    return [
+        {
+            "doc_id": f"d{i}",
+            "text": " ".join(
+                PLACES[(i + j) % len(PLACES)] for j in range(args.mentions)
+            ),
+        }
+        for i in range(args.docs)
+    ]
+
+
+async def _run(
+    args: argparse.Namespace, out: Path, concurrency: int, staged: bool
+) -> tuple[float, dict]:
+    extract, candidates, resolve = args.stage_workers
+    async with (
+        StubServer(_llm(args)) as llm,
+        StubServer(nominatim_handler(delay_s=args.search_delay)) as nominatim,
+    ):
+        config = AppConfig(
+            openai_base_url=f"{llm.url}/v1",
+            nominatim_base_url=nominatim.url,
+            nominatim_cache_entries=0,
+            staged=staged,
+            stage_extract_workers=extract,
+            stage_candidate_workers=candidates,
+            stage_resolve_workers=resolve,
+            stage_queue_size=args.queue_size,
+        )
+        start = time.perf_counter()
+        stats = await run_dataset_stream(_docs(args), config, str(out), concurrency)
+        return time.perf_counter() - start, stats
+
+
+async def _main(args: argparse.Namespace) -> None:
+    runs = [(f"per-document x{c}", c, False) for c in args.concurrency]
+    runs.append(("staged " + "/".join(map(str, args.stage_workers)), 1, True))
+    header = ["run", "docs", "wall_s", "docs/s", "mean total_s", "in order"]
+    print("| " + " | ".join(header) + " |")
+    print("| " + " | ".join("---" for _ in header) + " |")
+    stage_stats: dict = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, concurrency, staged in runs:
+            out = Path(tmp) / "predictions.jsonl"
+            elapsed, stats = await _run(args, out, concurrency, staged)
+            rows = list(iter_jsonl(out))
+            total = statistics.mean(row["metrics"]["total_s"] for row in rows)
+            in_order = [row["doc_id"] for row in rows] == [
+                f"d{i}" for i in range(args.docs)
+            ]
+            print(
+                f"| {name} | {len(rows)} | {elapsed:.2f} "
+                f"| {len(rows) / elapsed:.1f} | {total:.3f} | {in_order} |"
+            )
+            stage_stats = stats or stage_stats
+    print()
+    header = ["stage", "workers", "processed", "utilization", "queue_max"]
+    header += ["avg_queue_depth"]
+    print("| " + " | ".join(header) + " |")
+    print("| " + " | ".join("---" for _ in header) + " |")
+    for stage, stats in stage_stats.items():
+        print(f"| {stage} | " + " | ".join(str(stats[k]) for k in header[1:]) + " |")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=200)
+    parser.add_argument("--mentions", type=int, default=3, help="per document")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[4, 8, 16])
+    parser.add_argument(
+        "--stage-workers", type=int, nargs=3, default=[3, 8, 3], metavar="N"
+    )
+    parser.add_argument("--queue-size", type=int, default=8)
+    parser.add_argument("--llm-slots", type=int, default=4)
+    parser.add_argument("--extract-delay", type=float, default=0.05, help="s/call")
+    parser.add_argument("--resolve-delay", type=float, default=0.05, help="s/call")
+    parser.add_argument("--search-delay", type=float, default=0.1, help="s/search")
+    asyncio.run(_main(parser.parse_args()))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Wall time of run_doc with and without streamed extraction.
+
+Starts a stub LLM that streams the extraction answer delta by delta and a
+stub Nominatim with a fixed search latency, then runs the same documents
+with ``extract_stream`` off and on. With streaming, each mention's search
+starts as soon as the LLM has produced it, so most of ``candidate_s``
+hides behind the rest of the extraction.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from stub_backends import (
+    StubRequest,
+    StubResponse,
+    StubServer,
+    llm_handler,
+    llm_stream_handler,
+    nominatim_handler,
+)
+
+from locitorium.config import AppConfig
+from locitorium.pipeline.resources import PipelineResources
+from locitorium.pipeline.runner import run_doc
+
+PLACES = ["Tokyo", "Osaka", "Kyoto", "Nagoya", "Sapporo", "Fukuoka", "Sendai", "Kobe"]
+
+
+def _llm(mentions: int, first_delay_s: float, delta_delay_s: float):
+    content = json.dumps({"mentions": [{"mention": p} for p in PLACES[:mentions]]})
+    extract = llm_stream_handler(content, first_delay_s, delta_delay_s)
+    resolve = llm_handler('{"results": []}')
+
+    async def handle(request: StubRequest) -> StubResponse:
+        prompt = request.json()["messages"][0]["content"]
+        if prompt.startswith("Extract"):
+            return await extract(request)
+        return await resolve(request)
+
+    return handle
+
+
+async def _run(args: argparse.Namespace, stream: bool) -> list[str]:
+    text = " and ".join(PLACES[: args.mentions])
+    llm = _llm(args.mentions, args.first_delay, args.delta_delay)
+    async with (
+        StubServer(llm) as llm_server,
+        StubServer(nominatim_handler(delay_s=args.search_delay)) as nominatim,
+    ):
+        config = AppConfig(
+            openai_base_url=f"{llm_server.url}/v1",
+            nominatim_base_url=nominatim.url,
+            nominatim_cache_entries=0,
+            extract_stream=stream,
+            deadline_s=60.0,
+        )
+        totals: list[float] = []
+        candidates: list[float] = []
+        async with PipelineResources(config) as resources:
+            for i in range(args.docs):
+                start = time.perf_counter()
+                pred = await run_doc(text, f"d{i}", config, resources)
+                totals.append(time.perf_counter() - start)
+                candidates.append(pred.metrics.candidate_s or 0.0)
+    return [
+        "on" if stream else "off",
+        f"{statistics.mean(totals):.3f}",
+        f"{statistics.mean(candidates):.3f}",
+    ]
+
+
+async def _main(args: argparse.Namespace) -> None:
+    header = ["extract_stream", "total_s mean", "candidate_s mean"]
+    print("| " + " | ".join(header) + " |")
+    print("| " + " | ".join("---" for _ in header) + " |")
+    for stream in (False, True):
+        print("| " + " | ".join(await _run(args, stream)) + " |")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=10)
+    parser.add_argument("--mentions", type=int, default=6, choices=range(1, 9))
+    parser.add_argument("--first-delay", type=float, default=0.1, help="TTFT, s")
+    parser.add_argument("--delta-delay", type=float, default=0.01, help="s/delta")
+    parser.add_argument("--search-delay", type=float, default=0.15, help="s/search")
+    asyncio.run(_main(parser.parse_args()))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
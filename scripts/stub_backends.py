@@ -0,0 +1,233 @@
+"""Local stub backends for the benchmark scripts.
+
+A minimal HTTP/1.1 server on asyncio streams that keeps connections alive
+and counts how many TCP connections and requests it has seen, plus
+handlers that imitate an OpenAI-compatible LLM endpoint and Nominatim.
+Nothing here is used by the package itself.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+
+@dataclass
+class StubRequest:
+    method: str
+    path: str
+    query: dict[str, str]
+    body: bytes
+
+    def json(self) -> Any:
+        return json.loads(self.body or b"null")
+
+
+@dataclass
+class StubResponse:
+    status: int = 200
+    payload: Any = None
+    # When set, the body is sent with chunked transfer encoding, one chunk
+    # per item, which is enough to imitate SSE streaming.
+    chunks: AsyncIterator[bytes] | None = None
+    content_type: str = "application/json"
+
+
+Handler = Callable[[StubRequest], Awaitable[StubResponse]]
+
+_REASONS = {200: "OK", 404: "Not Found", 429: "Too Many Requests", 503: "Service Unavailable"}
+
+
+@dataclass
+class StubServer:
+    """Keep-alive HTTP/1.1 server that records connection reuse."""
+
+    handler: Handler
+    host: str = "127.0.0.1"
+    connections: int = 0
+    requests: int = 0
+    in_flight: int = 0
+    max_in_flight: int = 0
+    _server: asyncio.AbstractServer | None = field(default=None, repr=False)
+
+    @property
+    def url(self) -> str:
+        assert self._server is not None
+        port = self._server.sockets[0].getsockname()[1]
+        return f"http://{self.host}:{port}"
+
+    async def start(self) -> str:
+        self._server = await asyncio.start_server(self._serve, self.host, 0)
+        return self.url
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def __aenter__(self) -> StubServer:
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def _serve(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self.connections += 1
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                self.requests += 1
+                self.in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self.in_flight)
+                try:
+                    response = await self.handler(request)
+                finally:
+                    self.in_flight -= 1
+                await self._write_response(writer, response)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_request(reader: asyncio.StreamReader) -> StubRequest | None:
+        line = await reader.readline()
+        if not line:
+            return None
+        method, target, _ = line.decode("latin-1").split(" ", 2)
+        headers: dict[str, str] = {}
+        while True:
+            raw = await reader.readline()
+            if raw in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = raw.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", "0"))
+        body = await reader.readexactly(length) if length else b""
+        parts = urlsplit(target)
+        query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        return StubRequest(method, parts.path, query, body)
+
+    @staticmethod
+    async def _write_response(
+        writer: asyncio.StreamWriter, response: StubResponse
+    ) -> None:
+        reason = _REASONS.get(response.status, "Status")
+        head = [
+            f"HTTP/1.1 {response.status} {reason}",
+            f"Content-Type: {response.content_type}",
+        ]
+        if response.chunks is None:
+            body = json.dumps(response.payload).encode("utf-8")
+            head.append(f"Content-Length: {len(body)}")
+            writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+            await writer.drain()
+            return
+        head.append("Transfer-Encoding: chunked")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+        async for chunk in response.chunks:
+            writer.write(f"{len(chunk):x}\r\n".encode("latin-1") + chunk + b"\r\n")
+            await writer.drain()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+
+def chat_completion(content: str) -> dict[str, Any]:
+    return {"choices": [{"message": {"content": content}, "finish_reason": "stop"}]}
+
+
+def llm_handler(content: str = '{"mentions": []}', delay_s: float = 0.0) -> Handler:
+    """OpenAI-compatible ``/chat/completions`` that always answers ``content``."""
+
+    async def handle(request: StubRequest) -> StubResponse:
+        if delay_s:
+            await asyncio.sleep(delay_s)
+        return StubResponse(payload=chat_completion(content))
+
+    return handle
+
+
+def llm_stream_handler(
+    content: str = '{"mentions": []}',
+    first_delay_s: float = 0.0,
+    delta_delay_s: float = 0.0,
+    delta_chars: int = 4,
+) -> Handler:
+    """Like :func:`llm_handler`, but streams when the request asks for it.
+
+    The answer is sent as SSE deltas of ``delta_chars`` characters, one
+    every ``delta_delay_s`` after ``first_delay_s``, roughly how a local
+    model decodes. Non-streaming requests wait for the whole answer.
+    """
+    pieces = [content[i : i + delta_chars] for i in range(0, len(content), delta_chars)]
+
+    async def events() -> AsyncIterator[bytes]:
+        await asyncio.sleep(first_delay_s)
+        for piece in pieces:
+            chunk = {"choices": [{"delta": {"content": piece}}]}
+            yield f"data: {json.dumps(chunk)}\n\n".encode("utf-8")
+            await asyncio.sleep(delta_delay_s)
+        yield b"data: [DONE]\n\n"
+
+    async def handle(request: StubRequest) -> StubResponse:
+        body = request.json() or {}
+        if body.get("stream"):
+            return StubResponse(chunks=events(), content_type="text/event-stream")
+        await asyncio.sleep(first_delay_s + len(pieces) * delta_delay_s)
+        return StubResponse(payload=chat_completion(content))
+
+    return handle
+
+
+def nominatim_item(name: str, country_code: str = "jp", **extra: Any) -> dict[str, Any]:
+    item = {
+        "osm_type": "relation",
+        "osm_id": abs(hash(name)) % 10_000_000,
+        "display_name": name,
+        "lat": "35.0",
+        "lon": "139.0",
+        "boundingbox": ["0", "1", "2", "3"],
+        "address": {"country_code": country_code},
+        "category": "boundary",
+        "place_rank": 16,
+        "importance": 0.5,
+    }
+    item.update(extra)
+    return item
+
+
+def nominatim_handler(
+    delay_s: float = 0.0,
+    capacity: int | None = None,
+    overload_delay_s: float = 0.0,
+) -> Handler:
+    """Nominatim ``/search`` with an optional simulated capacity ceiling.
+
+    Beyond ``capacity`` concurrent searches every extra request slows the
+    others down by ``overload_delay_s`` and is answered with 503, which is
+    roughly how a saturated Nominatim behind a proxy looks from outside.
+    """
+    state = {"active": 0}
+
+    async def handle(request: StubRequest) -> StubResponse:
+        state["active"] += 1
+        try:
+            over = 0 if capacity is None else max(0, state["active"] - capacity)
+            await asyncio.sleep(delay_s + over * overload_delay_s)
+            if over:
+                return StubResponse(status=503, payload={"error": "overloaded"})
+            query = request.query.get("q", "")
+            return StubResponse(payload=[nominatim_item(query)])
+        finally:
+            state["active"] -= 1
+
+    return handle
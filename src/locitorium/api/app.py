@@ -1,28 +1,57 @@
 from __future__ import annotations
 
+import asyncio
+import json
 import uuid
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 from pathlib import Path
 
-from fastapi import FastAPI, HTTPException, Query
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 
-from locitorium.clients.nominatim import NominatimClient
-from locitorium.config import config_from_env
+from locitorium.api.batch import parse_batch, stream_batch
+from locitorium.api.jobs import (
+    JobManager,
+    JobQueueFull,
+    JobStore,
+    job_units,
+    parse_job,
+)
+from locitorium.api.sse import stream_doc
+from locitorium.clients.nominatim import NominatimOverloadedError
+from locitorium.config import AppConfig, config_from_env
+from locitorium.pipeline.candidates import CandidateSource
+from locitorium.pipeline.resources import PipelineResources
 from locitorium.pipeline.runner import run_doc
 
-app = FastAPI(title="locitorium", version="0.1.0")
+
+async def startup_check(client: CandidateSource) -> None:
+    await client.search("Tokyo")
 
 
-@app.on_event("startup")
-async def startup_check() -> None:
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Own the pooled clients for the lifetime of the server process."""
     config = config_from_env()
-    client = NominatimClient(
-        config.nominatim_base_url,
-        timeout_s=config.nominatim_timeout_s,
-        limit=config.nominatim_limit,
-    )
-    await client.search("Tokyo")
+    async with PipelineResources(config) as resources:
+        await startup_check(resources.candidates)
+        if config.llm_warm_up:
+            await resources.warm_up(config)
+        app.state.resources = resources
+        app.state.batch_slots = asyncio.Semaphore(config.batch_max_in_flight)
+        store = JobStore(config.jobs_path)
+        app.state.jobs = JobManager(store, config, resources, app.state.batch_slots)
+        await app.state.jobs.start()
+        try:
+            yield
+        finally:
+            await app.state.jobs.stop()
+            store.close()
+
+
+app = FastAPI(title="locitorium", version="0.1.0", lifespan=lifespan)
 
 
 static_dir = Path(__file__).parent / "static"
@@ -34,22 +63,156 @@ async def home() -> FileResponse:
     return FileResponse(static_dir / "index.html")
 
 
+def _overrides(model: str | None, no_cache: bool) -> dict[str, object]:
+    overrides: dict[str, object] = {}
+    if model:
+        overrides["openai_model"] = model
+    if no_cache:
+        overrides["llm_cache_bypass"] = True
+    return overrides
+
+
+def _request_config(model: str | None, no_cache: bool) -> AppConfig:
+    return config_from_env(**_overrides(model, no_cache))
+
+
 @app.get("/api")
 async def resolve(
+    request: Request,
     q: str = Query(..., min_length=1),
     model: str | None = Query(None),
+    no_cache: bool = Query(False, description="Bypass the LLM response cache"),
 ):
-    config = config_from_env()
-    if model:
-        config = config_from_env(openai_model=model)
+    config = _request_config(model, no_cache)
 
     if len(q) > config.max_chars:
         raise HTTPException(status_code=400, detail="input too long")
 
     doc_id = str(uuid.uuid4())
     try:
-        pred = await run_doc(q, doc_id, config)
+        pred = await run_doc(q, doc_id, config, request.app.state.resources)
+    except NominatimOverloadedError as exc:
+        raise HTTPException(
+            status_code=503, detail=str(exc), headers={"Retry-After": "1"}
+        ) from exc
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
     return pred.model_dump()
+
+
+@app.get("/api/stream")
+async def resolve_stream(
+    request: Request,
+    q: str = Query(..., min_length=1),
+    model: str | None = Query(None),
+    no_cache: bool = Query(False, description="Bypass the LLM response cache"),
+) -> StreamingResponse:
+    """Like ``/api``, but as Server-Sent Events while the pipeline runs."""
+    config = _request_config(model, no_cache)
+    if len(q) > config.max_chars:
+        raise HTTPException(status_code=400, detail="input too long")
+    return StreamingResponse(
+        stream_doc(q, config, request.app.state.resources),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/api/batch")
+async def resolve_batch(
+    request: Request,
+    model: str | None = Query(None),
+    no_cache: bool = Query(False, description="Bypass the LLM response cache"),
+) -> StreamingResponse:
+    """Resolve a JSON or NDJSON list of ``{id, text}``; NDJSON out as done."""
+    config = _request_config(model, no_cache)
+    try:
+        records = parse_batch(
+            await request.body(), request.headers.get("content-type", "")
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    if len(records) > config.batch_max_records:
+        raise HTTPException(
+            status_code=413,
+            detail=f"at most {config.batch_max_records} records per batch",
+        )
+    return StreamingResponse(
+        stream_batch(
+            records,
+            config,
+            request.app.state.resources,
+            request.app.state.batch_slots,
+        ),
+        media_type="application/x-ndjson",
+    )
+
+
+@app.post("/api/jobs", status_code=202)
+async def create_job(
+    request: Request,
+    response: Response,
+    model: str | None = Query(None),
+    no_cache: bool = Query(False, description="Bypass the LLM response cache"),
+):
+    """Queue records (or one ``{"text"}``) for background resolution."""
+    config = _request_config(model, no_cache)
+    try:
+        records = parse_job(
+            await request.body(), request.headers.get("content-type", "")
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    units = job_units(records, config.max_chars)
+    if len(units) > config.jobs_max_chunks:
+        raise HTTPException(
+            status_code=413,
+            detail=f"at most {config.jobs_max_chunks} chunks per job",
+        )
+    try:
+        job = await request.app.state.jobs.submit(units, _overrides(model, no_cache))
+    except JobQueueFull as exc:
+        raise HTTPException(
+            status_code=503, detail=str(exc), headers={"Retry-After": "5"}
+        ) from exc
+    response.headers["Location"] = f"/api/jobs/{job['id']}"
+    return job
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(
+    request: Request,
+    job_id: str,
+    stream: bool = Query(False, description="NDJSON results until the job ends"),
+    after: int = Query(0, ge=0, description="next_after of the previous page"),
+    limit: int = Query(100, ge=1, le=1000),
+):
+    """The job with a page of its results; ``?stream=true`` for all of them."""
+    jobs: JobManager = request.app.state.jobs
+    job = await jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="unknown job")
+    if stream:
+        return StreamingResponse(
+            (
+                json.dumps(result, ensure_ascii=False) + "\n"
+                async for result in jobs.follow(job_id)
+            ),
+            media_type="application/x-ndjson",
+        )
+    results, next_after = await jobs.results(job_id, after, limit)
+    return {**job, "results": results, "next_after": next_after}
+
+
+@app.delete("/api/jobs/{job_id}")
+async def cancel_job(request: Request, job_id: str):
+    job = await request.app.state.jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="unknown job")
+    return job
+
+
+@app.get("/api/stats")
+async def stats(request: Request):
+    return request.app.state.resources.stats()
@@ -0,0 +1,101 @@
+"""``POST /api/batch``: many documents per request, answered as NDJSON.
+
+The body is a JSON array of ``{"id", "text"}`` records (or an object
+with such an array under ``records``), or the same records as NDJSON.
+Every record runs through :func:`run_doc` on the shared resources, at
+most ``batch_concurrency`` of one batch at a time and at most
+``batch_max_in_flight`` across all batches of the process, and its
+``PredDoc`` is streamed back as one line as soon as it is finished,
+with the record's ``id`` added (its position when it has none). Lines
+therefore come in completion order, not input order.
+
+A record that cannot be resolved is answered with ``{"id", "error"}``
+instead; it does not fail the batch.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import uuid
+from collections.abc import AsyncIterator
+from typing import Any
+
+from locitorium.clients.nominatim import NominatimOverloadedError
+from locitorium.config import AppConfig
+from locitorium.pipeline.resources import PipelineResources
+from locitorium.pipeline.runner import run_doc
+
+
+def parse_batch(body: bytes, content_type: str = "") -> list[Any]:
+    """Records of a JSON or NDJSON batch body; raises ``ValueError``."""
+    text = body.decode("utf-8")
+    try:
+        if "ndjson" in content_type or "jsonl" in content_type:
+            return [json.loads(line) for line in text.splitlines() if line.strip()]
+        data = json.loads(text)
+    except json.JSONDecodeError as exc:
+        raise ValueError(f"invalid JSON: {exc}") from exc
+    if isinstance(data, dict):
+        data = data.get("records")
+    if not isinstance(data, list):
+        raise ValueError("expected a list of records")
+    return data
+
+
+def _line(payload: dict[str, Any]) -> str:
+    return json.dumps(payload, ensure_ascii=False) + "\n"
+
+
+async def resolve_one(
+    text: str, config: AppConfig, resources: PipelineResources
+) -> dict[str, Any]:
+    """The ``PredDoc`` of ``text`` as JSON, or ``{"error"}``; never raises."""
+    try:
+        pred = await run_doc(text, str(uuid.uuid4()), config, resources)
+    except NominatimOverloadedError as exc:
+        return {"error": f"overloaded: {exc}"}
+    except Exception as exc:
+        return {"error": str(exc)}
+    return pred.model_dump(mode="json")
+
+
+async def _resolve_record(
+    index: int,
+    record: Any,
+    config: AppConfig,
+    resources: PipelineResources,
+    limits: tuple[asyncio.Semaphore, asyncio.Semaphore],
+) -> str:
+    record_id = record.get("id", index) if isinstance(record, dict) else index
+    text = record.get("text") if isinstance(record, dict) else None
+    if not isinstance(text, str) or not text.strip():
+        return _line({"id": record_id, "error": "missing text"})
+    if len(text) > config.max_chars:
+        return _line({"id": record_id, "error": "input too long"})
+    batch_slots, process_slots = limits
+    async with batch_slots, process_slots:
+        result = await resolve_one(text, config, resources)
+    return _line({"id": record_id, **result})
+
+
+async def stream_batch(
+    records: list[Any],
+    config: AppConfig,
+    resources: PipelineResources,
+    process_slots: asyncio.Semaphore,
+) -> AsyncIterator[str]:
+    """Yield one NDJSON line per record, in completion order."""
+    limits = (asyncio.Semaphore(config.batch_concurrency), process_slots)
+    tasks = [
+        asyncio.create_task(_resolve_record(i, record, config, resources, limits))
+        for i, record in enumerate(records)
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # The client went away: stop the records still waiting or running.
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,419 @@
+"""``/api/jobs``: documents resolved in the background.
+
+``POST /api/jobs`` takes the same records as ``POST /api/batch`` (or a
+single ``{"text"}``), splits texts longer than ``max_chars`` into chunks
+with :func:`split_text` and answers at once with the job; a
+:class:`JobManager` of ``jobs_workers`` worker tasks resolves the chunks,
+``batch_concurrency`` at a time and within the process-wide batch slots.
+Every chunk gets ``jobs_deadline_s`` instead of ``deadline_s``.
+
+A job is ``queued``, ``running``, then ``done``, ``cancelled`` or
+``failed``; chunks that cannot be resolved are ``{"id", "chunk_index",
+"error"}`` results, they do not fail the job. Jobs and their results
+live in a :class:`JobStore` (SQLite), so a server that restarts picks
+up its unfinished jobs and resolves only the chunks that have no result
+yet. Finished jobs are deleted ``jobs_ttl_s`` after they finish.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from collections.abc import AsyncIterator, Callable
+from pathlib import Path
+from typing import Any
+
+from locitorium.api.batch import parse_batch, resolve_one
+from locitorium.config import AppConfig, config_from_env
+from locitorium.pipeline.resources import PipelineResources
+from locitorium.pipeline.stream import split_text
+
+FINISHED = ("done", "cancelled", "failed")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id          TEXT PRIMARY KEY,
+    status      TEXT NOT NULL,
+    overrides   TEXT NOT NULL,
+    units       TEXT NOT NULL,
+    total       INTEGER NOT NULL,
+    error       TEXT,
+    created_at  REAL NOT NULL,
+    started_at  REAL,
+    finished_at REAL,
+    expires_at  REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+CREATE TABLE IF NOT EXISTS job_results (
+    job_id  TEXT NOT NULL,
+    seq     INTEGER NOT NULL,
+    failed  INTEGER NOT NULL,
+    result  TEXT NOT NULL,
+    PRIMARY KEY (job_id, seq)
+);
+"""
+
+_FIELDS = (
+    "id",
+    "status",
+    "total",
+    "error",
+    "created_at",
+    "started_at",
+    "finished_at",
+    "expires_at",
+)
+_COLUMNS = ", ".join(_FIELDS)
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+def parse_job(body: bytes, content_type: str = "") -> list[Any]:
+    """Records of a job: a ``POST /api/batch`` body or a single ``{"text"}``."""
+    try:
+        return parse_batch(body, content_type)
+    except ValueError:
+        try:
+            data = json.loads(body)
+        except ValueError:
+            data = None
+        if isinstance(data, dict) and "text" in data:
+            return [data]
+        raise
+
+
+def job_units(records: list[Any], max_chars: int) -> list[dict[str, Any]]:
+    """One unit of work per chunk of each record (or its error)."""
+    units: list[dict[str, Any]] = []
+    for index, record in enumerate(records):
+        record_id = record.get("id", index) if isinstance(record, dict) else index
+        text = record.get("text") if isinstance(record, dict) else None
+        if not isinstance(text, str) or not text.strip():
+            units.append({"id": record_id, "chunk_index": 0, "error": "missing text"})
+            continue
+        for chunk_index, chunk in enumerate(split_text(text, max_chars)):
+            units.append({"id": record_id, "chunk_index": chunk_index, "text": chunk})
+    return units
+
+
+class JobStore:
+    """Jobs and their results in one SQLite file (WAL, like the cache)."""
+
+    def __init__(self, path: str | Path | None) -> None:
+        target = ":memory:" if path is None else str(path)
+        if path is not None:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            target, timeout=5.0, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def _row(self, row: tuple[Any, ...]) -> dict[str, Any]:
+        job = dict(zip(_FIELDS, row))
+        done, errors = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(failed), 0) FROM job_results "
+            "WHERE job_id = ?",
+            (job["id"],),
+        ).fetchone()
+        job.update(done=done, errors=errors)
+        return job
+
+    def create(
+        self, units: list[dict[str, Any]], overrides: dict[str, Any], now: float
+    ) -> dict[str, Any]:
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, overrides, units, total, created_at) "
+                "VALUES (?, 'queued', ?, ?, ?, ?)",
+                (job_id, json.dumps(overrides), json.dumps(units), len(units), now),
+            )
+        job = dict.fromkeys(_FIELDS)
+        job.update(id=job_id, status="queued", total=len(units), created_at=now)
+        return {**job, "done": 0, "errors": 0}
+
+    def get(self, job_id: str, now: float) -> dict[str, Any] | None:
+        """The job, without its results; None once it has expired."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM jobs WHERE id = ?"
+                " AND (expires_at IS NULL OR expires_at > ?)",
+                (job_id, now),
+            ).fetchone()
+            return None if row is None else self._row(row)
+
+    def work(self, job_id: str) -> tuple[dict[str, Any], list[dict[str, Any]]]:
+        """The config overrides and units of a job."""
+        with self._lock:
+            overrides, units = self._conn.execute(
+                "SELECT overrides, units FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return json.loads(overrides), json.loads(units)
+
+    def unfinished(self) -> list[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM jobs WHERE status IN ('queued', 'running')"
+                " ORDER BY created_at"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def count(self, status: str) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = ?", (status,)
+            ).fetchone()[0]
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ?",
+                (*fields.values(), job_id),
+            )
+
+    def start(self, job_id: str, now: float) -> bool:
+        """Mark a queued (or resumed) job running; False if it has finished."""
+        with self._lock:
+            return (
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'running',"
+                    " started_at = COALESCE(started_at, ?)"
+                    " WHERE id = ? AND status IN ('queued', 'running')",
+                    (now, job_id),
+                ).rowcount
+                == 1
+            )
+
+    def finish(
+        self, job_id: str, status: str, error: str | None, now: float, ttl_s: float
+    ) -> bool:
+        """Settle an unfinished job; False if it had already finished."""
+        with self._lock:
+            return (
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, finished_at = ?,"
+                    " expires_at = ? WHERE id = ? AND status IN ('queued', 'running')",
+                    (status, error, now, now + ttl_s, job_id),
+                ).rowcount
+                == 1
+            )
+
+    def add_result(self, job_id: str, seq: int, result: dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO job_results (job_id, seq, failed, result) "
+                "VALUES (?, ?, ?, ?)",
+                (job_id, seq, int("error" in result), json.dumps(result)),
+            )
+
+    def results(
+        self, job_id: str, after: int = 0, limit: int = -1
+    ) -> list[tuple[int, dict[str, Any]]]:
+        """``(rowid, result)`` after ``after`` in completion order, at most
+        ``limit`` of them (all when negative)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT rowid, result FROM job_results"
+                " WHERE job_id = ? AND rowid > ? ORDER BY rowid LIMIT ?",
+                (job_id, after, limit),
+            ).fetchall()
+        return [(rowid, json.loads(result)) for rowid, result in rows]
+
+    def finished_seqs(self, job_id: str) -> set[int]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq FROM job_results WHERE job_id = ?", (job_id,)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def prune(self, now: float) -> int:
+        """Delete expired jobs and their results; returns how many jobs."""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM job_results WHERE job_id IN"
+                " (SELECT id FROM jobs WHERE expires_at <= ?)",
+                (now,),
+            )
+            return self._conn.execute(
+                "DELETE FROM jobs WHERE expires_at <= ?", (now,)
+            ).rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class JobManager:
+    """Runs the jobs of a :class:`JobStore` on ``jobs_workers`` tasks."""
+
+    def __init__(
+        self,
+        store: JobStore,
+        config: AppConfig,
+        resources: PipelineResources,
+        process_slots: asyncio.Semaphore,
+        clock: Callable[[], float] = time.time,
+        prune_interval_s: float = 60.0,
+    ) -> None:
+        self.store = store
+        self.config = config
+        self.resources = resources
+        self.process_slots = process_slots
+        self.clock = clock
+        self.prune_interval_s = prune_interval_s
+        self._queue: asyncio.Queue[str] = asyncio.Queue()
+        self._tasks: list[asyncio.Task[None]] = []
+        self._running: dict[str, asyncio.Task[None]] = {}
+        self._changed = asyncio.Event()
+
+    # Every store call goes through a worker thread: SQLite may wait for
+    # its busy timeout, and a big job writes a result per chunk.
+    async def start(self) -> None:
+        """Queue the jobs a previous process left unfinished; start workers."""
+        await asyncio.to_thread(self.store.prune, self.clock())
+        for job_id in await asyncio.to_thread(self.store.unfinished):
+            self._queue.put_nowait(job_id)
+        self._tasks = [
+            asyncio.create_task(self._worker())
+            for _ in range(max(1, self.config.jobs_workers))
+        ]
+        self._tasks.append(asyncio.create_task(self._prune_loop()))
+
+    async def stop(self) -> None:
+        # Running jobs stay "running" in the store: the next start resumes them.
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def submit(
+        self, units: list[dict[str, Any]], overrides: dict[str, Any]
+    ) -> dict[str, Any]:
+        queued = await asyncio.to_thread(self.store.count, "queued")
+        if queued >= self.config.jobs_max_queued:
+            raise JobQueueFull(f"{self.config.jobs_max_queued} jobs already queued")
+        job = await asyncio.to_thread(self.store.create, units, overrides, self.clock())
+        self._queue.put_nowait(job["id"])
+        return job
+
+    async def get(self, job_id: str) -> dict[str, Any] | None:
+        return await asyncio.to_thread(self.store.get, job_id, self.clock())
+
+    async def results(
+        self, job_id: str, after: int, limit: int
+    ) -> tuple[list[dict[str, Any]], int]:
+        """A page of results in completion order and the cursor after it."""
+        rows = await asyncio.to_thread(self.store.results, job_id, after, limit)
+        return [result for _, result in rows], rows[-1][0] if rows else after
+
+    async def cancel(self, job_id: str) -> dict[str, Any] | None:
+        """Cancel a queued or running job; finished jobs are left as they are."""
+        if await self._finish(job_id, "cancelled"):
+            task = self._running.get(job_id)
+            if task is not None:
+                task.cancel()
+        return await self.get(job_id)
+
+    async def follow(self, job_id: str) -> AsyncIterator[dict[str, Any]]:
+        """Yield every result of the job as it is stored, until it finishes."""
+        last = 0
+        while True:
+            changed = self._changed
+            job = await self.get(job_id)
+            rows = await asyncio.to_thread(self.store.results, job_id, after=last)
+            for rowid, result in rows:
+                last = rowid
+                yield result
+            if job is None or job["status"] in FINISHED:
+                return
+            await changed.wait()
+
+    async def _finish(self, job_id: str, status: str, error: str | None = None) -> bool:
+        finished = await asyncio.to_thread(
+            self.store.finish,
+            job_id,
+            status,
+            error,
+            self.clock(),
+            self.config.jobs_ttl_s,
+        )
+        self._notify()
+        return finished
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            task = asyncio.create_task(self._run(job_id))
+            self._running[job_id] = task
+            try:
+                await task
+            except asyncio.CancelledError:
+                # Stopping the worker cancels its job too; a job cancelled
+                # through cancel() only ends that job.
+                current = asyncio.current_task()
+                if current is not None and current.cancelling():
+                    raise
+            finally:
+                self._running.pop(job_id, None)
+
+    async def _run(self, job_id: str) -> None:
+        if not await asyncio.to_thread(self.store.start, job_id, self.clock()):
+            return
+        self._notify()
+        overrides, units = await asyncio.to_thread(self.store.work, job_id)
+        config = config_from_env(**overrides, deadline_s=self.config.jobs_deadline_s)
+        finished = await asyncio.to_thread(self.store.finished_seqs, job_id)
+        pending = (
+            (seq, unit) for seq, unit in enumerate(units) if seq not in finished
+        )
+
+        async def resolve() -> None:
+            # A fixed pool pulls from one iterator, so a job of thousands of
+            # chunks never has more than batch_concurrency of them in hand.
+            for seq, unit in pending:
+                if "error" in unit:
+                    result = unit
+                else:
+                    async with self.process_slots:
+                        pred = await resolve_one(unit["text"], config, self.resources)
+                    result = {
+                        "id": unit["id"],
+                        "chunk_index": unit["chunk_index"],
+                        **pred,
+                    }
+                await asyncio.to_thread(self.store.add_result, job_id, seq, result)
+                self._notify()
+
+        tasks = [
+            asyncio.create_task(resolve())
+            for _ in range(max(1, config.batch_concurrency))
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except Exception as exc:
+            await self._finish(job_id, "failed", error=str(exc))
+        else:
+            await self._finish(job_id, "done")
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _prune_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.prune_interval_s)
+            await asyncio.to_thread(self.store.prune, self.clock())
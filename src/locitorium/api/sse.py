@@ -0,0 +1,65 @@
+"""``GET /api/stream``: one document, resolved as Server-Sent Events.
+
+Instead of waiting for the whole ``PredDoc``, the client gets an event
+as each part of the pipeline finishes:
+
+- ``mention``: ``{"mention"}`` while the LLM is still generating (only
+  with ``extract_stream``; such a mention may not make the final list),
+- ``mentions``: ``{"mentions": [{"mention_id", "mention"}]}``, the final
+  list,
+- ``candidates``: ``{"mention_id", "mention", "candidates"}`` as the
+  search for each mention returns,
+- ``result``: the ``PredDoc``, selections and timing included,
+- ``error``: ``{"detail"}`` when the document could not be resolved.
+
+``result`` or ``error`` is always the last event of the stream.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import uuid
+from collections.abc import AsyncIterator
+from typing import Any
+
+from locitorium.clients.nominatim import NominatimOverloadedError
+from locitorium.config import AppConfig
+from locitorium.pipeline.resources import PipelineResources
+from locitorium.pipeline.runner import DocRun
+
+
+def sse_event(event: str, data: dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def stream_doc(
+    text: str, config: AppConfig, resources: PipelineResources
+) -> AsyncIterator[str]:
+    """Yield the SSE events of resolving ``text``."""
+    queue: asyncio.Queue[tuple[str, dict[str, Any]] | None] = asyncio.Queue()
+    doc = DocRun(
+        text,
+        str(uuid.uuid4()),
+        config,
+        resources,
+        events=lambda event, data: queue.put_nowait((event, data)),
+    )
+    task = asyncio.create_task(doc.step(doc.run))
+    # Events are queued from within the task, so this comes after them.
+    task.add_done_callback(lambda _: queue.put_nowait(None))
+    try:
+        while (item := await queue.get()) is not None:
+            yield sse_event(*item)
+        try:
+            await task
+        except NominatimOverloadedError as exc:
+            yield sse_event("error", {"detail": f"overloaded: {exc}"})
+        except Exception as exc:
+            yield sse_event("error", {"detail": str(exc)})
+        else:
+            yield sse_event("result", doc.prediction().model_dump(mode="json"))
+    finally:
+        # The client went away: stop the document.
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
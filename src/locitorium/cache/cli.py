@@ -0,0 +1,113 @@
+"""Persistent cache maintenance (``locitorium cache ...``).
+
+These commands work on the SQLite file named by ``--path`` or, by
+default, ``LOCITORIUM_CACHE_PATH``. They are safe to run while servers
+and eval runs are using the cache.
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import time
+from pathlib import Path
+
+import typer
+
+from locitorium.cache.sqlite import connect, iter_entries, namespace_stats, prune
+from locitorium.config import config_from_env
+
+app = typer.Typer(
+    add_completion=False,
+    help="Inspect and maintain the persistent response cache.",
+)
+
+
+def _cache_path(path: Path | None) -> Path:
+    if path is not None:
+        return path
+    configured = config_from_env().cache_path
+    if not configured:
+        raise typer.BadParameter(
+            "no cache configured; pass --path or set LOCITORIUM_CACHE_PATH",
+            param_hint="--path",
+        )
+    return Path(configured)
+
+
+def _existing(path: Path | None) -> Path:
+    path = _cache_path(path)
+    if not path.exists():
+        raise typer.BadParameter(f"{path} does not exist", param_hint="--path")
+    return path
+
+
+@app.command()
+def stats(
+    path: Path | None = typer.Option(None, "--path", help="Cache database path"),
+) -> None:
+    """Entries, stored bytes and expired entries per namespace."""
+    conn = connect(_existing(path))
+    try:
+        for namespace, values in namespace_stats(conn, time.time()).items():
+            typer.echo(
+                f"{namespace}: entries={values['entries']} bytes={values['bytes']} "
+                f"expired={values['expired']}"
+            )
+    finally:
+        conn.close()
+
+
+@app.command("prune")
+def prune_cmd(
+    path: Path | None = typer.Option(None, "--path", help="Cache database path"),
+    namespace: str | None = typer.Option(
+        None, "--namespace", help="Only prune this namespace (e.g. nominatim)"
+    ),
+    max_entries: int | None = typer.Option(
+        None, "--max-entries", help="Keep at most this many entries per namespace"
+    ),
+    max_bytes: int | None = typer.Option(
+        None, "--max-bytes", help="Keep at most this many stored bytes per namespace"
+    ),
+    vacuum: bool = typer.Option(False, "--vacuum", help="Reclaim disk space after"),
+) -> None:
+    """Drop expired entries, then the least recently used over the caps."""
+    conn = connect(_existing(path))
+    try:
+        result = prune(
+            conn,
+            namespace,
+            now=time.time(),
+            max_entries=max_entries,
+            max_bytes=max_bytes,
+        )
+        if vacuum:
+            conn.execute("VACUUM")
+    finally:
+        conn.close()
+    typer.echo(f"expired: {result['expired']}")
+    typer.echo(f"evicted: {result['evicted']}")
+
+
+@app.command()
+def export(
+    path: Path | None = typer.Option(None, "--path", help="Cache database path"),
+    namespace: str | None = typer.Option(
+        None, "--namespace", help="Only export this namespace"
+    ),
+    output_path: Path | None = typer.Option(
+        None, "--output", help="Output JSONL path (default: stdout)"
+    ),
+) -> None:
+    """Write every entry as one JSON object per line."""
+    conn = connect(_existing(path))
+    out = sys.stdout if output_path is None else output_path.open("w", encoding="utf-8")
+    try:
+        for entry in iter_entries(conn, namespace):
+            out.write(json.dumps(entry, ensure_ascii=False))
+            out.write("\n")
+    finally:
+        conn.close()
+        if output_path is not None:
+            out.close()
@@ -0,0 +1,134 @@
+"""Bounded in-process cache with per-entry TTL and LRU eviction."""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def snapshot(self) -> dict[str, int | float]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hit_rate,
+        }
+
+
+class MemoryCache:
+    """Least-recently-used cache bounded by entry count and/or total size.
+
+    Every entry carries its own expiry, so callers can keep empty
+    (negative) results for a shorter time than real ones. ``size`` is
+    whatever unit the caller measures in (``sizeof`` measures values that
+    arrive without one); ``max_bytes`` bounds its sum. ``get`` returns
+    ``None`` on a miss, so ``None`` cannot be cached.
+    """
+
+    def __init__(
+        self,
+        max_entries: int | None = 10_000,
+        max_bytes: int | None = None,
+        ttl_s: float | None = None,
+        sizeof: Callable[[Any], int] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self.sizeof = sizeof
+        self.stats = CacheStats()
+        self._clock = clock
+        self._data: OrderedDict[str, tuple[float | None, int, Any]] = OrderedDict()
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._bytes
+
+    def get(self, key: str) -> Any | None:
+        found = self.lookup(key)
+        return None if found is None else found[0]
+
+    def lookup(self, key: str) -> tuple[Any, float | None] | None:
+        """``(value, seconds left before it expires)``, or None on a miss."""
+        entry = self._data.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            return None
+        expires_at, _, value = entry
+        now = self._clock()
+        if expires_at is not None and expires_at <= now:
+            self._remove(key)
+            self.stats.expirations += 1
+            self.stats.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.stats.hits += 1
+        return value, None if expires_at is None else expires_at - now
+
+    # In-process, so the async forms (see Cache) just call the sync ones.
+    async def aget(self, key: str) -> Any | None:
+        return self.get(key)
+
+    async def alookup(self, key: str) -> tuple[Any, float | None] | None:
+        return self.lookup(key)
+
+    async def aset(
+        self, key: str, value: Any, ttl_s: float | None = None, size: int | None = None
+    ) -> int:
+        return self.set(key, value, ttl_s=ttl_s, size=size)
+
+    def set(
+        self, key: str, value: Any, ttl_s: float | None = None, size: int | None = None
+    ) -> int:
+        """Store ``value``; returns how many entries were evicted to fit it."""
+        if value is None:
+            raise ValueError("None cannot be cached")
+        if size is None:
+            size = self.sizeof(value) if self.sizeof is not None else 1
+        if key in self._data:
+            self._remove(key)
+        ttl = self.ttl_s if ttl_s is None else ttl_s
+        expires_at = self._clock() + ttl if ttl is not None else None
+        self._data[key] = (expires_at, size, value)
+        self._bytes += size
+        evicted = 0
+        while self._data and self._over_limit():
+            oldest = next(iter(self._data))
+            self._remove(oldest)
+            evicted += 1
+        self.stats.evictions += evicted
+        return evicted
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._bytes = 0
+
+    def _over_limit(self) -> bool:
+        if self.max_entries is not None and len(self._data) > self.max_entries:
+            return True
+        return self.max_bytes is not None and self._bytes > self.max_bytes
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._data.pop(key)
+        self._bytes -= size
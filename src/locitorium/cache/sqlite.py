@@ -0,0 +1,310 @@
+"""SQLite-backed cache shared by every process on a host.
+
+The database runs in WAL mode, so any number of readers (uvicorn workers,
+``locitorium eval`` runs) proceed while one writer commits; a busy timeout
+absorbs the short write locks. Entries are grouped by ``namespace`` so
+that Nominatim results and LLM responses can live in one file.
+
+Expiry is per entry. The size cap is LRU-ish: ``accessed_at`` is only
+refreshed when it is older than ``touch_interval_s`` (to keep reads from
+turning into writes), and :meth:`SqliteCache.prune` drops the least
+recently accessed entries above ``max_entries`` / ``max_bytes``.
+
+A cache must never fail the request it serves: database errors turn into
+misses and skipped writes. Callers on an event loop use the async forms
+(:meth:`SqliteCache.aget`, :meth:`SqliteCache.aset`), which wait for the
+database (busy timeout included) in a worker thread and prune in the
+background, so a busy file never stalls other requests.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from typing import Any
+
+from locitorium.cache.memory import CacheStats
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    namespace   TEXT NOT NULL,
+    key         TEXT NOT NULL,
+    value       TEXT NOT NULL,
+    size        INTEGER NOT NULL,
+    created_at  REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    expires_at  REAL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS cache_accessed ON cache (namespace, accessed_at);
+CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires_at);
+"""
+
+
+def connect(path: str | Path, busy_timeout_s: float = 5.0) -> sqlite3.Connection:
+    """Open ``path`` in WAL mode, creating the file and schema if needed."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(
+        str(path), timeout=busy_timeout_s, check_same_thread=False, isolation_level=None
+    )
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+class SqliteCache:
+    """Persistent cache for one ``namespace`` of a shared SQLite file.
+
+    Values go through ``encode``/``decode`` (JSON by default) so that the
+    same Python objects can be cached here and in a :class:`MemoryCache`.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        namespace: str,
+        ttl_s: float | None = None,
+        max_entries: int | None = None,
+        max_bytes: int | None = None,
+        encode: Callable[[Any], str] = json.dumps,
+        decode: Callable[[str], Any] = json.loads,
+        touch_interval_s: float = 60.0,
+        prune_every: int = 1_000,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.path = Path(path)
+        self.namespace = namespace
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._encode = encode
+        self._decode = decode
+        self._touch_interval_s = touch_interval_s
+        self._prune_every = prune_every
+        self._writes = 0
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._pruning: asyncio.Task[int] | None = None
+        self._conn = connect(self.path)
+
+    def get(self, key: str) -> Any | None:
+        found = self.lookup(key)
+        return None if found is None else found[0]
+
+    def lookup(self, key: str) -> tuple[Any, float | None] | None:
+        """``(value, seconds left before it expires)``, or None on a miss."""
+        now = self._clock()
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT value, accessed_at, expires_at FROM cache "
+                    "WHERE namespace = ? AND key = ?",
+                    (self.namespace, key),
+                ).fetchone()
+                if row is not None and row[2] is not None and row[2] <= now:
+                    self._conn.execute(
+                        "DELETE FROM cache WHERE namespace = ? AND key = ?",
+                        (self.namespace, key),
+                    )
+                    self.stats.expirations += 1
+                    row = None
+                elif row is not None and now - row[1] > self._touch_interval_s:
+                    self._conn.execute(
+                        "UPDATE cache SET accessed_at = ? "
+                        "WHERE namespace = ? AND key = ?",
+                        (now, self.namespace, key),
+                    )
+        except sqlite3.Error:
+            row = None
+        value = None
+        if row is not None:
+            try:
+                value = self._decode(row[0])
+            except Exception:
+                # Written by another version, or damaged: as good as absent.
+                row = None
+        if row is None:
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        return value, None if row[2] is None else row[2] - now
+
+    def set(
+        self, key: str, value: Any, ttl_s: float | None = None, size: int | None = None
+    ) -> int:
+        """Store ``value``; returns how many entries a triggered prune removed.
+
+        ``size`` is ignored: the stored size is the encoded length.
+        """
+        if self._store(key, value, ttl_s):
+            return self._prune_quietly()
+        return 0
+
+    async def aget(self, key: str) -> Any | None:
+        found = await self.alookup(key)
+        return None if found is None else found[0]
+
+    async def alookup(self, key: str) -> tuple[Any, float | None] | None:
+        return await asyncio.to_thread(self.lookup, key)
+
+    async def aset(
+        self, key: str, value: Any, ttl_s: float | None = None, size: int | None = None
+    ) -> int:
+        """:meth:`set` in a worker thread; a due prune runs in the background.
+
+        Returns 0: entries the prune removes are only counted in ``stats``.
+        """
+        if await asyncio.to_thread(self._store, key, value, ttl_s):
+            if self._pruning is None or self._pruning.done():
+                self._pruning = asyncio.create_task(
+                    asyncio.to_thread(self._prune_quietly)
+                )
+        return 0
+
+    def _store(self, key: str, value: Any, ttl_s: float | None) -> bool:
+        """Write the entry; True when a periodic prune is due."""
+        now = self._clock()
+        ttl = self.ttl_s if ttl_s is None else ttl_s
+        encoded = self._encode(value)
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO cache "
+                    "(namespace, key, value, size, created_at, accessed_at, expires_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        self.namespace,
+                        key,
+                        encoded,
+                        len(encoded.encode("utf-8")),
+                        now,
+                        now,
+                        now + ttl if ttl is not None else None,
+                    ),
+                )
+                self._writes += 1
+                return self._writes % self._prune_every == 0
+        except sqlite3.Error:
+            return False
+
+    def _prune_quietly(self) -> int:
+        try:
+            return self.prune()["evicted"]
+        except sqlite3.Error:
+            return 0
+
+    def prune(
+        self, max_entries: int | None = None, max_bytes: int | None = None
+    ) -> dict[str, int]:
+        """Delete expired entries, then the least recently used over the caps."""
+        max_entries = self.max_entries if max_entries is None else max_entries
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        with self._lock:
+            result = prune(
+                self._conn,
+                self.namespace,
+                now=self._clock(),
+                max_entries=max_entries,
+                max_bytes=max_bytes,
+            )
+        self.stats.expirations += result["expired"]
+        self.stats.evictions += result["evicted"]
+        return result
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def prune(
+    conn: sqlite3.Connection,
+    namespace: str | None,
+    now: float,
+    max_entries: int | None = None,
+    max_bytes: int | None = None,
+) -> dict[str, int]:
+    """Prune one namespace (or all of them when ``namespace`` is None)."""
+    namespaces = [namespace] if namespace is not None else _namespaces(conn)
+    expired = evicted = 0
+    for ns in namespaces:
+        cur = conn.execute(
+            "DELETE FROM cache WHERE namespace = ? AND expires_at <= ?", (ns, now)
+        )
+        expired += cur.rowcount
+        if max_entries is not None:
+            cur = conn.execute(
+                "DELETE FROM cache WHERE namespace = ? AND key IN ("
+                " SELECT key FROM cache WHERE namespace = ?"
+                " ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (ns, ns, max_entries),
+            )
+            evicted += cur.rowcount
+        if max_bytes is not None:
+            # Keep the most recently used entries whose running size fits.
+            cur = conn.execute(
+                "DELETE FROM cache WHERE namespace = ? AND key IN ("
+                " SELECT key FROM ("
+                "  SELECT key, SUM(size) OVER (ORDER BY accessed_at DESC, key)"
+                "  AS running FROM cache WHERE namespace = ?)"
+                " WHERE running > ?)",
+                (ns, ns, max_bytes),
+            )
+            evicted += cur.rowcount
+    return {"expired": expired, "evicted": evicted}
+
+
+def _namespaces(conn: sqlite3.Connection) -> list[str]:
+    return [row[0] for row in conn.execute("SELECT DISTINCT namespace FROM cache")]
+
+
+def namespace_stats(conn: sqlite3.Connection, now: float) -> dict[str, dict[str, Any]]:
+    """Entry count, stored bytes and expired entries per namespace."""
+    stats: dict[str, dict[str, Any]] = {}
+    rows = conn.execute(
+        "SELECT namespace, COUNT(*), COALESCE(SUM(size), 0),"
+        " SUM(CASE WHEN expires_at <= ? THEN 1 ELSE 0 END),"
+        " MIN(created_at), MAX(accessed_at)"
+        " FROM cache GROUP BY namespace ORDER BY namespace",
+        (now,),
+    )
+    for ns, entries, size, expired, oldest, newest in rows:
+        stats[ns] = {
+            "entries": entries,
+            "bytes": size,
+            "expired": expired or 0,
+            "oldest_created_at": oldest,
+            "last_accessed_at": newest,
+        }
+    return stats
+
+
+def iter_entries(
+    conn: sqlite3.Connection, namespace: str | None = None
+) -> Iterator[dict[str, Any]]:
+    """Yield every entry as a JSON-ready dict (the value is decoded)."""
+    query = (
+        "SELECT namespace, key, value, created_at, accessed_at, expires_at FROM cache"
+    )
+    params: tuple[Any, ...] = ()
+    if namespace is not None:
+        query += " WHERE namespace = ?"
+        params = (namespace,)
+    for ns, key, value, created_at, accessed_at, expires_at in conn.execute(
+        query + " ORDER BY namespace, key", params
+    ):
+        yield {
+            "namespace": ns,
+            "key": key,
+            "value": json.loads(value),
+            "created_at": created_at,
+            "accessed_at": accessed_at,
+            "expires_at": expires_at,
+        }
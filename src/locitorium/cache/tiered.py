@@ -0,0 +1,96 @@
+"""A fast cache layered in front of slower, larger ones."""
+
+from __future__ import annotations
+
+from typing import Any, Protocol
+
+from locitorium.cache.memory import CacheStats
+
+
+class Cache(Protocol):
+    stats: CacheStats
+
+    def get(self, key: str) -> Any | None: ...
+
+    def lookup(self, key: str) -> tuple[Any, float | None] | None: ...
+
+    def set(
+        self, key: str, value: Any, ttl_s: float | None = None, size: int | None = None
+    ) -> int: ...
+
+    # For callers on an event loop: a disk layer does its I/O off the loop.
+    async def aget(self, key: str) -> Any | None: ...
+
+    async def alookup(self, key: str) -> tuple[Any, float | None] | None: ...
+
+    async def aset(
+        self, key: str, value: Any, ttl_s: float | None = None, size: int | None = None
+    ) -> int: ...
+
+
+class TieredCache:
+    """Look keys up layer by layer; a hit is copied into the faster layers.
+
+    A copied entry keeps the expiry it has in the layer it was found in,
+    so short-lived (e.g. negative) entries stay short-lived.
+
+    Typically a :class:`~locitorium.cache.memory.MemoryCache` in front of
+    a :class:`~locitorium.cache.sqlite.SqliteCache`. ``stats`` counts a hit
+    in any layer as a hit; each layer keeps its own stats as well.
+    """
+
+    def __init__(self, *layers: Cache) -> None:
+        if not layers:
+            raise ValueError("TieredCache needs at least one layer")
+        self.layers = layers
+        self.stats = CacheStats()
+
+    def get(self, key: str) -> Any | None:
+        found = self.lookup(key)
+        return None if found is None else found[0]
+
+    def lookup(self, key: str) -> tuple[Any, float | None] | None:
+        for depth, layer in enumerate(self.layers):
+            found = layer.lookup(key)
+            if found is not None:
+                value, ttl_s = found
+                for faster in self.layers[:depth]:
+                    faster.set(key, value, ttl_s=ttl_s)
+                self.stats.hits += 1
+                return found
+        self.stats.misses += 1
+        return None
+
+    def set(
+        self, key: str, value: Any, ttl_s: float | None = None, size: int | None = None
+    ) -> int:
+        evicted = 0
+        for layer in self.layers:
+            evicted += layer.set(key, value, ttl_s=ttl_s, size=size)
+        self.stats.evictions += evicted
+        return evicted
+
+    async def aget(self, key: str) -> Any | None:
+        found = await self.alookup(key)
+        return None if found is None else found[0]
+
+    async def alookup(self, key: str) -> tuple[Any, float | None] | None:
+        for depth, layer in enumerate(self.layers):
+            found = await layer.alookup(key)
+            if found is not None:
+                value, ttl_s = found
+                for faster in self.layers[:depth]:
+                    await faster.aset(key, value, ttl_s=ttl_s)
+                self.stats.hits += 1
+                return found
+        self.stats.misses += 1
+        return None
+
+    async def aset(
+        self, key: str, value: Any, ttl_s: float | None = None, size: int | None = None
+    ) -> int:
+        evicted = 0
+        for layer in self.layers:
+            evicted += await layer.aset(key, value, ttl_s=ttl_s, size=size)
+        self.stats.evictions += evicted
+        return evicted
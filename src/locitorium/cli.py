@@ -5,7 +5,9 @@ per mention on stdout, identifiers carried through so that downstream
 steps can be rebuilt without re-running resolution. ``--format`` picks
 the output shape (``jsonl`` by default).
 
-``locitorium eval ...`` holds the evaluation and benchmarking commands.
+``locitorium eval ...`` holds the evaluation and benchmarking commands,
+``locitorium cache ...`` the maintenance of the persistent cache and
+``locitorium gazetteer ...`` the offline candidate index.
 """
 
 from __future__ import annotations
@@ -16,8 +18,11 @@ from pathlib import Path
 
 import typer
 
+from locitorium.cache.cli import app as cache_app
 from locitorium.config import AppConfig
 from locitorium.eval.cli import app as eval_app
+from locitorium.gazetteer.cli import app as gazetteer_app
+from locitorium.pipeline.balancer import ServerPool, read_server_urls
 from locitorium.pipeline.output import (
     FORMAT_JSONL,
     OUTPUT_FORMATS,
@@ -35,6 +40,8 @@ from locitorium.pipeline.stream import (
 
 app = typer.Typer(add_completion=False, help="Locitorium command line tools.")
 app.add_typer(eval_app, name="eval")
+app.add_typer(cache_app, name="cache")
+app.add_typer(gazetteer_app, name="gazetteer")
 
 
 @app.command()
@@ -56,8 +63,21 @@ def resolve(
     id_field: str = typer.Option(
         "id", "--id-field", help="Input field holding the record identifier"
     ),
-    server_url: str = typer.Option(
-        DEFAULT_SERVER_URL, "--server-url", help="Locitorium server base URL"
+    server_urls: list[str] | None = typer.Option(
+        None,
+        "--server-url",
+        help=(
+            "Locitorium server base URL; repeat to balance over replicas "
+            f"(default: {DEFAULT_SERVER_URL})"
+        ),
+    ),
+    server_urls_file: Path | None = typer.Option(
+        None, "--server-urls-file", help="File with one server base URL per line"
+    ),
+    eject_s: float = typer.Option(
+        30.0,
+        "--eject-s",
+        help="Seconds a failing server is left out before it is tried again",
     ),
     model: str | None = typer.Option(None, "--model", help="Override LLM model"),
     max_chars: int = typer.Option(
@@ -79,6 +99,18 @@ def resolve(
     timeout_s: float = typer.Option(
         120.0, "--timeout", help="HTTP timeout per request in seconds"
     ),
+    concurrency: int = typer.Option(
+        1,
+        "--concurrency",
+        min=1,
+        help="Requests in flight; rows still come out in input order",
+    ),
+    batch_size: int = typer.Option(
+        1,
+        "--batch-size",
+        min=1,
+        help="Chunks per POST /api/batch request (1: one GET /api per chunk)",
+    ),
     quiet: bool = typer.Option(False, "--quiet", help="Suppress progress on stderr"),
 ) -> None:
     """Resolve place mentions for each JSONL record (JSONL in)."""
@@ -115,6 +147,11 @@ def resolve(
             "output is only complete when the run finishes"
         )
 
+    urls = list(server_urls or [])
+    if server_urls_file is not None:
+        urls += read_server_urls(server_urls_file)
+    servers = ServerPool(urls or [DEFAULT_SERVER_URL], eject_s, progress)
+
     resume_rows = load_resolved_rows(resume_path) if resume_path else None
     records = read_jsonl_stream(input_path)
     out = sys.stdout if output_path is None else output_path.open("w", encoding="utf-8")
@@ -125,11 +162,13 @@ def resolve(
         async for row in resolve_records(
             records,
             options,
-            server_url=server_url,
+            servers=servers,
             model=model,
             timeout_s=timeout_s,
             resume_rows=resume_rows,
             progress=progress,
+            concurrency=concurrency,
+            batch_size=batch_size,
         ):
             if row["status"] in FAILURE_STATUSES:
                 failures += 1
@@ -143,6 +182,9 @@ def resolve(
         if output_path is not None:
             out.close()
 
+    if len(servers.servers) > 1:
+        for line in servers.report():
+            progress(line)
     if failures:
         progress(f"{failures} record(s) could not be sent to locitorium")
         raise typer.Exit(code=1)
@@ -0,0 +1,297 @@
+"""Concurrency helpers shared by the backend clients."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any, Generic, TypeVar
+
+from locitorium import counters
+
+T = TypeVar("T")
+
+
+@dataclass
+class _Call(Generic[T]):
+    task: asyncio.Future[T]
+    waiters: int = 0
+
+
+class SingleFlight:
+    """Let concurrent callers with the same key share one in-flight call.
+
+    The first caller for a key starts ``fn()`` as a task; callers that
+    arrive while it runs await the same task instead of starting their
+    own. Every waiter receives the result or the exception. Cancelling
+    one waiter does not cancel the call while others still wait for it;
+    when the last waiter goes away the call is cancelled too. Once the
+    call finishes the key is forgotten, so results are never reused
+    beyond the calls that overlapped (that is what a cache is for).
+
+    Joined calls are counted in ``collapsed`` and, per document, in the
+    ``counter`` of :mod:`locitorium.counters`.
+    """
+
+    def __init__(self, counter: str = "single_flight_collapsed") -> None:
+        self.counter = counter
+        self.collapsed = 0
+        self._calls: dict[str, _Call[Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _task: self._forget(key, call))
+        else:
+            self.collapsed += 1
+            counters.incr(self.counter)
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Forget the key first: a caller arriving before the task
+                # has unwound must start a new call, not join this one.
+                self._forget(key, call)
+                call.task.cancel()
+
+    def _forget(self, key: str, call: _Call[Any]) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+
+class LimiterTimeout(RuntimeError):
+    """The limiter could not admit a call within its ``max_wait_s``."""
+
+
+@dataclass
+class LimiterStats:
+    admitted: int = 0
+    rejected: int = 0
+    queued_s: float = 0.0
+    max_queued_s: float = 0.0
+
+    def snapshot(self) -> dict[str, int | float]:
+        return {
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "queued_s": round(self.queued_s, 6),
+            "max_queued_s": round(self.max_queued_s, 6),
+            "avg_queued_s": (
+                round(self.queued_s / self.admitted, 6) if self.admitted else 0.0
+            ),
+        }
+
+
+class AdaptiveLimit:
+    """Concurrency limit adjusted by additive increase / multiplicative decrease.
+
+    Successful calls whose latency stays within ``tolerance`` times the
+    baseline raise the limit by ``increase / limit`` (about ``increase``
+    per limit's worth of calls, like TCP congestion avoidance); slower
+    successes hold it. A failure (5xx, timeout) multiplies it by
+    ``decrease``, at most once per round: failures of calls that started
+    before the last cut were sent under the old limit and are ignored.
+
+    The baseline is the lowest latency seen, allowed to creep up slowly
+    (``baseline_drift``) so that a backend that got permanently slower
+    does not pin the limit forever.
+    """
+
+    def __init__(
+        self,
+        initial: int = 5,
+        min_limit: int = 1,
+        max_limit: int = 50,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        tolerance: float = 2.0,
+        baseline_drift: float = 0.01,
+    ) -> None:
+        if not min_limit <= initial <= max_limit:
+            raise ValueError("need min_limit <= initial <= max_limit")
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease = decrease
+        self.tolerance = tolerance
+        self.baseline_drift = baseline_drift
+        self.baseline_s: float | None = None
+        self.cuts = 0
+        self._limit = float(initial)
+        self._last_cut = float("-inf")
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def on_success(self, latency_s: float) -> None:
+        if self.baseline_s is None or latency_s < self.baseline_s:
+            self.baseline_s = latency_s
+        else:
+            self.baseline_s += (latency_s - self.baseline_s) * self.baseline_drift
+        if latency_s <= self.baseline_s * self.tolerance:
+            self._limit = min(
+                float(self.max_limit), self._limit + self.increase / self._limit
+            )
+
+    def on_failure(self, started_at: float) -> None:
+        if started_at < self._last_cut:
+            return
+        self._limit = max(float(self.min_limit), self._limit * self.decrease)
+        self._last_cut = time.monotonic()
+        self.cuts += 1
+
+    def snapshot(self) -> dict[str, int | float | None]:
+        return {
+            "limit": self.limit,
+            "baseline_s": self.baseline_s,
+            "cuts": self.cuts,
+        }
+
+
+class RateLimiter:
+    """Process-wide admission control: a token bucket plus an in-flight cap.
+
+    ``rate_per_s`` tokens are added per second up to ``burst``; each call
+    takes one, and callers that find the bucket empty reserve a future
+    token and sleep until it is due, so they are admitted in arrival
+    order. Admitted callers then wait, first come first served, for one
+    of ``max_in_flight`` slots, or of ``adaptive.limit`` slots when an
+    :class:`AdaptiveLimit` is given (report outcomes with
+    :meth:`on_success` / :meth:`on_failure`). Either limit may be ``None``
+    (unlimited).
+
+    When admission would take longer than ``max_wait_s`` the caller gets
+    :class:`LimiterTimeout` immediately (or as soon as the wait is known
+    to be too long) instead of piling up behind a saturated backend.
+    Time spent queueing is reported to the ``counter_prefix``
+    counters (``*_queue_s``, ``*_rejected``, ``*_concurrency_limit``) of
+    the current document.
+    """
+
+    def __init__(
+        self,
+        rate_per_s: float | None = None,
+        burst: int = 1,
+        max_in_flight: int | None = None,
+        max_wait_s: float | None = None,
+        adaptive: AdaptiveLimit | None = None,
+        counter_prefix: str = "limiter",
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if rate_per_s is not None and rate_per_s <= 0:
+            raise ValueError("rate_per_s must be positive")
+        self.rate_per_s = rate_per_s
+        self.burst = max(burst, 1)
+        self.max_in_flight = max_in_flight
+        self.max_wait_s = max_wait_s
+        self.adaptive = adaptive
+        self.counter_prefix = counter_prefix
+        self.stats = LimiterStats()
+        self.in_flight = 0
+        self._clock = clock
+        self._tokens = float(self.burst)
+        self._updated = clock()
+        self._waiters: deque[asyncio.Future[None]] = deque()
+
+    @property
+    def limit(self) -> int | None:
+        if self.adaptive is not None:
+            return self.adaptive.limit
+        return self.max_in_flight
+
+    def _reserve_token(self, deadline: float | None) -> float:
+        """Take a token; return how long to sleep before it is due."""
+        if self.rate_per_s is None:
+            return 0.0
+        now = self._clock()
+        self._tokens = min(
+            self.burst, self._tokens + (now - self._updated) * self.rate_per_s
+        )
+        self._updated = now
+        wait = max(0.0, (1.0 - self._tokens) / self.rate_per_s)
+        if deadline is not None and now + wait > deadline:
+            raise LimiterTimeout(f"rate limit: next slot in {wait:.2f}s")
+        self._tokens -= 1.0
+        return wait
+
+    def _has_slot(self) -> bool:
+        limit = self.limit
+        return limit is None or self.in_flight < limit
+
+    def _wake(self) -> None:
+        while self._waiters and self._has_slot():
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    async def _acquire_slot(self, deadline: float | None) -> None:
+        if not self._waiters and self._has_slot():
+            self.in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        timeout = None if deadline is None else max(deadline - self._clock(), 0)
+        try:
+            await asyncio.wait_for(waiter, timeout=timeout)
+        except asyncio.TimeoutError:
+            raise LimiterTimeout(
+                f"{self.in_flight} calls in flight (limit {self.limit}) "
+                f"for {self.max_wait_s:.2f}s"
+            ) from None
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+
+    async def acquire(self) -> float:
+        """Wait for admission; returns the time spent queueing."""
+        start = self._clock()
+        deadline = start + self.max_wait_s if self.max_wait_s is not None else None
+        try:
+            wait = self._reserve_token(deadline)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            await self._acquire_slot(deadline)
+        except LimiterTimeout:
+            self.stats.rejected += 1
+            counters.incr(f"{self.counter_prefix}_rejected")
+            raise
+        queued = self._clock() - start
+        self.stats.admitted += 1
+        self.stats.queued_s += queued
+        self.stats.max_queued_s = max(self.stats.max_queued_s, queued)
+        counters.incr(f"{self.counter_prefix}_queue_s", queued)
+        if self.adaptive is not None:
+            counters.gauge(f"{self.counter_prefix}_concurrency_limit", self.limit)
+        return queued
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._wake()
+
+    def on_success(self, latency_s: float) -> None:
+        if self.adaptive is not None:
+            self.adaptive.on_success(latency_s)
+            self._wake()
+
+    def on_failure(self, started_at: float) -> None:
+        if self.adaptive is not None:
+            self.adaptive.on_failure(started_at)
+
+    async def __aenter__(self) -> RateLimiter:
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self.release()
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from locitorium import counters
+from locitorium.gazetteer.index import GazetteerIndex
+from locitorium.models.schema import Candidate
+
+
+class GazetteerClient:
+    """Offline candidate backend: a drop-in for :class:`NominatimClient`.
+
+    Searches a local index built with ``locitorium gazetteer build``
+    instead of calling Nominatim, so it needs no network and no
+    admission control. Names are matched exactly after the same
+    normalization Nominatim results are cached under; there is no
+    fuzzy or partial matching. Lookups take tens of microseconds, so they
+    run inline on the event loop.
+    """
+
+    def __init__(self, path: str | Path, limit: int = 10) -> None:
+        self.path = Path(path)
+        self.limit = limit
+        self.index = GazetteerIndex(self.path)
+        self.lookups = 0
+        self.misses = 0
+
+    async def search(self, query: str) -> list[Candidate]:
+        candidates = self.index.lookup(query, self.limit)
+        self.lookups += 1
+        counters.incr("gazetteer_lookups")
+        if not candidates:
+            self.misses += 1
+            counters.incr("gazetteer_misses")
+        return candidates
+
+    async def aclose(self) -> None:
+        self.index.close()
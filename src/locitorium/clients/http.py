@@ -0,0 +1,83 @@
+"""Construction of long-lived, pooled httpx clients.
+
+An ``httpx.AsyncClient`` owns a connection pool; creating one per call
+throws the pool away and pays for a new TCP (and TLS) handshake every
+time. Clients built here are meant to live for the whole process and be
+shared by every document, then closed once on shutdown.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any
+
+import httpx
+
+
+@dataclass
+class PoolStats:
+    """Requests sent through a pool versus TCP connections it had to open.
+
+    Counted with httpcore's ``trace`` extension, which reports a
+    ``connection.connect_tcp`` event only when a new connection is made;
+    every other request went over a kept-alive one.
+    """
+
+    requests: int = 0
+    connections_opened: int = 0
+
+    @property
+    def connections_reused(self) -> int:
+        return max(self.requests - self.connections_opened, 0)
+
+    def snapshot(self) -> dict[str, int]:
+        return {
+            "requests": self.requests,
+            "connections_opened": self.connections_opened,
+            "connections_reused": self.connections_reused,
+        }
+
+    async def _trace(self, event_name: str, info: dict[str, Any]) -> None:
+        if event_name == "connection.connect_tcp.complete":
+            self.connections_opened += 1
+
+    async def on_request(self, request: httpx.Request) -> None:
+        """httpx ``request`` event hook that attaches the tracer."""
+        self.requests += 1
+        request.extensions["trace"] = self._trace
+
+
+def _require_h2() -> None:
+    try:
+        import h2  # noqa: F401
+    except ImportError as exc:
+        raise RuntimeError(
+            "HTTP/2 needs the h2 package: pip install 'locitorium[http2]'"
+        ) from exc
+
+
+def build_async_client(
+    *,
+    timeout_s: float,
+    max_connections: int,
+    max_keepalive_connections: int,
+    keepalive_expiry_s: float = 30.0,
+    http2: bool = False,
+    stats: PoolStats | None = None,
+) -> httpx.AsyncClient:
+    """Return a pooled ``httpx.AsyncClient`` with explicit keep-alive limits.
+
+    When ``stats`` is given, every request made through the client is
+    counted in it.
+    """
+    if http2:
+        _require_h2()
+    limits = httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive_connections,
+        keepalive_expiry=keepalive_expiry_s,
+    )
+    event_hooks = {"request": [stats.on_request]} if stats is not None else None
+    return httpx.AsyncClient(
+        timeout=timeout_s, limits=limits, http2=http2, event_hooks=event_hooks
+    )
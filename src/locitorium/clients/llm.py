@@ -6,14 +6,21 @@ Targets any OpenAI-compatible endpoint, including llama-server
 
 from __future__ import annotations
 
+import copy
+import hashlib
 import json
 import re
+import time
+from collections.abc import Iterator
 from pathlib import Path
-from typing import Any
+from typing import Any, Protocol
 
 import httpx
 from tenacity import retry, stop_after_attempt, wait_exponential
 
+from locitorium import counters
+from locitorium.cache.tiered import Cache
+
 _THINK_RE = re.compile(r"<think>[\s\S]*?</think>", re.IGNORECASE)
 
 
@@ -36,12 +43,83 @@ def _extract_json(payload: str) -> dict[str, Any]:
     raise ValueError("No valid JSON object found in response")
 
 
+class StreamListener(Protocol):
+    """Receives the response text while a streamed completion arrives.
+
+    ``reset`` is called before every attempt (a retry starts a new
+    response), then ``feed`` once per content delta.
+    """
+
+    def reset(self) -> None: ...
+
+    def feed(self, delta: str) -> None: ...
+
+
+def _sse_delta(line: str) -> str | None:
+    """Content delta of one ``data:`` line of a chat completion stream."""
+    if not line.startswith("data:"):
+        return None
+    data = line[5:].strip()
+    if not data or data == "[DONE]":
+        return None
+    chunk = json.loads(data)
+    choices = chunk.get("choices") or []
+    if not choices:
+        return None
+    return (choices[0].get("delta") or {}).get("content")
+
+
+def _message_content(data: dict[str, Any]) -> str:
+    choices = data.get("choices") or []
+    message = (choices[0].get("message") or {}) if choices else {}
+    return message.get("content") or ""
+
+
 def _safe_name(value: str) -> str:
     return value.replace("/", "_").replace(":", "_")
 
 
+def response_cache_key(
+    model: str, prompt: str, schema: dict[str, Any], thinking: bool
+) -> str:
+    """Content address of one generate() call (temperature is always 0)."""
+    material = json.dumps(
+        {"model": model, "prompt": prompt, "schema": schema, "thinking": thinking},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def response_size(value: dict[str, Any]) -> int:
+    return len(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+
+
 class LlmClient:
-    """Async client for OpenAI-compatible /v1/chat/completions endpoints."""
+    """Async client for OpenAI-compatible /v1/chat/completions endpoints.
+
+    Pass ``http_client`` to share one pooled connection pool between many
+    LlmClient instances (see :mod:`locitorium.pipeline.resources`); the
+    caller then owns it. Without one, the client creates its own on first
+    use and :meth:`aclose` releases it.
+
+    With a ``cache``, parsed responses are stored under
+    :func:`response_cache_key`. ``use_cache=False`` (or the per-call
+    argument of :meth:`generate`) bypasses the lookup; the fresh response
+    still replaces the cached one.
+
+    ``cache_prompt`` asks llama-server to keep the prompt in the slot's KV
+    cache so that the next prompt with the same prefix only prefills the
+    rest; ``id_slots`` yields the slot id to pin each request to (shared
+    between clients of one pipeline stage, see
+    :meth:`PipelineResources.llm_client`). Other servers ignore both.
+
+    With a ``listener``, :meth:`generate` requests a streamed completion
+    (SSE) and hands every content delta to it as it arrives; the return
+    value is the same parsed object. Cache hits return at once without
+    calling the listener, and endpoints that ignore ``stream`` and answer
+    with plain JSON are handled as if nothing was streamed.
+    """
 
     def __init__(
         self,
@@ -51,6 +129,11 @@ class LlmClient:
         timeout_s: float = 30.0,
         thinking: bool | None = None,
         debug_dir: Path | None = None,
+        http_client: httpx.AsyncClient | None = None,
+        cache: Cache | None = None,
+        use_cache: bool = True,
+        cache_prompt: bool = False,
+        id_slots: Iterator[int] | None = None,
     ) -> None:
         self.base_url = base_url.rstrip("/")
         self.model = model
@@ -59,10 +142,102 @@ class LlmClient:
         # None → default to False (suppress Qwen3 reasoning for structured output)
         self.thinking = thinking if thinking is not None else False
         self.debug_dir = debug_dir
+        self.cache = cache
+        self.use_cache = use_cache
+        self.cache_prompt = cache_prompt
+        self.id_slots = id_slots
+        self._http = http_client
+        self._owns_http = False
+
+    def _client(self) -> httpx.AsyncClient:
+        if self._http is None:
+            self._http = httpx.AsyncClient(timeout=self.timeout_s)
+            self._owns_http = True
+        return self._http
+
+    async def aclose(self) -> None:
+        if self._owns_http and self._http is not None:
+            await self._http.aclose()
+        self._http = None
+        self._owns_http = False
 
-    @retry(stop=stop_after_attempt(2), wait=wait_exponential(min=0.2, max=1.0))
     async def generate(
-        self, prompt: str, schema: dict[str, Any], tag: str = ""
+        self,
+        prompt: str,
+        schema: dict[str, Any],
+        tag: str = "",
+        use_cache: bool | None = None,
+        listener: StreamListener | None = None,
+    ) -> dict[str, Any]:
+        if self.cache is None:
+            return await self._generate(prompt, schema, tag, listener)
+
+        key = response_cache_key(self.model, prompt, schema, self.thinking)
+        if self.use_cache if use_cache is None else use_cache:
+            cached = await self.cache.aget(key)
+            if cached is not None:
+                counters.incr("llm_cache_hits")
+                return copy.deepcopy(cached)
+            counters.incr("llm_cache_misses")
+        else:
+            counters.incr("llm_cache_bypassed")
+
+        obj = await self._generate(prompt, schema, tag, listener)
+        await self.cache.aset(key, copy.deepcopy(obj))
+        return obj
+
+    def _server_hints(self, slot: int | None = None) -> dict[str, Any]:
+        hints: dict[str, Any] = {}
+        if self.cache_prompt:
+            hints["cache_prompt"] = True
+        if slot is None and self.id_slots is not None:
+            slot = next(self.id_slots)
+        if slot is not None:
+            hints["id_slot"] = slot
+        return hints
+
+    async def warm_up(self, prompt: str, slot: int | None = None) -> None:
+        """Prefill ``prompt`` (a static prompt prefix) into the KV cache.
+
+        Generates a single token; with ``cache_prompt`` the server keeps
+        the prefix for the next request on that slot.
+        """
+        resp = await self._client().post(
+            f"{self.base_url}/chat/completions",
+            json={
+                "model": self.model,
+                "messages": [{"role": "user", "content": prompt}],
+                "temperature": 0,
+                "max_tokens": 1,
+                "options": {"think": self.thinking},
+                **self._server_hints(slot),
+            },
+            headers={"Authorization": f"Bearer {self.api_key}"},
+        )
+        resp.raise_for_status()
+
+    async def count_tokens(self, text: str) -> int:
+        """Token count of ``text`` from llama-server's ``/tokenize``.
+
+        The endpoint sits at the server root, next to ``/v1``; other
+        OpenAI-compatible servers do not have it and raise an HTTP error.
+        """
+        root = self.base_url.removesuffix("/v1")
+        resp = await self._client().post(
+            f"{root}/tokenize",
+            json={"content": text},
+            headers={"Authorization": f"Bearer {self.api_key}"},
+        )
+        resp.raise_for_status()
+        return len(resp.json()["tokens"])
+
+    @retry(stop=stop_after_attempt(2), wait=wait_exponential(min=0.2, max=1.0))
+    async def _generate(
+        self,
+        prompt: str,
+        schema: dict[str, Any],
+        tag: str,
+        listener: StreamListener | None = None,
     ) -> dict[str, Any]:
         url = f"{self.base_url}/chat/completions"
         headers = {
@@ -84,6 +259,9 @@ class LlmClient:
             # Suppress Qwen3 chain-of-thought tokens so JSON parsing is reliable.
             "options": {"think": self.thinking},
         }
+        if listener is not None:
+            payload["stream"] = True
+        payload.update(self._server_hints())
 
         if self.debug_dir:
             self.debug_dir.mkdir(parents=True, exist_ok=True)
@@ -91,14 +269,12 @@ class LlmClient:
                 prompt, encoding="utf-8"
             )
 
-        async with httpx.AsyncClient(timeout=self.timeout_s) as client:
-            resp = await client.post(url, json=payload, headers=headers)
+        if listener is None:
+            resp = await self._client().post(url, json=payload, headers=headers)
             resp.raise_for_status()
-            data = resp.json()
-
-        choices = data.get("choices") or []
-        message = (choices[0].get("message") or {}) if choices else {}
-        raw = message.get("content") or ""
+            raw = _message_content(resp.json())
+        else:
+            raw = await self._stream(url, payload, headers, listener)
 
         if self.debug_dir:
             (self.debug_dir / f"{_safe_name(tag)}_response.txt").write_text(
@@ -116,3 +292,31 @@ class LlmClient:
         except json.JSONDecodeError:
             pass
         return _extract_json(text)
+
+    async def _stream(
+        self,
+        url: str,
+        payload: dict[str, Any],
+        headers: dict[str, str],
+        listener: StreamListener,
+    ) -> str:
+        listener.reset()
+        parts: list[str] = []
+        start = time.perf_counter()
+        async with self._client().stream(
+            "POST", url, json=payload, headers=headers
+        ) as resp:
+            resp.raise_for_status()
+            if "text/event-stream" not in resp.headers.get("content-type", ""):
+                await resp.aread()
+                return _message_content(resp.json())
+            async for line in resp.aiter_lines():
+                delta = _sse_delta(line)
+                if delta:
+                    if not parts:
+                        counters.incr(
+                            "llm_stream_first_delta_s", time.perf_counter() - start
+                        )
+                    parts.append(delta)
+                    listener.feed(delta)
+        return "".join(parts)
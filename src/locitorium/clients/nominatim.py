@@ -1,10 +1,22 @@
 from __future__ import annotations
 
+import json
+import time
+import unicodedata
 from typing import Any
 
 import httpx
-from tenacity import retry, stop_after_attempt, wait_exponential
+from tenacity import (
+    retry,
+    retry_if_not_exception_type,
+    stop_after_attempt,
+    wait_exponential,
+)
 
+from locitorium import counters
+from locitorium.cache.tiered import Cache
+from locitorium.clients.concurrency import LimiterTimeout, RateLimiter, SingleFlight
+from locitorium.clients.http import PoolStats, build_async_client
 from locitorium.models.schema import Candidate
 
 
@@ -12,14 +24,146 @@ class NominatimServerError(RuntimeError):
     pass
 
 
+class NominatimOverloadedError(NominatimServerError):
+    """The process-wide limiter refused to queue another search.
+
+    Raised instead of sending more load to a saturated Nominatim; callers
+    should report "try again later" (the API answers 503).
+    """
+
+
+def normalize_query(query: str) -> str:
+    """Fold the variations of one place name that Nominatim treats alike."""
+    return " ".join(unicodedata.normalize("NFKC", query).split()).casefold()
+
+
+def cache_key(query: str, limit: int) -> str:
+    return f"{limit}:{normalize_query(query)}"
+
+
+def encode_candidates(candidates: tuple[Candidate, ...]) -> str:
+    """Serialize cached candidates for a persistent cache."""
+    return json.dumps(
+        [c.model_dump(mode="json") for c in candidates], ensure_ascii=False
+    )
+
+
+def decode_candidates(payload: str) -> tuple[Candidate, ...]:
+    return tuple(Candidate.model_validate(item) for item in json.loads(payload))
+
+
+def cache_size(candidates: tuple[Candidate, ...] | list[Candidate]) -> int:
+    # Rough footprint in bytes; display_name dominates a Candidate.
+    return 64 + sum(200 + len(c.display_name.encode("utf-8")) for c in candidates)
+
+
 class NominatimClient:
-    def __init__(self, base_url: str, timeout_s: float = 10.0, limit: int = 10) -> None:
+    """Nominatim ``/search`` client with one pooled connection pool.
+
+    The pool is created on first use and kept for the lifetime of the
+    client, so a process should hold a single instance (see
+    :class:`locitorium.pipeline.resources.PipelineResources`) and close it
+    with :meth:`aclose`. ``pool_stats`` counts connections opened versus
+    requests that reused a kept-alive connection.
+
+    With a ``cache``, results are looked up by normalized query and
+    ``limit`` first; empty results are kept for ``negative_ttl_s`` only.
+    Concurrent searches for the same normalized query share one request
+    (``single_flight``), with or without a cache. Every request that does
+    go out is admitted by ``limiter`` first, which is what bounds the load
+    of all documents and API requests of the process together; an
+    adaptive limiter also learns from each request's latency and from
+    5xx responses and timeouts.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout_s: float = 10.0,
+        limit: int = 10,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry_s: float = 30.0,
+        cache: Cache | None = None,
+        negative_ttl_s: float | None = None,
+        limiter: RateLimiter | None = None,
+    ) -> None:
         self.base_url = base_url.rstrip("/")
         self.timeout_s = timeout_s
         self.limit = limit
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry_s = keepalive_expiry_s
+        self.cache = cache
+        self.negative_ttl_s = negative_ttl_s
+        self.limiter = limiter
+        self.pool_stats = PoolStats()
+        self.single_flight = SingleFlight(counter="nominatim_coalesced")
+        self._http: httpx.AsyncClient | None = None
+
+    def _client(self) -> httpx.AsyncClient:
+        if self._http is None:
+            self._http = build_async_client(
+                timeout_s=self.timeout_s,
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry_s=self.keepalive_expiry_s,
+                stats=self.pool_stats,
+            )
+        return self._http
+
+    async def aclose(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(min=0.2, max=1.0))
     async def search(self, query: str) -> list[Candidate]:
+        key = cache_key(query, self.limit)
+        if self.cache is not None:
+            cached = await self.cache.aget(key)
+            if cached is not None:
+                counters.incr("nominatim_cache_hits")
+                return list(cached)
+            counters.incr("nominatim_cache_misses")
+        candidates = await self.single_flight.do(
+            key, lambda: self._fetch_and_store(query, key)
+        )
+        return list(candidates)
+
+    async def _fetch_and_store(self, query: str, key: str) -> list[Candidate]:
+        candidates = await self._fetch(query)
+        if self.cache is not None:
+            ttl_s = self.negative_ttl_s if not candidates else None
+            evicted = await self.cache.aset(key, tuple(candidates), ttl_s=ttl_s)
+            if evicted:
+                counters.incr("nominatim_cache_evictions", evicted)
+        return candidates
+
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(min=0.2, max=1.0),
+        retry=retry_if_not_exception_type(NominatimOverloadedError),
+    )
+    async def _fetch(self, query: str) -> list[Candidate]:
+        if self.limiter is None:
+            return await self._request(query)
+        try:
+            await self.limiter.acquire()
+        except LimiterTimeout as exc:
+            raise NominatimOverloadedError(f"Nominatim overloaded: {exc}") from exc
+        started = time.monotonic()
+        try:
+            candidates = await self._request(query)
+        except (NominatimServerError, httpx.TimeoutException):
+            self.limiter.on_failure(started)
+            raise
+        else:
+            self.limiter.on_success(time.monotonic() - started)
+            return candidates
+        finally:
+            self.limiter.release()
+
+    async def _request(self, query: str) -> list[Candidate]:
         url = f"{self.base_url}/search"
         params = {
             "q": query,
@@ -27,31 +171,33 @@ class NominatimClient:
             "addressdetails": 1,
             "limit": self.limit,
         }
-        async with httpx.AsyncClient(timeout=self.timeout_s) as client:
-            resp = await client.get(url, params=params)
-            if resp.status_code >= 500:
-                raise NominatimServerError(
-                    f"Nominatim server error: {resp.status_code}"
-                )
-            resp.raise_for_status()
-            data = resp.json()
-
-        candidates: list[Candidate] = []
-        for idx, item in enumerate(data, start=1):
-            address = item.get("address", {}) or {}
-            candidates.append(
-                Candidate(
-                    rank=idx,
-                    osm_type=item.get("osm_type", ""),
-                    osm_id=item.get("osm_id", ""),
-                    display_name=item.get("display_name", ""),
-                    lat=item.get("lat", ""),
-                    lon=item.get("lon", ""),
-                    bbox=item.get("boundingbox", []) or [],
-                    country_code=address.get("country_code"),
-                    category=item.get("category"),
-                    place_rank=item.get("place_rank"),
-                    importance=item.get("importance"),
-                )
+        resp = await self._client().get(url, params=params)
+        if resp.status_code >= 500:
+            raise NominatimServerError(
+                f"Nominatim server error: {resp.status_code}"
             )
-        return candidates
+        resp.raise_for_status()
+        data = resp.json()
+        return _parse_candidates(data)
+
+
+def _parse_candidates(data: list[dict[str, Any]]) -> list[Candidate]:
+    candidates: list[Candidate] = []
+    for idx, item in enumerate(data, start=1):
+        address = item.get("address", {}) or {}
+        candidates.append(
+            Candidate(
+                rank=idx,
+                osm_type=item.get("osm_type", ""),
+                osm_id=item.get("osm_id", ""),
+                display_name=item.get("display_name", ""),
+                lat=item.get("lat", ""),
+                lon=item.get("lon", ""),
+                bbox=item.get("boundingbox", []) or [],
+                country_code=address.get("country_code"),
+                category=item.get("category"),
+                place_rank=item.get("place_rank"),
+                importance=item.get("importance"),
+            )
+        )
+    return candidates
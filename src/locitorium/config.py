@@ -18,8 +18,158 @@ class AppConfig:
     max_candidates_per_mention: int = 10
     nominatim_timeout_s: float = 10.0
     nominatim_limit: int = 10
-    nominatim_concurrency: int = 5
+    # Mention extraction: "llm", "dictionary" (no LLM call) or "hybrid"
+    # (LLM only when the dictionary finds nothing or an ambiguous name).
+    # The dictionary adds gazetteer names whose best place has at least
+    # extract_dictionary_min_importance.
+    extract_mode: str = "llm"
+    extract_dictionary_min_importance: float = 0.5
+    # Micro-batch extraction calls of concurrent documents: wait up to
+    # extract_batch_max_wait_ms for up to extract_batch_max_size documents
+    # and send them as one prompt (1 = off). Takes precedence over
+    # extract_stream.
+    extract_batch_max_size: int = 1
+    extract_batch_max_wait_ms: float = 5.0
+    # Stream the extraction response (SSE) and start candidate searches for
+    # each mention as soon as the LLM has produced it.
+    extract_stream: bool = False
+    # Settle mentions with one candidate, or a dominant one by importance
+    # and place_rank, without the resolve LLM (see FastPathPolicy).
+    resolve_fast_path: bool = False
+    resolve_fast_path_min_importance: float = 0.5
+    resolve_fast_path_margin: float = 0.2
+    # Resolve prompt payload: "json" (every candidate in full) or "compact"
+    # (shared place table, display names cut to resolve_address_parts
+    # components). With resolve_token_budget, candidates are trimmed by
+    # rank until the prompt fits, counted by llama-server's /tokenize when
+    # resolve_tokenizer is "llama", otherwise estimated.
+    resolve_payload: str = "json"
+    resolve_address_parts: int = 3
+    resolve_token_budget: int | None = None
+    resolve_tokenizer: str = "estimate"
+    # llama-server prompt caching: send cache_prompt, pin extract and
+    # resolve calls to their own slots ("0,1" round robin; empty = any) so
+    # each slot keeps one stage's static prompt prefix, and prefill the
+    # prefixes into those slots at startup with llm_warm_up.
+    llm_cache_prompt: bool = False
+    llm_extract_slots: str = ""
+    llm_resolve_slots: str = ""
+    llm_warm_up: bool = False
+    # Parallel decoding slots of the LLM server (llama-server --parallel).
+    # With more than one, documents with resolve_shard_min_mentions or more
+    # mentions are resolved as concurrent prompts of about
+    # resolve_shard_size mentions (see ShardPolicy).
+    llm_parallel_slots: int = 1
+    resolve_shard_size: int = 5
+    resolve_shard_min_mentions: int = 8
+    # Datasets only: run documents through extract, candidate and resolve
+    # worker pools joined by queues of stage_queue_size (see
+    # pipeline/staged.py) instead of one whole document per concurrency
+    # slot.
+    staged: bool = False
+    stage_extract_workers: int = 4
+    stage_candidate_workers: int = 8
+    stage_resolve_workers: int = 4
+    stage_queue_size: int = 8
+    # POST /api/batch: records per request, documents of one batch run at
+    # once, and documents of all batches of the process run at once.
+    batch_max_records: int = 1000
+    batch_concurrency: int = 8
+    batch_max_in_flight: int = 32
+    # POST /api/jobs: documents resolved in the background, jobs_workers
+    # jobs at once (each at batch_concurrency documents, within
+    # batch_max_in_flight), long texts split into max_chars chunks that
+    # get jobs_deadline_s each. State lives in the SQLite file at
+    # jobs_path (None: in memory, lost on restart); finished jobs are
+    # kept for jobs_ttl_s.
+    jobs_path: str | None = None
+    jobs_workers: int = 2
+    jobs_max_queued: int = 100
+    jobs_max_chunks: int = 10_000
+    jobs_deadline_s: float = 300.0
+    jobs_ttl_s: float = 86_400.0
+    # Offline candidate backend: a local index built with
+    # `locitorium gazetteer build`; when set it replaces Nominatim.
+    gazetteer_path: str | None = None
+    # Optional second Nominatim, only used as a link of candidate_sources
+    nominatim_secondary_base_url: str | None = None
+    # Ordered candidate-source chain with per-source budgets, e.g.
+    # "cache,gazetteer:0.05,nominatim:5:8" (see pipeline/sources.py).
+    # None: the gazetteer if configured, otherwise Nominatim.
+    candidate_sources: str | None = None
+    nominatim_concurrency: int = 5  # per document
     deadline_s: float = 60.0
+    # Shared LLM connection pool (one per process, see pipeline.resources)
+    llm_timeout_s: float = 30.0
+    llm_max_connections: int = 16
+    llm_max_keepalive_connections: int = 8
+    llm_http2: bool = False  # needs the optional "http2" extra (h2)
+    http_keepalive_expiry_s: float = 30.0
+    # Shared Nominatim connection pool; caps sockets across all documents
+    nominatim_max_connections: int = 20
+    nominatim_max_keepalive_connections: int = 10
+    # Process-wide Nominatim admission: token bucket + in-flight cap, shared
+    # by every document and request. None means unlimited; with
+    # nominatim_max_wait_s set, searches that cannot be admitted in time
+    # fail fast (API: 503) instead of queueing behind a saturated backend.
+    nominatim_rate_per_s: float | None = None
+    nominatim_burst: int = 10
+    nominatim_max_in_flight: int | None = 20
+    nominatim_max_wait_s: float | None = None
+    # Adaptive (AIMD) in-flight limit between nominatim_min_in_flight and
+    # nominatim_max_in_flight: grows while latency stays near its baseline,
+    # halves on 5xx or timeouts.
+    nominatim_adaptive: bool = False
+    nominatim_min_in_flight: int = 1
+    nominatim_initial_in_flight: int = 5
+    # In-process Nominatim result cache (0 entries disables it)
+    nominatim_cache_entries: int = 10_000
+    nominatim_cache_max_bytes: int | None = None
+    nominatim_cache_ttl_s: float = 86_400.0
+    nominatim_negative_ttl_s: float = 3_600.0
+    # Persistent SQLite cache shared by processes on one host (None disables)
+    cache_path: str | None = None
+    nominatim_disk_cache_max_entries: int | None = 1_000_000
+    nominatim_disk_cache_max_bytes: int | None = None
+    # LLM response cache: "none", "memory" or "disk" (memory in front of
+    # the SQLite file at cache_path). llm_cache_bypass skips the lookup.
+    llm_cache: str = "none"
+    llm_cache_max_entries: int = 10_000
+    llm_cache_max_bytes: int | None = 256 * 1024 * 1024
+    llm_disk_cache_max_entries: int | None = 1_000_000
+    llm_cache_ttl_s: float | None = None
+    llm_cache_bypass: bool = False
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.environ.get(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.environ.get(name)
+    return float(value) if value not in (None, "") else default
+
+
+def _env_optional_int(name: str, default: int | None) -> int | None:
+    value = os.environ.get(name)
+    if value in (None, ""):
+        return default
+    return None if value.strip().lower() == "none" else int(value)
+
+
+def _env_optional_float(name: str, default: float | None) -> float | None:
+    value = os.environ.get(name)
+    if value in (None, ""):
+        return default
+    return None if value.strip().lower() == "none" else float(value)
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.environ.get(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in {"1", "true", "yes", "on"}
 
 
 def config_from_env(**overrides) -> AppConfig:
@@ -28,7 +178,30 @@ def config_from_env(**overrides) -> AppConfig:
     Priority: overrides > env vars > AppConfig field defaults.
     Recognized env vars:
       OPENAI_BASE_URL, OPENAI_API_KEY, OPENAI_MODEL
-      NOMINATIM_BASE_URL, LOCITORIUM_DEADLINE_S
+      NOMINATIM_BASE_URL, LOCITORIUM_DEADLINE_S, LOCITORIUM_GAZETTEER_PATH
+      NOMINATIM_SECONDARY_BASE_URL, LOCITORIUM_CANDIDATE_SOURCES
+      LOCITORIUM_EXTRACT_MODE, LOCITORIUM_EXTRACT_STREAM
+      LOCITORIUM_EXTRACT_BATCH_SIZE, LOCITORIUM_EXTRACT_BATCH_WAIT_MS
+      LOCITORIUM_RESOLVE_FAST_PATH, LOCITORIUM_RESOLVE_PAYLOAD,
+      LOCITORIUM_RESOLVE_TOKEN_BUDGET, LOCITORIUM_RESOLVE_TOKENIZER
+      LOCITORIUM_LLM_PARALLEL_SLOTS, LOCITORIUM_LLM_CACHE_PROMPT,
+      LOCITORIUM_LLM_EXTRACT_SLOTS, LOCITORIUM_LLM_RESOLVE_SLOTS,
+      LOCITORIUM_LLM_WARM_UP
+      LOCITORIUM_LLM_MAX_CONNECTIONS, LOCITORIUM_LLM_HTTP2
+      LOCITORIUM_NOMINATIM_MAX_CONNECTIONS
+      LOCITORIUM_NOMINATIM_CACHE_ENTRIES, LOCITORIUM_NOMINATIM_CACHE_TTL_S
+      LOCITORIUM_CACHE_PATH, LOCITORIUM_LLM_CACHE
+      LOCITORIUM_NOMINATIM_RATE_PER_S, LOCITORIUM_NOMINATIM_MAX_IN_FLIGHT,
+      LOCITORIUM_NOMINATIM_MAX_WAIT_S, LOCITORIUM_NOMINATIM_ADAPTIVE
+      LOCITORIUM_STAGED, LOCITORIUM_STAGE_EXTRACT_WORKERS,
+      LOCITORIUM_STAGE_CANDIDATE_WORKERS, LOCITORIUM_STAGE_RESOLVE_WORKERS,
+      LOCITORIUM_STAGE_QUEUE_SIZE
+      LOCITORIUM_BATCH_MAX_RECORDS, LOCITORIUM_BATCH_CONCURRENCY,
+      LOCITORIUM_BATCH_MAX_IN_FLIGHT
+      LOCITORIUM_JOBS_PATH, LOCITORIUM_JOBS_WORKERS, LOCITORIUM_JOBS_MAX_QUEUED,
+      LOCITORIUM_JOBS_DEADLINE_S, LOCITORIUM_JOBS_TTL_S
+    Optional limits (LOCITORIUM_RESOLVE_TOKEN_BUDGET, the NOMINATIM rate,
+    in-flight and wait limits) are turned off with the value ``none``.
     """
     defaults = {
         "openai_base_url": os.environ.get("OPENAI_BASE_URL", AppConfig.openai_base_url),
@@ -37,6 +210,113 @@ def config_from_env(**overrides) -> AppConfig:
         "nominatim_base_url": os.environ.get(
             "NOMINATIM_BASE_URL", AppConfig.nominatim_base_url
         ),
+        "gazetteer_path": (
+            os.environ.get("LOCITORIUM_GAZETTEER_PATH") or AppConfig.gazetteer_path
+        ),
+        "nominatim_secondary_base_url": (
+            os.environ.get("NOMINATIM_SECONDARY_BASE_URL")
+            or AppConfig.nominatim_secondary_base_url
+        ),
+        "candidate_sources": (
+            os.environ.get("LOCITORIUM_CANDIDATE_SOURCES")
+            or AppConfig.candidate_sources
+        ),
+        "extract_mode": (
+            os.environ.get("LOCITORIUM_EXTRACT_MODE") or AppConfig.extract_mode
+        ),
+        "extract_batch_max_size": _env_int(
+            "LOCITORIUM_EXTRACT_BATCH_SIZE", AppConfig.extract_batch_max_size
+        ),
+        "extract_batch_max_wait_ms": _env_float(
+            "LOCITORIUM_EXTRACT_BATCH_WAIT_MS", AppConfig.extract_batch_max_wait_ms
+        ),
+        "extract_stream": _env_bool(
+            "LOCITORIUM_EXTRACT_STREAM", AppConfig.extract_stream
+        ),
+        "resolve_fast_path": _env_bool(
+            "LOCITORIUM_RESOLVE_FAST_PATH", AppConfig.resolve_fast_path
+        ),
+        "resolve_payload": (
+            os.environ.get("LOCITORIUM_RESOLVE_PAYLOAD") or AppConfig.resolve_payload
+        ),
+        "resolve_token_budget": _env_optional_int(
+            "LOCITORIUM_RESOLVE_TOKEN_BUDGET", AppConfig.resolve_token_budget
+        ),
+        "resolve_tokenizer": (
+            os.environ.get("LOCITORIUM_RESOLVE_TOKENIZER")
+            or AppConfig.resolve_tokenizer
+        ),
+        "llm_cache_prompt": _env_bool(
+            "LOCITORIUM_LLM_CACHE_PROMPT", AppConfig.llm_cache_prompt
+        ),
+        "llm_extract_slots": os.environ.get(
+            "LOCITORIUM_LLM_EXTRACT_SLOTS", AppConfig.llm_extract_slots
+        ),
+        "llm_resolve_slots": os.environ.get(
+            "LOCITORIUM_LLM_RESOLVE_SLOTS", AppConfig.llm_resolve_slots
+        ),
+        "llm_warm_up": _env_bool("LOCITORIUM_LLM_WARM_UP", AppConfig.llm_warm_up),
+        "llm_parallel_slots": _env_int(
+            "LOCITORIUM_LLM_PARALLEL_SLOTS", AppConfig.llm_parallel_slots
+        ),
+        "staged": _env_bool("LOCITORIUM_STAGED", AppConfig.staged),
+        "stage_extract_workers": _env_int(
+            "LOCITORIUM_STAGE_EXTRACT_WORKERS", AppConfig.stage_extract_workers
+        ),
+        "stage_candidate_workers": _env_int(
+            "LOCITORIUM_STAGE_CANDIDATE_WORKERS", AppConfig.stage_candidate_workers
+        ),
+        "stage_resolve_workers": _env_int(
+            "LOCITORIUM_STAGE_RESOLVE_WORKERS", AppConfig.stage_resolve_workers
+        ),
+        "stage_queue_size": _env_int(
+            "LOCITORIUM_STAGE_QUEUE_SIZE", AppConfig.stage_queue_size
+        ),
+        "batch_max_records": _env_int(
+            "LOCITORIUM_BATCH_MAX_RECORDS", AppConfig.batch_max_records
+        ),
+        "batch_concurrency": _env_int(
+            "LOCITORIUM_BATCH_CONCURRENCY", AppConfig.batch_concurrency
+        ),
+        "batch_max_in_flight": _env_int(
+            "LOCITORIUM_BATCH_MAX_IN_FLIGHT", AppConfig.batch_max_in_flight
+        ),
+        "jobs_path": os.environ.get("LOCITORIUM_JOBS_PATH") or AppConfig.jobs_path,
+        "jobs_workers": _env_int("LOCITORIUM_JOBS_WORKERS", AppConfig.jobs_workers),
+        "jobs_max_queued": _env_int(
+            "LOCITORIUM_JOBS_MAX_QUEUED", AppConfig.jobs_max_queued
+        ),
+        "jobs_deadline_s": _env_float(
+            "LOCITORIUM_JOBS_DEADLINE_S", AppConfig.jobs_deadline_s
+        ),
+        "jobs_ttl_s": _env_float("LOCITORIUM_JOBS_TTL_S", AppConfig.jobs_ttl_s),
+        "llm_max_connections": _env_int(
+            "LOCITORIUM_LLM_MAX_CONNECTIONS", AppConfig.llm_max_connections
+        ),
+        "llm_http2": _env_bool("LOCITORIUM_LLM_HTTP2", AppConfig.llm_http2),
+        "nominatim_max_connections": _env_int(
+            "LOCITORIUM_NOMINATIM_MAX_CONNECTIONS", AppConfig.nominatim_max_connections
+        ),
+        "nominatim_cache_entries": _env_int(
+            "LOCITORIUM_NOMINATIM_CACHE_ENTRIES", AppConfig.nominatim_cache_entries
+        ),
+        "nominatim_cache_ttl_s": _env_float(
+            "LOCITORIUM_NOMINATIM_CACHE_TTL_S", AppConfig.nominatim_cache_ttl_s
+        ),
+        "nominatim_rate_per_s": _env_optional_float(
+            "LOCITORIUM_NOMINATIM_RATE_PER_S", AppConfig.nominatim_rate_per_s
+        ),
+        "nominatim_max_in_flight": _env_optional_int(
+            "LOCITORIUM_NOMINATIM_MAX_IN_FLIGHT", AppConfig.nominatim_max_in_flight
+        ),
+        "nominatim_max_wait_s": _env_optional_float(
+            "LOCITORIUM_NOMINATIM_MAX_WAIT_S", AppConfig.nominatim_max_wait_s
+        ),
+        "nominatim_adaptive": _env_bool(
+            "LOCITORIUM_NOMINATIM_ADAPTIVE", AppConfig.nominatim_adaptive
+        ),
+        "cache_path": os.environ.get("LOCITORIUM_CACHE_PATH") or AppConfig.cache_path,
+        "llm_cache": os.environ.get("LOCITORIUM_LLM_CACHE") or AppConfig.llm_cache,
     }
     defaults.update(overrides)
     return AppConfig(**defaults)
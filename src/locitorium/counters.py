@@ -0,0 +1,49 @@
+"""Per-document event counters.
+
+Caches, limiters and other helpers deep in the call stack have no handle
+on the document they are working for. ``run_doc`` opens a :func:`collect`
+scope around the pipeline; anything awaited inside it, including tasks
+started with ``asyncio.gather``, reports into the same mapping, which
+ends up in ``PredMetrics.counters``. Outside a scope the calls are no-ops.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+Counters = dict[str, int | float]
+
+_current: ContextVar[Counters | None] = ContextVar(
+    "locitorium_counters", default=None
+)
+
+
+def incr(name: str, value: int | float = 1) -> None:
+    """Add ``value`` to counter ``name`` of the active document, if any."""
+    counters = _current.get()
+    if counters is not None:
+        counters[name] = counters.get(name, 0) + value
+
+
+def gauge(name: str, value: int | float) -> None:
+    """Record the latest ``value`` of ``name`` for the active document."""
+    counters = _current.get()
+    if counters is not None:
+        counters[name] = value
+
+
+@contextmanager
+def collect(into: Counters | None = None) -> Iterator[Counters]:
+    """Collect counters for the code run inside the ``with`` block.
+
+    With ``into``, they are added to that mapping, so a document whose
+    stages run in separate scopes keeps one set of counters.
+    """
+    counters: Counters = {} if into is None else into
+    token = _current.set(counters)
+    try:
+        yield counters
+    finally:
+        _current.reset(token)
@@ -8,13 +8,17 @@ or compare predictions against gold. For pipeline use see
 from __future__ import annotations
 
 import asyncio
+import sys
 from pathlib import Path
 
 import typer
 
-from locitorium.config import config_from_env
-from locitorium.eval.io import load_gold, load_predictions, read_jsonl
-from locitorium.eval.metrics import topk_accuracy
+from locitorium.config import AppConfig, config_from_env
+from locitorium.eval.io import iter_jsonl, load_gold, load_predictions
+from locitorium.eval.metrics import fast_path_report, topk_accuracy
+from locitorium.eval.shard import ShardError, run_sharded
+from locitorium.pipeline.extractor import EXTRACT_MODES
+from locitorium.pipeline.resources import LLM_CACHE_BACKENDS
 from locitorium.pipeline.runner import run_dataset_stream
 
 app = typer.Typer(
@@ -27,6 +31,54 @@ def _sanitize_model_name(model: str) -> str:
     return model.replace("/", "_").replace(":", "_")
 
 
+def _cache_overrides(
+    llm_cache: str | None,
+    refresh_llm_cache: bool,
+    extract_mode: str | None = None,
+    resolve_fast_path: bool | None = None,
+    staged: bool | None = None,
+) -> dict:
+    overrides: dict[str, object] = {}
+    if staged is not None:
+        overrides["staged"] = staged
+    if resolve_fast_path is not None:
+        overrides["resolve_fast_path"] = resolve_fast_path
+    if extract_mode is not None:
+        if extract_mode not in EXTRACT_MODES:
+            raise typer.BadParameter(
+                "must be one of " + ", ".join(EXTRACT_MODES),
+                param_hint="--extract-mode",
+            )
+        overrides["extract_mode"] = extract_mode
+    if llm_cache is not None:
+        if llm_cache not in LLM_CACHE_BACKENDS:
+            raise typer.BadParameter(
+                "must be one of " + ", ".join(LLM_CACHE_BACKENDS),
+                param_hint="--llm-cache",
+            )
+        overrides["llm_cache"] = llm_cache
+    if refresh_llm_cache:
+        overrides["llm_cache_bypass"] = True
+    return overrides
+
+
+_LLM_CACHE_HELP = "LLM response cache: none, memory or disk (default: env)"
+_REFRESH_HELP = "Ignore cached LLM responses (fresh ones are still stored)"
+_EXTRACT_MODE_HELP = "Mention extraction: llm, dictionary or hybrid (default: env)"
+_FAST_PATH_HELP = "Settle unambiguous mentions without the resolve LLM (default: env)"
+_CONCURRENCY_HELP = "Documents in flight; output keeps input order"
+_STAGED_HELP = "Per-stage worker pools instead of --concurrency (default: env)"
+_WORKERS_HELP = (
+    "Processes, each running a doc_id-hashed shard; re-run to resume a failed one"
+)
+
+
+def _echo_stage_stats(stage_stats: dict[str, dict[str, int | float]]) -> None:
+    for name, stats in stage_stats.items():
+        fields = " ".join(f"{key}={value}" for key, value in stats.items())
+        typer.echo(f"stage {name}: {fields}")
+
+
 @app.command()
 def run(
     input_path: Path = typer.Argument(..., help="Path to dataset.jsonl"),
@@ -36,16 +88,63 @@ def run(
         None, "--thinking/--no-thinking", help="Toggle model thinking if supported"
     ),
     debug_dir: Path | None = typer.Option(None, help="Write raw prompts/responses"),
+    llm_cache: str | None = typer.Option(None, "--llm-cache", help=_LLM_CACHE_HELP),
+    refresh_llm_cache: bool = typer.Option(
+        False, "--refresh-llm-cache", help=_REFRESH_HELP
+    ),
+    extract_mode: str | None = typer.Option(
+        None, "--extract-mode", help=_EXTRACT_MODE_HELP
+    ),
+    resolve_fast_path: bool | None = typer.Option(
+        None, "--resolve-fast-path/--no-resolve-fast-path", help=_FAST_PATH_HELP
+    ),
+    concurrency: int = typer.Option(1, min=1, help=_CONCURRENCY_HELP),
+    staged: bool | None = typer.Option(
+        None, "--staged/--no-staged", help=_STAGED_HELP
+    ),
+    workers: int = typer.Option(1, min=1, help=_WORKERS_HELP),
 ) -> None:
-    config = config_from_env()
+    overrides = _cache_overrides(
+        llm_cache, refresh_llm_cache, extract_mode, resolve_fast_path, staged
+    )
+    config = config_from_env(**overrides)
     if model or debug_dir or thinking is not None:
         config = config_from_env(
             openai_model=model or config.openai_model,
             debug_dir=str(debug_dir) if debug_dir else None,
             openai_thinking=thinking,
+            **overrides,
+        )
+    if workers > 1:
+        _run_sharded(input_path, output_path, config, workers, concurrency)
+        return
+    stage_stats = asyncio.run(
+        run_dataset_stream(
+            iter_jsonl(input_path), config, str(output_path), concurrency
+        )
+    )
+    _echo_stage_stats(stage_stats)
+
+
+def _run_sharded(
+    input_path: Path,
+    output_path: Path,
+    config: AppConfig,
+    workers: int,
+    concurrency: int,
+) -> None:
+    def progress(message: str) -> None:
+        print(message, file=sys.stderr, flush=True)
+
+    try:
+        summary = run_sharded(
+            input_path, output_path, config, workers, concurrency, progress
         )
-    docs = read_jsonl(input_path)
-    asyncio.run(run_dataset_stream(docs, config, str(output_path)))
+    except ShardError as exc:
+        progress(str(exc))
+        raise typer.Exit(code=1)
+    fields = " ".join(f"{key}={value}" for key, value in summary.items())
+    typer.echo(f"wrote {output_path}: {fields}")
 
 
 @app.command()
@@ -57,8 +156,24 @@ def bench(
         None, "--thinking/--no-thinking", help="Toggle model thinking if supported"
     ),
     debug_dir: Path | None = typer.Option(None, help="Write raw prompts/responses"),
+    llm_cache: str | None = typer.Option(None, "--llm-cache", help=_LLM_CACHE_HELP),
+    refresh_llm_cache: bool = typer.Option(
+        False, "--refresh-llm-cache", help=_REFRESH_HELP
+    ),
+    extract_mode: str | None = typer.Option(
+        None, "--extract-mode", help=_EXTRACT_MODE_HELP
+    ),
+    resolve_fast_path: bool | None = typer.Option(
+        None, "--resolve-fast-path/--no-resolve-fast-path", help=_FAST_PATH_HELP
+    ),
+    concurrency: int = typer.Option(1, min=1, help=_CONCURRENCY_HELP),
+    staged: bool | None = typer.Option(
+        None, "--staged/--no-staged", help=_STAGED_HELP
+    ),
 ) -> None:
-    docs = read_jsonl(input_path)
+    overrides = _cache_overrides(
+        llm_cache, refresh_llm_cache, extract_mode, resolve_fast_path, staged
+    )
     output_dir.mkdir(parents=True, exist_ok=True)
     for model in models:
         model_debug_dir = None
@@ -68,10 +183,16 @@ def bench(
             openai_model=model,
             debug_dir=str(model_debug_dir) if model_debug_dir else None,
             openai_thinking=thinking,
+            **overrides,
         )
         out_path = output_dir / f"predictions_{_sanitize_model_name(model)}.jsonl"
-        asyncio.run(run_dataset_stream(docs, config, str(out_path)))
+        stage_stats = asyncio.run(
+            run_dataset_stream(
+                iter_jsonl(input_path), config, str(out_path), concurrency
+            )
+        )
         typer.echo(f"wrote {out_path}")
+        _echo_stage_stats(stage_stats)
 
 
 @app.command("score")
@@ -85,3 +206,18 @@ def score(
     metrics = topk_accuracy(gold, preds, k)
     for key, value in metrics.items():
         typer.echo(f"{key}: {value}")
+
+
+@app.command("compare-fast-path")
+def compare_fast_path(
+    gold_path: Path = typer.Argument(..., help="Path to dataset.jsonl"),
+    baseline_path: Path = typer.Argument(..., help="Predictions without fast path"),
+    fast_path_path: Path = typer.Argument(..., help="Predictions with fast path"),
+) -> None:
+    """Report latency saved against accuracy lost by the resolve fast path."""
+    gold = load_gold(gold_path)
+    report = fast_path_report(
+        gold, load_predictions(baseline_path), load_predictions(fast_path_path)
+    )
+    for key, value in report.items():
+        typer.echo(f"{key}: {value}")
@@ -1,20 +1,24 @@
 from __future__ import annotations
 
 import json
+from collections.abc import Iterator
 from pathlib import Path
 
 from locitorium.models.schema import GoldDoc, PredDoc
 
 
-def read_jsonl(path: str | Path) -> list[dict]:
-    items: list[dict] = []
+def iter_jsonl(path: str | Path) -> Iterator[dict]:
+    """Rows of a JSONL file, read one line at a time."""
     with Path(path).open("r", encoding="utf-8") as f:
         for line in f:
             line = line.strip()
             if not line:
                 continue
-            items.append(json.loads(line))
-    return items
+            yield json.loads(line)
+
+
+def read_jsonl(path: str | Path) -> list[dict]:
+    return list(iter_jsonl(path))
 
 
 def write_jsonl(path: str | Path, rows: list[dict]) -> None:
@@ -61,3 +61,76 @@ def topk_accuracy(gold: list[GoldDoc], preds: list[PredDoc], k: int) -> dict[str
         "macro_top1": macro_top1,
         "macro_topk": macro_topk,
     }
+
+
+def _mean(values: list[float]) -> float:
+    return sum(values) / len(values) if values else 0.0
+
+
+def _top1_hits(gold: list[GoldDoc], preds: list[PredDoc]) -> dict[tuple[str, str], bool]:
+    pred_index = _index_predictions(preds)
+    hits: dict[tuple[str, str], bool] = {}
+    for doc in gold:
+        pred_doc = pred_index.get(doc.doc_id, {})
+        for mention in doc.mentions:
+            pred = pred_doc.get(mention.mention_id) or {}
+            selected = pred.get("selected") or {}
+            hits[(doc.doc_id, mention.mention_id)] = (
+                pred.get("status") == "resolved"
+                and selected.get("country_code") == mention.iso_country
+            )
+    return hits
+
+
+def fast_path_report(
+    gold: list[GoldDoc], baseline: list[PredDoc], candidate: list[PredDoc]
+) -> dict[str, float]:
+    """Latency saved against accuracy lost by the resolve fast path.
+
+    ``baseline`` is a run without the fast path, ``candidate`` the same
+    dataset with it. Mentions the candidate settled on the fast path are
+    compared one by one: ``fast_path_lost`` were right in the baseline and
+    are wrong now, ``fast_path_gained`` the other way round.
+    """
+    base_hits = _top1_hits(gold, baseline)
+    cand_hits = _top1_hits(gold, candidate)
+    fast_ids = {
+        (doc.doc_id, r.mention_id)
+        for doc in candidate
+        for r in doc.results
+        if r.resolved_by == "fast_path"
+    }
+    scored_fast = [key for key in base_hits if key in fast_ids]
+    lost = sum(base_hits[key] and not cand_hits[key] for key in scored_fast)
+    gained = sum(cand_hits[key] and not base_hits[key] for key in scored_fast)
+
+    def timings(preds: list[PredDoc], field: str) -> list[float]:
+        values = [getattr(p.metrics, field) for p in preds if p.metrics]
+        return [v for v in values if v is not None]
+
+    total = len(base_hits)
+    base_top1 = sum(base_hits.values()) / total if total else 0.0
+    cand_top1 = sum(cand_hits.values()) / total if total else 0.0
+    base_resolve = _mean(timings(baseline, "resolve_s"))
+    cand_resolve = _mean(timings(candidate, "resolve_s"))
+    base_total = _mean(timings(baseline, "total_s"))
+    cand_total = _mean(timings(candidate, "total_s"))
+    llm_skipped = sum(
+        p.metrics.counters.get("resolve_llm_skipped", 0) for p in candidate if p.metrics
+    )
+    return {
+        "mentions": total,
+        "fast_path_mentions": len(fast_ids),
+        "fast_path_lost": lost,
+        "fast_path_gained": gained,
+        "resolve_llm_skipped_docs": llm_skipped,
+        "baseline_top1": base_top1,
+        "fast_path_top1": cand_top1,
+        "top1_delta": cand_top1 - base_top1,
+        "baseline_resolve_s": base_resolve,
+        "fast_path_resolve_s": cand_resolve,
+        "resolve_s_saved": base_resolve - cand_resolve,
+        "baseline_total_s": base_total,
+        "fast_path_total_s": cand_total,
+        "total_s_saved": base_total - cand_total,
+    }
@@ -0,0 +1,180 @@
+"""Multi-process dataset runs, sharded by ``doc_id``.
+
+One event loop keeps the backends busy, but pydantic validation and JSON
+handling run on its thread too, so beyond some concurrency a dataset run
+is bound by one CPU. :func:`run_sharded` splits the dataset by a stable
+hash of ``doc_id`` (:func:`shard_of`) across ``workers`` processes, each
+running :func:`run_dataset_stream` with its own event loop and client
+pools into ``shard-<i>-of-<n>.jsonl`` in ``<output>.shards/``. Once every
+shard is complete the files are merged into the output in input order
+and removed.
+
+A shard file holds its shard's predictions in input order, so a crashed
+shard is resumed by running the same command again: complete lines are
+kept (a torn last line is dropped) and the shard carries on after them.
+Shards of a different ``workers`` count are not reused.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import shutil
+from collections import Counter
+from collections.abc import Callable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from itertools import islice
+from pathlib import Path
+
+from locitorium.config import AppConfig
+from locitorium.eval.io import iter_jsonl
+from locitorium.pipeline.runner import run_dataset_stream
+
+
+class ShardError(RuntimeError):
+    def __init__(self, failures: dict[int, str]) -> None:
+        self.failures = failures
+        shards = ", ".join(f"{i} ({error})" for i, error in sorted(failures.items()))
+        super().__init__(f"shard(s) failed: {shards}; run again to resume")
+
+
+def shard_of(doc_id: str, workers: int) -> int:
+    """Shard of ``doc_id``; the same in every process and Python version."""
+    digest = hashlib.blake2b(doc_id.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % workers
+
+
+def shard_dir(output_path: Path) -> Path:
+    return output_path.with_name(output_path.name + ".shards")
+
+
+def shard_path(directory: Path, index: int, workers: int) -> Path:
+    return directory / f"shard-{index}-of-{workers}.jsonl"
+
+
+def completed_rows(path: Path) -> int:
+    """Complete rows of a shard file, after dropping a torn last line."""
+    if not path.exists():
+        return 0
+    data = path.read_bytes()
+    keep = data.rfind(b"\n") + 1
+    rows = data[:keep].count(b"\n")
+    if keep < len(data):
+        with path.open("r+b") as f:
+            f.truncate(keep)
+    return rows
+
+
+def _count_lines(path: Path) -> int:
+    if not path.exists():
+        return 0
+    with path.open("rb") as f:
+        return sum(chunk.count(b"\n") for chunk in iter(lambda: f.read(1 << 20), b""))
+
+
+def _shard_docs(input_path: Path, index: int, workers: int) -> Iterator[dict]:
+    for doc in iter_jsonl(input_path):
+        if shard_of(doc["doc_id"], workers) == index:
+            yield doc
+
+
+def run_shard(
+    input_path: Path,
+    path: Path,
+    index: int,
+    workers: int,
+    config: AppConfig,
+    concurrency: int = 1,
+) -> int:
+    """Run (or resume) one shard in this process; returns its row count."""
+    done = completed_rows(path)
+    docs = islice(_shard_docs(input_path, index, workers), done, None)
+    asyncio.run(
+        run_dataset_stream(docs, config, str(path), concurrency, append=True)
+    )
+    return _count_lines(path)
+
+
+def merge_shards(
+    input_path: Path, output_path: Path, directory: Path, workers: int
+) -> dict[str, int]:
+    """Write the shard rows to ``output_path`` in input order.
+
+    Returns the number of documents and of results per status.
+    """
+    files = [
+        shard_path(directory, i, workers).open("r", encoding="utf-8")
+        for i in range(workers)
+    ]
+    summary: Counter[str] = Counter()
+    try:
+        with output_path.open("w", encoding="utf-8") as out:
+            for doc in iter_jsonl(input_path):
+                index = shard_of(doc["doc_id"], workers)
+                line = files[index].readline()
+                row = json.loads(line) if line.strip() else None
+                if row is None or row["doc_id"] != doc["doc_id"]:
+                    raise ValueError(
+                        f"shard {index} has no prediction for {doc['doc_id']}"
+                    )
+                out.write(line)
+                summary["docs"] += 1
+                summary.update(result["status"] for result in row["results"])
+    finally:
+        for f in files:
+            f.close()
+    return dict(summary)
+
+
+def run_sharded(
+    input_path: Path,
+    output_path: Path,
+    config: AppConfig,
+    workers: int,
+    concurrency: int = 1,
+    progress: Callable[[str], None] | None = None,
+    poll_s: float = 2.0,
+) -> dict[str, int]:
+    """Run the dataset in ``workers`` processes and merge their output.
+
+    ``concurrency`` applies within each process. Raises :class:`ShardError`
+    when a shard fails; the shard files are kept for the next run.
+    """
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    directory = shard_dir(output_path)
+    directory.mkdir(parents=True, exist_ok=True)
+    total = sum(1 for _ in iter_jsonl(input_path))
+    paths = [shard_path(directory, i, workers) for i in range(workers)]
+    failures: dict[int, str] = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        running: dict[Future[int], int] = {
+            pool.submit(
+                run_shard, input_path, path, i, workers, config, concurrency
+            ): i
+            for i, path in enumerate(paths)
+        }
+        last = ""
+        while running:
+            finished, _ = wait(running, timeout=poll_s, return_when=FIRST_COMPLETED)
+            for future in finished:
+                index = running.pop(future)
+                error = future.exception()
+                if error is not None:
+                    failures[index] = f"{type(error).__name__}: {error}"
+            if progress is not None:
+                done = sum(_count_lines(path) for path in paths)
+                message = (
+                    f"{done}/{total} docs, "
+                    f"{len(running)}/{workers} shards running, "
+                    f"{len(failures)} failed"
+                )
+                if message != last:
+                    progress(message)
+                    last = message
+    if failures:
+        raise ShardError(failures)
+    summary = merge_shards(input_path, output_path, directory, workers)
+    shutil.rmtree(directory)
+    return summary
@@ -0,0 +1,64 @@
+"""Offline gazetteer index (``locitorium gazetteer ...``).
+
+``build`` turns a gazetteer extract into the memory-mapped index that
+``gazetteer_path`` (``LOCITORIUM_GAZETTEER_PATH``) points the pipeline
+at; ``lookup`` queries an index the way candidate generation does.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from pathlib import Path
+
+import typer
+
+from locitorium.gazetteer.index import GazetteerIndex, build_index
+from locitorium.gazetteer.sources import SOURCE_FORMATS, read_places
+
+app = typer.Typer(
+    add_completion=False,
+    help="Build and query the offline gazetteer index.",
+)
+
+
+@app.command()
+def build(
+    input_path: Path = typer.Argument(..., help="Gazetteer extract (.tsv, .txt, .gz)"),
+    output_path: Path = typer.Option(..., "--output", help="Index file to write"),
+    source_format: str = typer.Option(
+        "tsv", "--format", help="Input format: tsv (with header) or geonames"
+    ),
+) -> None:
+    """Build a gazetteer index from an extract."""
+    if source_format not in SOURCE_FORMATS:
+        raise typer.BadParameter(
+            "must be one of " + ", ".join(SOURCE_FORMATS), param_hint="--format"
+        )
+    if not input_path.exists():
+        raise typer.BadParameter(f"{input_path} does not exist", param_hint="INPUT_PATH")
+    start = time.perf_counter()
+    try:
+        result = build_index(read_places(input_path, source_format), output_path)
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc), param_hint="INPUT_PATH") from exc
+    elapsed = time.perf_counter() - start
+    typer.echo(f"records: {result['records']}")
+    typer.echo(f"names: {result['names']}")
+    typer.echo(f"bytes: {result['bytes']}")
+    typer.echo(f"seconds: {elapsed:.2f}")
+
+
+@app.command()
+def lookup(
+    query: str = typer.Argument(..., help="Place name to look up"),
+    index_path: Path = typer.Option(..., "--index", help="Index file"),
+    limit: int = typer.Option(10, "--limit", help="Maximum candidates"),
+) -> None:
+    """Print the candidates for one name as JSON lines."""
+    index = GazetteerIndex(index_path)
+    try:
+        for candidate in index.lookup(query, limit):
+            typer.echo(json.dumps(candidate.model_dump(mode="json"), ensure_ascii=False))
+    finally:
+        index.close()
@@ -0,0 +1,257 @@
+"""Memory-mapped gazetteer index.
+
+One file holds everything a lookup needs, laid out so that it can be
+used straight from ``mmap`` without loading or parsing it up front:
+
+``header``
+    magic, format version, name and record counts, section offsets.
+``names``
+    ``n_names + 1`` fixed-size rows ``(name offset, postings offset)``,
+    sorted by the UTF-8 bytes of the normalized name; the extra row is a
+    sentinel that closes the last range.
+``name blob``
+    the normalized names, concatenated.
+``postings``
+    ``uint32`` record ids per name, already in ranking order
+    (importance descending, then place_rank ascending).
+``records``
+    ``n_records + 1`` ``uint64`` offsets into the record blob.
+``record blob``
+    one compact JSON array per place (see :data:`RECORD_FIELDS`).
+
+A lookup is a binary search over the name rows, so it touches
+``O(log n_names)`` pages plus the records it returns; the page cache is
+shared by every process that maps the same file.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import shutil
+import struct
+import tempfile
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, BinaryIO
+
+from locitorium.clients.nominatim import normalize_query
+from locitorium.models.schema import Candidate
+
+MAGIC = b"LGZ1"
+VERSION = 1
+
+_HEADER = struct.Struct("<4sIIIQQQQQ")
+_NAME_ROW = struct.Struct("<QI")
+_POSTING = struct.Struct("<I")
+_RECORD_OFFSET = struct.Struct("<Q")
+
+# Order of the values in a stored record.
+RECORD_FIELDS = (
+    "osm_type",
+    "osm_id",
+    "display_name",
+    "lat",
+    "lon",
+    "bbox",
+    "country_code",
+    "category",
+    "place_rank",
+    "importance",
+)
+
+
+@dataclass
+class Place:
+    """One gazetteer entry and every name it can be looked up by."""
+
+    names: list[str]
+    osm_type: str
+    osm_id: int | str
+    display_name: str
+    lat: float | str
+    lon: float | str
+    bbox: list[str | float] = field(default_factory=list)
+    country_code: str | None = None
+    category: str | None = None
+    place_rank: int | None = None
+    importance: float | None = None
+
+    def record(self) -> list[Any]:
+        return [getattr(self, name) for name in RECORD_FIELDS]
+
+
+def _rank_key(place: Place, record_id: int) -> tuple[float, int, int]:
+    place_rank = place.place_rank if place.place_rank is not None else 30
+    return (-(place.importance or 0.0), place_rank, record_id)
+
+
+def build_index(places: Iterable[Place], path: str | Path) -> dict[str, int]:
+    """Write the index for ``places`` to ``path``; returns build statistics.
+
+    The name table and postings are assembled in memory, with one offset
+    per record; the record payloads are streamed to a temporary file next
+    to ``path`` as they are read and copied in at the end.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryFile(dir=path.parent) as record_blob:
+        return _build_index(places, path, record_blob)
+
+
+def _build_index(
+    places: Iterable[Place], path: Path, record_blob: BinaryIO
+) -> dict[str, int]:
+    postings: dict[bytes, list[tuple[tuple[float, int, int], int]]] = {}
+    record_offsets = [0]
+    n_records = 0
+    for place in places:
+        record_id = n_records
+        payload = json.dumps(
+            place.record(), ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8")
+        record_blob.write(payload)
+        record_offsets.append(record_offsets[-1] + len(payload))
+        n_records += 1
+        key = _rank_key(place, record_id)
+        for name in {normalize_query(n) for n in place.names if n.strip()}:
+            postings.setdefault(name.encode("utf-8"), []).append((key, record_id))
+
+    names = sorted(postings)
+    name_rows = bytearray()
+    name_blob = bytearray()
+    posting_blob = bytearray()
+    n_postings = 0
+    for name in names:
+        name_rows += _NAME_ROW.pack(len(name_blob), n_postings)
+        name_blob += name
+        for _, record_id in sorted(postings[name]):
+            posting_blob += _POSTING.pack(record_id)
+            n_postings += 1
+    name_rows += _NAME_ROW.pack(len(name_blob), n_postings)
+
+    names_off = _HEADER.size
+    name_blob_off = names_off + len(name_rows)
+    postings_off = name_blob_off + len(name_blob)
+    records_off = postings_off + len(posting_blob)
+    record_blob_off = records_off + len(record_offsets) * _RECORD_OFFSET.size
+    header = _HEADER.pack(
+        MAGIC,
+        VERSION,
+        len(names),
+        n_records,
+        names_off,
+        name_blob_off,
+        postings_off,
+        records_off,
+        record_blob_off,
+    )
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with tmp.open("wb") as f:
+        f.write(header)
+        f.write(name_rows)
+        f.write(name_blob)
+        f.write(posting_blob)
+        for offset in record_offsets:
+            f.write(_RECORD_OFFSET.pack(offset))
+        record_blob.seek(0)
+        shutil.copyfileobj(record_blob, f)
+    tmp.replace(path)
+    return {
+        "records": n_records,
+        "names": len(names),
+        "postings": n_postings,
+        "bytes": path.stat().st_size,
+    }
+
+
+class GazetteerIndex:
+    """Read-only view of an index file built by :func:`build_index`."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        with self.path.open("rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (
+            magic,
+            version,
+            self.n_names,
+            self.n_records,
+            self._names_off,
+            self._name_blob_off,
+            self._postings_off,
+            self._records_off,
+            self._record_blob_off,
+        ) = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self._mm.close()
+            raise ValueError(f"{self.path} is not a locitorium gazetteer index")
+
+    def __len__(self) -> int:
+        return self.n_records
+
+    def close(self) -> None:
+        self._mm.close()
+
+    def _name_row(self, i: int) -> tuple[int, int]:
+        return _NAME_ROW.unpack_from(self._mm, self._names_off + i * _NAME_ROW.size)
+
+    def _name(self, i: int) -> bytes:
+        start, _ = self._name_row(i)
+        end, _ = self._name_row(i + 1)
+        return self._mm[self._name_blob_off + start : self._name_blob_off + end]
+
+    def _find(self, name: bytes) -> int | None:
+        lo, hi = 0, self.n_names
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._name(mid) < name:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.n_names and self._name(lo) == name:
+            return lo
+        return None
+
+    def record(self, record_id: int) -> list[Any]:
+        pos = self._records_off + record_id * _RECORD_OFFSET.size
+        (start,) = _RECORD_OFFSET.unpack_from(self._mm, pos)
+        (end,) = _RECORD_OFFSET.unpack_from(self._mm, pos + _RECORD_OFFSET.size)
+        base = self._record_blob_off
+        return json.loads(self._mm[base + start : base + end])
+
+    def record_ids(self, query: str, limit: int | None = None) -> list[int]:
+        """Ids of the places named ``query`` (normalized), best first."""
+        i = self._find(normalize_query(query).encode("utf-8"))
+        if i is None:
+            return []
+        _, first = self._name_row(i)
+        _, last = self._name_row(i + 1)
+        if limit is not None:
+            last = min(last, first + limit)
+        return [
+            _POSTING.unpack_from(self._mm, self._postings_off + j * _POSTING.size)[0]
+            for j in range(first, last)
+        ]
+
+    def lookup(self, query: str, limit: int = 10) -> list[Candidate]:
+        candidates: list[Candidate] = []
+        for rank, record_id in enumerate(self.record_ids(query, limit), start=1):
+            values = dict(zip(RECORD_FIELDS, self.record(record_id)))
+            candidates.append(Candidate(rank=rank, **values))
+        return candidates
+
+    def names(self) -> list[str]:
+        return [self._name(i).decode("utf-8") for i in range(self.n_names)]
+
+    def top_records(self) -> Iterator[tuple[str, int, int]]:
+        """Every name with the id of its best-ranked place and how many
+        places share the name."""
+        for i in range(self.n_names):
+            _, first = self._name_row(i)
+            _, last = self._name_row(i + 1)
+            (record_id,) = _POSTING.unpack_from(
+                self._mm, self._postings_off + first * _POSTING.size
+            )
+            yield self._name(i).decode("utf-8"), record_id, last - first
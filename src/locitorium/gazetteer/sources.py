@@ -0,0 +1,138 @@
+"""Readers for gazetteer extracts that :func:`build_index` accepts.
+
+``tsv``
+    Tab-separated with a header row. ``name``, ``lat`` and ``lon`` are
+    required; ``alternate_names`` (comma-separated), ``display_name``,
+    ``osm_type``, ``osm_id``, ``bbox`` (comma-separated, Nominatim
+    order), ``country_code``, ``category``, ``place_rank`` and
+    ``importance`` are used when present. A Nominatim/OSM export reduced
+    to these columns fits as is.
+``geonames``
+    The GeoNames ``allCountries.txt`` / ``JP.txt`` dumps (no header).
+    Importance is derived from population and place_rank from the
+    feature code, so GeoNames candidates rank roughly like Nominatim's.
+
+Files ending in ``.gz`` are decompressed on the fly.
+"""
+
+from __future__ import annotations
+
+import csv
+import gzip
+import math
+from collections.abc import Iterator
+from pathlib import Path
+from typing import IO
+
+from locitorium.gazetteer.index import Place
+
+SOURCE_FORMATS = ("tsv", "geonames")
+
+_GEONAMES_CATEGORY = {
+    "A": "boundary",
+    "H": "water",
+    "L": "landuse",
+    "P": "place",
+    "R": "highway",
+    "S": "building",
+    "T": "natural",
+    "U": "natural",
+    "V": "natural",
+}
+
+_GEONAMES_RANK = {
+    "A.PCLI": 4,
+    "A.ADM1": 8,
+    "A.ADM2": 12,
+    "A.ADM3": 14,
+    "A.ADM4": 16,
+    "P.PPLC": 16,
+    "P.PPLA": 16,
+    "P.PPLA2": 18,
+}
+
+
+def _open(path: Path) -> IO[str]:
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return path.open(encoding="utf-8", newline="")
+
+
+def _split(value: str | None) -> list[str]:
+    return [v.strip() for v in (value or "").split(",") if v.strip()]
+
+
+def _osm_id(value: str | None, default: int) -> int | str:
+    # Nominatim returns numeric ids; keep non-numeric ones (e.g. "N123") as is.
+    if not value:
+        return default
+    return int(value) if value.isdigit() else value
+
+
+def _optional_int(value: str | None) -> int | None:
+    return int(value) if value else None
+
+
+def _optional_float(value: str | None) -> float | None:
+    return float(value) if value else None
+
+
+def read_tsv(path: str | Path) -> Iterator[Place]:
+    with _open(Path(path)) as f:
+        reader = csv.DictReader(f, delimiter="\t", quoting=csv.QUOTE_NONE)
+        for line_no, row in enumerate(reader, start=2):
+            name = (row.get("name") or "").strip()
+            if not name:
+                continue
+            try:
+                yield Place(
+                    names=[name, *_split(row.get("alternate_names"))],
+                    osm_type=row.get("osm_type") or "",
+                    osm_id=_osm_id(row.get("osm_id"), line_no),
+                    display_name=row.get("display_name") or name,
+                    lat=row["lat"],
+                    lon=row["lon"],
+                    bbox=_split(row.get("bbox")),
+                    country_code=(row.get("country_code") or None),
+                    category=row.get("category") or None,
+                    place_rank=_optional_int(row.get("place_rank")),
+                    importance=_optional_float(row.get("importance")),
+                )
+            except (KeyError, ValueError) as exc:
+                raise ValueError(f"{path}:{line_no}: {exc}") from exc
+
+
+def read_geonames(path: str | Path) -> Iterator[Place]:
+    with _open(Path(path)) as f:
+        for line in f:
+            cols = line.rstrip("\n").split("\t")
+            if len(cols) < 15:
+                continue
+            geoname_id, name, ascii_name, alternates, lat, lon = cols[:6]
+            feature_class, feature_code, country_code = cols[6:9]
+            population = int(cols[14] or 0)
+            feature = f"{feature_class}.{feature_code}"
+            if feature in _GEONAMES_RANK:
+                place_rank = _GEONAMES_RANK[feature]
+            else:
+                place_rank = 20 if feature_class == "P" else 25
+            yield Place(
+                names=[name, ascii_name, *_split(alternates)],
+                osm_type="geonames",
+                osm_id=int(geoname_id),
+                display_name=f"{name}, {country_code}" if country_code else name,
+                lat=lat,
+                lon=lon,
+                country_code=country_code.lower() or None,
+                category=_GEONAMES_CATEGORY.get(feature_class),
+                place_rank=place_rank,
+                importance=round(min(1.0, math.log10(population + 1) / 8), 4),
+            )
+
+
+def read_places(path: str | Path, source_format: str = "tsv") -> Iterator[Place]:
+    if source_format == "tsv":
+        return read_tsv(path)
+    if source_format == "geonames":
+        return read_geonames(path)
+    raise ValueError(f"unknown gazetteer format: {source_format}")
@@ -78,6 +78,8 @@ class PredResult(BaseModel):
     ]
     selected: SelectedCandidate | None = None
     candidates: list[Candidate] = Field(default_factory=list)
+    # Who picked ``selected``: the resolve LLM or the heuristic fast path.
+    resolved_by: Literal["llm", "fast_path"] | None = None
 
 
 class ModelInfo(BaseModel):
@@ -92,6 +94,9 @@ class PredMetrics(BaseModel):
     extract_s: float | None = None
     candidate_s: float | None = None
     resolve_s: float | None = None
+    # Event counts for this document (cache hits/misses, ...), see
+    # locitorium.counters; empty for predictions written before they existed.
+    counters: dict[str, int | float] = Field(default_factory=dict)
 
 
 class PredDoc(BaseModel):
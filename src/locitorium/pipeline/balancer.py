@@ -0,0 +1,171 @@
+"""Client-side balancing of ``locitorium resolve`` over several servers.
+
+A :class:`ServerPool` sends every request to the server with the fewest
+outstanding requests (least-outstanding-requests; ties rotate), so a
+slow replica automatically gets less work. A server that answers with a
+5xx status or fails at the transport level (connection refused, timeout)
+is ejected for ``eject_s`` seconds and the request is retried on another
+server that has not been tried for it yet; only when every server has
+failed does the error reach the caller. Client errors (4xx) and
+undecodable answers are not the server's health problem and are raised
+at once.
+
+Ejected servers are still used when no healthy one is left, so a fleet
+that is briefly down as a whole slows the run down instead of failing
+every record. :meth:`ServerPool.report` summarizes requests, errors,
+ejections and latency per server.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+
+@dataclass
+class ServerState:
+    url: str
+    outstanding: int = 0
+    requests: int = 0
+    errors: int = 0
+    ejections: int = 0
+    latency_s: float = 0.0
+    ejected_until: float = 0.0
+
+    def snapshot(self) -> dict[str, int | float]:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "ejections": self.ejections,
+            "avg_latency_ms": (
+                round(self.latency_s * 1000 / self.requests, 1)
+                if self.requests
+                else 0.0
+            ),
+        }
+
+
+def _server_fault(exc: Exception) -> bool:
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500
+    return isinstance(exc, httpx.TransportError)
+
+
+def read_server_urls(path: Path) -> list[str]:
+    """Server URLs from a file, one per line; ``#`` starts a comment."""
+    urls: list[str] = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        url = line.split("#", 1)[0].strip()
+        if url:
+            urls.append(url)
+    return urls
+
+
+class ServerPool:
+    def __init__(
+        self,
+        urls: Iterable[str],
+        eject_s: float = 30.0,
+        progress: Callable[[str], None] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.servers = [ServerState(url.rstrip("/")) for url in dict.fromkeys(urls)]
+        if not self.servers:
+            raise ValueError("at least one server URL is required")
+        self.eject_s = eject_s
+        self.progress = progress
+        self.clock = clock
+        self._next = 0
+
+    def pick(self, tried: set[str]) -> ServerState:
+        """Least-outstanding server not in ``tried``, healthy ones first."""
+        now = self.clock()
+        n = len(self.servers)
+        order = [self.servers[(self._next + i) % n] for i in range(n)]
+        self._next = (self._next + 1) % n
+        untried = [s for s in order if s.url not in tried]
+        healthy = [s for s in untried if s.ejected_until <= now]
+        return min(healthy or untried, key=lambda s: s.outstanding)
+
+    def _failed(self, server: ServerState, exc: Exception) -> None:
+        server.errors += 1
+        if not _server_fault(exc):
+            return
+        server.ejections += 1
+        server.ejected_until = self.clock() + self.eject_s
+        if self.progress:
+            self.progress(
+                f"server {server.url} ejected for {self.eject_s:g}s: "
+                f"{type(exc).__name__}: {exc}"
+            )
+
+    async def _call(
+        self,
+        send: Callable[[str], Awaitable[httpx.Response]],
+        parse: Callable[[httpx.Response], Any],
+    ) -> Any:
+        tried: set[str] = set()
+        while True:
+            server = self.pick(tried)
+            tried.add(server.url)
+            server.outstanding += 1
+            server.requests += 1
+            t0 = time.perf_counter()
+            try:
+                resp = await send(server.url)
+                resp.raise_for_status()
+                return parse(resp)
+            except Exception as exc:
+                self._failed(server, exc)
+                if not _server_fault(exc) or len(tried) == len(self.servers):
+                    raise
+            finally:
+                server.outstanding -= 1
+                server.latency_s += time.perf_counter() - t0
+
+    async def get_json(
+        self, client: httpx.AsyncClient, path: str, params: dict[str, str]
+    ) -> Any:
+        """``GET path`` on the best server, retrying others on server faults."""
+        return await self._call(
+            lambda url: client.get(f"{url}{path}", params=params),
+            lambda resp: resp.json(),
+        )
+
+    async def post_ndjson(
+        self,
+        client: httpx.AsyncClient,
+        path: str,
+        rows: list[dict[str, Any]],
+        params: dict[str, str] | None = None,
+    ) -> list[Any]:
+        """``POST`` ``rows`` as NDJSON; the NDJSON answer, one item per line."""
+        body = "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+        return await self._call(
+            lambda url: client.post(
+                f"{url}{path}",
+                params=params,
+                content=body.encode("utf-8"),
+                headers={"content-type": "application/x-ndjson"},
+            ),
+            lambda resp: [
+                json.loads(line) for line in resp.text.splitlines() if line.strip()
+            ],
+        )
+
+    def report(self) -> list[str]:
+        lines = []
+        for server in self.servers:
+            stats = server.snapshot()
+            lines.append(
+                f"{server.url}: {stats['requests']} request(s), "
+                f"{stats['errors']} error(s), {stats['ejections']} ejection(s), "
+                f"avg {stats['avg_latency_ms']} ms"
+            )
+        return lines
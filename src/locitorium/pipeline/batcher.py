@@ -0,0 +1,175 @@
+"""Micro-batching of extraction calls across concurrent documents.
+
+Under bursty load many documents reach the extraction stage at the same
+moment, each with a small prompt. An :class:`ExtractBatcher` holds them
+for at most ``max_wait_s`` or until ``max_size`` are waiting, sends them
+as one multi-document prompt (:func:`build_batch_prompt`) and hands each
+document its own part of the answer, in the shape of a single
+extraction response.
+
+A batch that comes back unusable (invalid JSON, a document missing) is
+not retried as a whole: the affected documents fall back to one ordinary
+extraction call each. Documents alone in their window are sent as an
+ordinary call right away.
+
+Per document, ``extract_batch_size`` (how many documents shared the
+call) and ``extract_batch_wait_s`` (time spent waiting for the window)
+are counted in ``metrics.counters``; :class:`BatchStats` aggregates them
+for ``/api/stats``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+from pydantic import ValidationError
+
+from locitorium import counters
+from locitorium.clients.llm import LlmClient
+from locitorium.prompts.extract import (
+    ExtractBatchOutput,
+    ExtractOutput,
+    build_batch_prompt,
+    build_prompt,
+)
+
+
+@dataclass
+class BatchStats:
+    batches: int = 0
+    documents: int = 0
+    fallbacks: int = 0
+    wait_s: float = 0.0
+
+    def snapshot(self) -> dict[str, int | float]:
+        return {
+            "batches": self.batches,
+            "documents": self.documents,
+            "fallbacks": self.fallbacks,
+            "avg_batch_size": (
+                round(self.documents / self.batches, 3) if self.batches else 0.0
+            ),
+            "avg_wait_ms": (
+                round(self.wait_s * 1000 / self.documents, 3)
+                if self.documents
+                else 0.0
+            ),
+        }
+
+
+@dataclass
+class _Pending:
+    text: str
+    tag: str
+    future: asyncio.Future[tuple[dict[str, Any], int, float]]
+    enqueued: float = field(default_factory=time.perf_counter)
+
+
+class ExtractBatcher:
+    def __init__(
+        self, client: LlmClient, max_size: int = 8, max_wait_s: float = 0.005
+    ) -> None:
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.client = client
+        self.max_size = max_size
+        self.max_wait_s = max_wait_s
+        self.stats = BatchStats()
+        self._pending: list[_Pending] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    async def extract(self, text: str, tag: str = "") -> dict[str, Any]:
+        """Extraction response for ``text``, shaped like :class:`ExtractOutput`."""
+        loop = asyncio.get_running_loop()
+        item = _Pending(text, tag, loop.create_future())
+        self._pending.append(item)
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_s, self._flush)
+        data, size, wait_s = await item.future
+        counters.incr("extract_batch_size", size)
+        counters.incr("extract_batch_wait_s", wait_s)
+        return data
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        # Documents whose caller gave up (deadline) are not sent.
+        batch = [p for p in self._pending if not p.future.done()]
+        self._pending = []
+        if batch:
+            # A shared call belongs to no single document's counters.
+            task = asyncio.create_task(
+                self._run(batch), context=contextvars.Context()
+            )
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list[_Pending]) -> None:
+        started = time.perf_counter()
+        waits = [started - p.enqueued for p in batch]
+        self.stats.batches += 1
+        self.stats.documents += len(batch)
+        self.stats.wait_s += sum(waits)
+        results: dict[int, dict[str, Any]] = {}
+        if len(batch) > 1:
+            try:
+                results = await self._batched(batch)
+            except Exception:
+                results = {}
+        for i, data in results.items():
+            if not batch[i].future.done():
+                batch[i].future.set_result((data, len(batch), waits[i]))
+        missing = [i for i in range(len(batch)) if i not in results]
+        if len(batch) > 1:
+            self.stats.fallbacks += len(missing)
+        await asyncio.gather(*(self._single(batch[i], waits[i]) for i in missing))
+
+    async def _batched(self, batch: list[_Pending]) -> dict[int, dict[str, Any]]:
+        data = await self.client.generate(
+            prompt=build_batch_prompt([p.text for p in batch]),
+            schema=ExtractBatchOutput.model_json_schema(),
+            tag=f"{batch[0].tag}_batch{len(batch)}",
+        )
+        try:
+            parsed = ExtractBatchOutput.model_validate(data)
+        except ValidationError:
+            return {}
+        results: dict[int, dict[str, Any]] = {}
+        for doc in parsed.documents:
+            index = doc.document - 1
+            if 0 <= index < len(batch) and index not in results:
+                results[index] = {"mentions": [m.model_dump() for m in doc.mentions]}
+        return results
+
+    async def _single(self, item: _Pending, wait_s: float) -> None:
+        try:
+            data = await self.client.generate(
+                prompt=build_prompt(item.text),
+                schema=ExtractOutput.model_json_schema(),
+                tag=item.tag,
+            )
+        except Exception as exc:
+            if not item.future.done():
+                item.future.set_exception(exc)
+            return
+        if not item.future.done():
+            item.future.set_result((data, 1, wait_s))
+
+    async def aclose(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for item in self._pending:
+            item.future.cancel()
+        self._pending = []
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -1,24 +1,105 @@
 from __future__ import annotations
 
 import asyncio
+from collections.abc import Callable
+from typing import Protocol
 
-from locitorium.clients.nominatim import NominatimClient
+from locitorium import counters
 from locitorium.models.schema import Candidate
 
 
+class CandidateSource(Protocol):
+    """What candidate generation needs from a backend.
+
+    Implemented by :class:`~locitorium.clients.nominatim.NominatimClient`
+    and :class:`~locitorium.clients.gazetteer.GazetteerClient`.
+    """
+
+    async def search(self, query: str) -> list[Candidate]: ...
+
+
+def _consume_error(task: asyncio.Task) -> None:
+    # Speculative searches may fail after nobody wants them any more.
+    if not task.cancelled():
+        task.exception()
+
+
+class CandidatePrefetcher:
+    """Candidate searches that may start before the mention list is final.
+
+    :meth:`submit` starts the search for a mention right away (within
+    ``concurrency`` slots); :meth:`collect` returns the candidates of the
+    final mentions, reusing searches already under way and starting the
+    missing ones. Speculative searches for mentions that did not make the
+    final list are cancelled by :meth:`cancel`, which callers must reach
+    (``try``/``finally``) so that a deadline leaves no task behind.
+
+    ``on_candidates(mention_id, mention, items)`` passed to :meth:`collect`
+    is called for each final mention as soon as its search returns.
+    """
+
+    def __init__(
+        self, client: CandidateSource, concurrency: int, max_candidates: int
+    ) -> None:
+        self.client = client
+        self.max_candidates = max_candidates
+        self._sem = asyncio.Semaphore(concurrency)
+        self._tasks: dict[str, asyncio.Task[list[Candidate]]] = {}
+
+    async def _search(self, mention: str) -> list[Candidate]:
+        async with self._sem:
+            items = await self.client.search(mention)
+        return items[: self.max_candidates]
+
+    def submit(self, mention: str) -> None:
+        if mention not in self._tasks:
+            task = asyncio.create_task(self._search(mention))
+            task.add_done_callback(_consume_error)
+            self._tasks[mention] = task
+
+    async def collect(
+        self,
+        mentions: list[tuple[str, str]],
+        on_candidates: Callable[[str, str, list[Candidate]], None] | None = None,
+    ) -> dict[str, tuple[str, list[Candidate]]]:
+        prefetched = sum(1 for _, m in mentions if m in self._tasks)
+        if prefetched:
+            counters.incr("candidate_prefetched", prefetched)
+        for _, mention in mentions:
+            self.submit(mention)
+        wanted = {mention for _, mention in mentions}
+        unused = [m for m in self._tasks if m not in wanted]
+        if unused:
+            counters.incr("candidate_prefetch_unused", len(unused))
+            for mention in unused:
+                self._tasks.pop(mention).cancel()
+
+        async def one(mention_id: str, mention: str) -> list[Candidate]:
+            items = await self._tasks[mention]
+            if on_candidates is not None:
+                on_candidates(mention_id, mention, items)
+            return items
+
+        results = await asyncio.gather(*(one(i, m) for i, m in mentions))
+        return {
+            mention_id: (mention, items)
+            for (mention_id, mention), items in zip(mentions, results)
+        }
+
+    def cancel(self) -> None:
+        for task in self._tasks.values():
+            task.cancel()
+        self._tasks.clear()
+
+
 async def generate_candidates(
-    client: NominatimClient,
+    client: CandidateSource,
     mentions: list[tuple[str, str]],
     concurrency: int,
     max_candidates: int,
 ) -> dict[str, tuple[str, list[Candidate]]]:
-    sem = asyncio.Semaphore(concurrency)
-
-    async def _one(mention_id: str, mention: str) -> tuple[str, tuple[str, list[Candidate]]]:
-        async with sem:
-            items = await client.search(mention)
-            return mention_id, (mention, items[:max_candidates])
-
-    tasks = [_one(mid, m) for mid, m in mentions]
-    results = await asyncio.gather(*tasks, return_exceptions=False)
-    return {mention_id: payload for mention_id, payload in results}
+    prefetcher = CandidatePrefetcher(client, concurrency, max_candidates)
+    try:
+        return await prefetcher.collect(mentions)
+    finally:
+        prefetcher.cancel()
@@ -0,0 +1,282 @@
+"""Dictionary-based mention extraction (no LLM call).
+
+A :class:`PlaceDictionary` compiles place names into an Aho–Corasick
+automaton and finds every occurrence in one pass over the text. Text
+and names are compared after NFKC normalization and case folding, with
+offsets mapped back to the original text so that mentions are verbatim
+slices of it (like the ones the extraction prompt asks for).
+
+Matches are kept when they
+
+* sit on word boundaries. Scripts written without spaces (CJK, kana,
+  Hangul) need none: 広島県 matches inside 広島県で;
+* have the case of a proper noun: Latin-script names must start with a
+  capital letter in the text, and acronyms (``US``, ``UAE``) must appear
+  in all caps, so "us" and "turkey" are not places;
+* are not covered by a longer match (leftmost-longest), so
+  ``Guinea-Bissau`` wins over ``Guinea``.
+
+Names come from the built-in country table (``country_names.tsv``:
+English, endonyms, Japanese, Chinese, Korean) and, when a gazetteer is
+configured, from every name in its index whose best place is important
+enough; GeoNames extracts carry alternate names in most languages.
+"""
+
+from __future__ import annotations
+
+import unicodedata
+from collections import deque
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from locitorium.clients.nominatim import normalize_query
+from locitorium.gazetteer.index import RECORD_FIELDS, GazetteerIndex
+
+COUNTRY_NAMES_PATH = Path(__file__).with_name("country_names.tsv")
+
+# Country names that are just as often a person, a US state or a region.
+AMBIGUOUS_NAMES = frozenset(
+    {"america", "chad", "dominica", "georgia", "guinea", "jordan", "korea", "niger"}
+)
+
+_CJK_RANGES = (
+    (0x1100, 0x11FF),  # Hangul Jamo
+    (0x2E80, 0x2FDF),  # CJK radicals
+    (0x3040, 0x30FF),  # Hiragana, Katakana
+    (0x3130, 0x318F),  # Hangul compatibility Jamo
+    (0x31F0, 0x31FF),  # Katakana phonetic extensions
+    (0x3400, 0x4DBF),  # CJK extension A
+    (0x4E00, 0x9FFF),  # CJK unified ideographs
+    (0xAC00, 0xD7AF),  # Hangul syllables
+    (0xF900, 0xFAFF),  # CJK compatibility ideographs
+    (0xFF66, 0xFF9F),  # halfwidth Katakana
+    (0x20000, 0x2FFFF),  # CJK extensions B+
+)
+
+
+def is_cjk(ch: str) -> bool:
+    code = ord(ch)
+    return any(lo <= code <= hi for lo, hi in _CJK_RANGES)
+
+
+def _normalize_with_offsets(text: str) -> tuple[str, list[int]]:
+    """Normalize like :func:`normalize_query`, remembering source offsets."""
+    chars: list[str] = []
+    offsets: list[int] = []
+    for i, ch in enumerate(text):
+        if ch.isspace():
+            if chars and chars[-1] == " ":
+                continue
+            folded = " "
+        else:
+            folded = unicodedata.normalize("NFKC", ch).casefold()
+        for f in folded:
+            chars.append(f)
+            offsets.append(i)
+    return "".join(chars), offsets
+
+
+class AhoCorasick:
+    """Multi-pattern matcher: every occurrence of every pattern in one pass."""
+
+    def __init__(self) -> None:
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[tuple[int, int]]] = [[]]
+        self._built = False
+
+    def add(self, pattern: str, value: int) -> None:
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+                self._goto[node][ch] = nxt
+            node = nxt
+        self._out[node].append((len(pattern), value))
+        self._built = False
+
+    def build(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+        self._built = True
+
+    def iter_matches(self, text: str) -> Iterator[tuple[int, int, int]]:
+        """Yield ``(start, end, value)`` for every pattern occurrence."""
+        if not self._built:
+            self.build()
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for length, value in out[node]:
+                yield i - length + 1, i + 1, value
+
+
+@dataclass(frozen=True)
+class DictionaryEntry:
+    """A name and what it stands for.
+
+    ``name`` keeps the original spelling when known, which is what the
+    acronym rule looks at; ``country_code`` is the ISO code of the place.
+    """
+
+    name: str
+    country_code: str | None = None
+    ambiguous: bool = False
+
+    def accepts(self, surface: str) -> bool:
+        letters = [ch for ch in self.name if ch.isalpha()]
+        if len(letters) > 1 and all(ch.isupper() for ch in letters):
+            return surface == self.name
+        first = surface[0]
+        return not (first.isalpha() and first.islower() and not is_cjk(first))
+
+
+@dataclass
+class DictionaryMatch:
+    start: int
+    end: int
+    surface: str
+    entries: list[DictionaryEntry] = field(default_factory=list)
+
+    @property
+    def ambiguous(self) -> bool:
+        codes = {e.country_code for e in self.entries if e.country_code}
+        return len(codes) > 1 or any(e.ambiguous for e in self.entries)
+
+    @property
+    def country_code(self) -> str | None:
+        codes = {e.country_code for e in self.entries if e.country_code}
+        return codes.pop() if len(codes) == 1 else None
+
+
+def _word_char(ch: str) -> bool:
+    return ch.isalnum() and not is_cjk(ch)
+
+
+class PlaceDictionary:
+    def __init__(self, entries: Iterable[DictionaryEntry]) -> None:
+        self._patterns: list[list[DictionaryEntry]] = []
+        index: dict[str, int] = {}
+        self._automaton = AhoCorasick()
+        for entry in entries:
+            pattern = normalize_query(entry.name)
+            if not pattern:
+                continue
+            pattern_id = index.get(pattern)
+            if pattern_id is None:
+                pattern_id = index[pattern] = len(self._patterns)
+                self._patterns.append([])
+                self._automaton.add(pattern, pattern_id)
+            self._patterns[pattern_id].append(entry)
+        self._automaton.build()
+
+    def __len__(self) -> int:
+        return len(self._patterns)
+
+    def find(self, text: str) -> list[DictionaryMatch]:
+        """Non-overlapping matches in text order (leftmost-longest)."""
+        normalized, offsets = _normalize_with_offsets(text)
+        found: list[DictionaryMatch] = []
+        for start, end, pattern_id in self._automaton.iter_matches(normalized):
+            src_start = offsets[start]
+            src_end = offsets[end - 1] + 1
+            surface = text[src_start:src_end]
+            if not self._on_boundaries(text, src_start, src_end):
+                continue
+            entries = [e for e in self._patterns[pattern_id] if e.accepts(surface)]
+            if entries:
+                found.append(DictionaryMatch(src_start, src_end, surface, entries))
+        found.sort(key=lambda m: (m.start, -(m.end - m.start)))
+        selected: list[DictionaryMatch] = []
+        for match in found:
+            if selected and match.start < selected[-1].end:
+                continue
+            selected.append(match)
+        return selected
+
+    @staticmethod
+    def _on_boundaries(text: str, start: int, end: int) -> bool:
+        if start > 0 and _word_char(text[start]) and _word_char(text[start - 1]):
+            return False
+        if end < len(text) and _word_char(text[end - 1]) and _word_char(text[end]):
+            return False
+        return True
+
+    def extract(self, text: str, max_mentions: int) -> tuple[list[str], bool]:
+        """Distinct mentions in text order, and whether any was ambiguous."""
+        mentions: list[str] = []
+        ambiguous = False
+        for match in self.find(text):
+            ambiguous = ambiguous or match.ambiguous
+            if match.surface not in mentions:
+                mentions.append(match.surface)
+        return mentions[:max_mentions], ambiguous
+
+
+def load_country_names(path: Path = COUNTRY_NAMES_PATH) -> list[DictionaryEntry]:
+    entries: list[DictionaryEntry] = []
+    with path.open(encoding="utf-8") as f:
+        for line in f:
+            if not line.strip() or line.startswith("#"):
+                continue
+            code, names = line.rstrip("\n").split("\t")
+            for name in names.split("|"):
+                entries.append(
+                    DictionaryEntry(
+                        name=name,
+                        country_code=code,
+                        ambiguous=normalize_query(name) in AMBIGUOUS_NAMES,
+                    )
+                )
+    return entries
+
+
+def gazetteer_entries(
+    index: GazetteerIndex, min_importance: float = 0.5, min_length: int = 4
+) -> Iterator[DictionaryEntry]:
+    """Names of an index whose best place has at least ``min_importance``.
+
+    Names shorter than ``min_length`` are skipped unless they are written
+    in a CJK script, where two characters are a normal place name. A name
+    that more than one place of the index has ("Springfield", "Paris") is
+    ambiguous, so hybrid extraction hands it to the LLM.
+    """
+    importance_at = RECORD_FIELDS.index("importance")
+    country_at = RECORD_FIELDS.index("country_code")
+    for name, record_id, n_places in index.top_records():
+        if len(name) < min_length and not (len(name) >= 2 and is_cjk(name[0])):
+            continue
+        record = index.record(record_id)
+        if (record[importance_at] or 0.0) < min_importance:
+            continue
+        code = record[country_at]
+        yield DictionaryEntry(
+            name=name,
+            country_code=code.upper() if code else None,
+            ambiguous=n_places > 1,
+        )
+
+
+def build_dictionary(
+    gazetteer: GazetteerIndex | None = None, min_importance: float = 0.5
+) -> PlaceDictionary:
+    entries: list[DictionaryEntry] = load_country_names()
+    if gazetteer is not None:
+        entries.extend(gazetteer_entries(gazetteer, min_importance))
+    return PlaceDictionary(entries)
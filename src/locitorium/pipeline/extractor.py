@@ -1,8 +1,18 @@
 from __future__ import annotations
 
+import json
+from collections.abc import Callable
+
+from locitorium import counters
 from locitorium.clients.llm import LlmClient
+from locitorium.pipeline.batcher import ExtractBatcher
+from locitorium.pipeline.dictionary import PlaceDictionary
 from locitorium.prompts.extract import ExtractOutput, build_prompt
 
+# llm: always ask the LLM; dictionary: never; hybrid: ask it only when the
+# dictionary finds nothing or finds an ambiguous name.
+EXTRACT_MODES = ("llm", "dictionary", "hybrid")
+
 
 def _dedupe_mentions(items: list[str]) -> list[str]:
     seen = set()
@@ -25,12 +35,100 @@ def _filter_mentions(text: str, mentions: list[str]) -> list[str]:
     return filtered
 
 
+class MentionStream:
+    """Incremental parser for a streamed extraction response.
+
+    Fed the response text delta by delta, it calls ``on_mention`` as soon
+    as an ``{"mention": ...}`` object closes, long before the whole
+    response is there. Only braces outside JSON strings are counted, so a
+    ``}`` inside a mention does not close anything. Mentions that do not
+    occur in ``text`` are dropped, like :func:`_filter_mentions` does for
+    the final list.
+    """
+
+    def __init__(self, text: str, on_mention: Callable[[str], None]) -> None:
+        self.text = text
+        self.on_mention = on_mention
+        self.reset()
+
+    def reset(self) -> None:
+        self._buf: list[str] = []
+        self._starts: list[int] = []
+        self._in_string = False
+        self._escaped = False
+        self._seen: set[str] = set()
+
+    def feed(self, delta: str) -> None:
+        for ch in delta:
+            self._buf.append(ch)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                self._starts.append(len(self._buf) - 1)
+            elif ch == "}" and self._starts:
+                self._closed("".join(self._buf[self._starts.pop() :]))
+
+    def _closed(self, raw: str) -> None:
+        try:
+            obj = json.loads(raw)
+        except json.JSONDecodeError:
+            return
+        mention = obj.get("mention") if isinstance(obj, dict) else None
+        if not isinstance(mention, str) or not mention.strip():
+            return
+        if mention in self._seen or not _filter_mentions(self.text, [mention]):
+            return
+        self._seen.add(mention)
+        self.on_mention(mention)
+
+
 async def extract_mentions(
-    client: LlmClient, text: str, max_mentions: int, tag: str
+    client: LlmClient,
+    text: str,
+    max_mentions: int,
+    tag: str,
+    mode: str = "llm",
+    dictionary: PlaceDictionary | None = None,
+    on_mention: Callable[[str], None] | None = None,
+    batcher: ExtractBatcher | None = None,
 ) -> list[str]:
+    """Mentions of ``text``, at most ``max_mentions``.
+
+    With ``on_mention`` the LLM response is streamed and each mention is
+    passed to it as soon as it has been generated, so that callers can
+    start work on it early; the returned list is still the authoritative
+    (deduplicated, filtered, truncated) result. With a ``batcher`` the
+    LLM call is shared with other documents extracted at the same time
+    (and ``on_mention`` is not used).
+    """
+    if mode != "llm":
+        if dictionary is None:
+            raise ValueError(f"extract mode {mode!r} needs a dictionary")
+        mentions, ambiguous = dictionary.extract(text, max_mentions)
+        if mode == "dictionary" or (mentions and not ambiguous):
+            counters.incr("extract_dictionary")
+            return mentions
+        counters.incr("extract_llm_fallback")
     prompt = build_prompt(text)
     schema = ExtractOutput.model_json_schema()
-    data = await client.generate(prompt=prompt, schema=schema, tag=tag)
+    if batcher is not None:
+        data = await batcher.extract(text, tag=tag)
+    elif on_mention is None:
+        data = await client.generate(prompt=prompt, schema=schema, tag=tag)
+    else:
+        data = await client.generate(
+            prompt=prompt,
+            schema=schema,
+            tag=tag,
+            listener=MentionStream(text, on_mention),
+        )
     parsed = ExtractOutput.model_validate(data)
     mentions = _dedupe_mentions([m.mention for m in parsed.mentions])
     mentions = _filter_mentions(text, mentions)
@@ -0,0 +1,56 @@
+"""Bounded concurrent map that yields results in input order.
+
+:func:`ordered_map` keeps up to ``concurrency`` calls running and yields
+their results in the order of the input, through a reorder window: at
+most ``window`` items have been taken from the input and not yet
+yielded. A slow item at the head therefore stalls intake once the window
+is full instead of letting finished results (and unread input) pile up
+in memory, and the input is read lazily, so it can be a generator over a
+file of any size.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable
+from typing import TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+async def ordered_map(
+    func: Callable[[T], Awaitable[R]],
+    items: Iterable[T],
+    concurrency: int,
+    window: int | None = None,
+) -> AsyncIterator[R]:
+    """Yield ``await func(item)`` for every item, in input order.
+
+    ``window`` defaults to ``2 * concurrency`` and is never smaller than
+    ``concurrency``. An exception from ``func`` is raised when its item's
+    turn comes; the calls still in the window are cancelled.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    window = max(window or 2 * concurrency, concurrency)
+    slots = asyncio.Semaphore(concurrency)
+
+    async def _call(item: T) -> R:
+        async with slots:
+            return await func(item)
+
+    pending: deque[asyncio.Task[R]] = deque()
+    try:
+        for item in items:
+            pending.append(asyncio.create_task(_call(item)))
+            if len(pending) >= window:
+                yield await pending.popleft()
+        while pending:
+            yield await pending.popleft()
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
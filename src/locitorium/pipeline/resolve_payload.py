@@ -0,0 +1,155 @@
+"""Candidate payload of the resolve prompt, and its token budget.
+
+``json`` is the original layout: one JSON object per mention with every
+candidate spelled out in full, so a place shared by several mentions is
+repeated, and long Nominatim display names are sent whole.
+
+``compact`` sends each distinct place once, in a table with short ids
+(``p1``, ``p2``, ...), and display names cut to their first
+``address_parts`` components plus the country; mentions then only list
+the ids of their candidates. ``choice`` is still the position in that
+list, so the response schema is unchanged.
+
+With a ``token_budget``, candidates are trimmed by rank (the lowest
+ranked of every mention first, never below one) until the whole prompt
+fits. Tokens are counted by ``tokenizer`` (e.g. llama-server's
+``/tokenize`` through :meth:`LlmClient.count_tokens`) or, without one or
+when it fails, by :func:`estimate_tokens`.
+"""
+
+from __future__ import annotations
+
+import math
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+from locitorium import counters
+from locitorium.models.schema import Candidate
+from locitorium.pipeline.dictionary import is_cjk
+from locitorium.prompts.resolve import build_compact_prompt, build_prompt
+
+PAYLOAD_FORMATS = ("json", "compact")
+TOKENIZERS = ("estimate", "llama")
+
+CandidatesById = dict[str, tuple[str, list[Candidate]]]
+
+
+def json_payload(candidates_by_id: CandidatesById) -> list[dict]:
+    payload = []
+    for mention_id, (mention, candidates) in candidates_by_id.items():
+        payload.append(
+            {
+                "mention_id": mention_id,
+                "mention": mention,
+                "candidates": [
+                    {
+                        "index": idx,
+                        "display_name": c.display_name,
+                        "country_code": c.country_code,
+                        "osm_type": c.osm_type,
+                        "osm_id": c.osm_id,
+                    }
+                    for idx, c in enumerate(candidates)
+                ],
+            }
+        )
+    return payload
+
+
+def short_name(display_name: str, address_parts: int) -> str:
+    """First ``address_parts`` components of a display name, plus the last."""
+    parts = [p.strip() for p in display_name.split(",") if p.strip()]
+    if address_parts <= 0 or len(parts) <= address_parts + 1:
+        return ", ".join(parts)
+    return ", ".join(parts[:address_parts] + ["…", parts[-1]])
+
+
+def _cell(value: object) -> str:
+    if value is None:
+        return ""
+    return " ".join(str(value).replace("|", "/").split())
+
+
+def compact_payload(candidates_by_id: CandidatesById, address_parts: int = 3) -> str:
+    """Shared place table plus one line per mention."""
+    ids: dict[tuple[str, int | str], str] = {}
+    places: list[str] = []
+    mentions: list[str] = []
+    for mention_id, (mention, candidates) in candidates_by_id.items():
+        refs: list[str] = []
+        for c in candidates:
+            key = (c.osm_type, c.osm_id)
+            ref = ids.get(key)
+            if ref is None:
+                ref = ids[key] = f"p{len(ids) + 1}"
+                name = _cell(short_name(c.display_name, address_parts))
+                places.append(
+                    f"{ref}|{name}|{_cell(c.country_code)}|{_cell(c.category)}"
+                )
+            refs.append(ref)
+        mentions.append(f"{_cell(mention_id)}|{_cell(mention)}|{' '.join(refs)}")
+    return (
+        "PLACES (id|name|country|category):\n"
+        + "\n".join(places)
+        + "\n\nMENTIONS (mention_id|mention|candidate ids; choice counts from 0):\n"
+        + "\n".join(mentions)
+    )
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count: one per CJK character, one per ~3.5 other ones."""
+    cjk = sum(1 for ch in text if is_cjk(ch))
+    return cjk + math.ceil((len(text) - cjk) / 3.5)
+
+
+def _trim(candidates_by_id: CandidatesById, depth: int) -> CandidatesById:
+    return {
+        mention_id: (mention, candidates[:depth])
+        for mention_id, (mention, candidates) in candidates_by_id.items()
+    }
+
+
+@dataclass
+class ResolvePayload:
+    format: str = "json"
+    address_parts: int = 3
+    token_budget: int | None = None
+    tokenizer: Callable[[str], Awaitable[int]] | None = None
+
+    def __post_init__(self) -> None:
+        if self.format not in PAYLOAD_FORMATS:
+            raise ValueError(
+                f"resolve payload must be one of {', '.join(PAYLOAD_FORMATS)}"
+            )
+
+    def render(self, text: str, candidates_by_id: CandidatesById) -> str:
+        if self.format == "compact":
+            return build_compact_prompt(
+                text, compact_payload(candidates_by_id, self.address_parts)
+            )
+        return build_prompt(text, json_payload(candidates_by_id))
+
+    async def count(self, prompt: str) -> int:
+        if self.tokenizer is not None:
+            try:
+                return await self.tokenizer(prompt)
+            except Exception:
+                counters.incr("resolve_tokenize_errors")
+        return estimate_tokens(prompt)
+
+    async def prompt(self, text: str, candidates_by_id: CandidatesById) -> str:
+        """The resolve prompt, within ``token_budget`` when one is set."""
+        prompt = self.render(text, candidates_by_id)
+        if self.token_budget is None:
+            return prompt
+        depth = max((len(c) for _, c in candidates_by_id.values()), default=0)
+        tokens = await self.count(prompt)
+        while tokens > self.token_budget and depth > 1:
+            depth -= 1
+            prompt = self.render(text, _trim(candidates_by_id, depth))
+            tokens = await self.count(prompt)
+        trimmed = sum(max(0, len(c) - depth) for _, c in candidates_by_id.values())
+        if trimmed:
+            counters.incr("resolve_candidates_trimmed", trimmed)
+        counters.incr("resolve_prompt_tokens", tokens)
+        return prompt
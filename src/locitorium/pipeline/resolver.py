@@ -1,32 +1,14 @@
 from __future__ import annotations
 
+import asyncio
+import math
+from dataclasses import dataclass
+
+from locitorium import counters
 from locitorium.clients.llm import LlmClient
 from locitorium.models.schema import Candidate, PredResult, SelectedCandidate
-from locitorium.prompts.resolve import ResolveOutput, build_prompt
-
-
-def _candidates_payload(
-    candidates_by_id: dict[str, tuple[str, list[Candidate]]]
-) -> list[dict]:
-    payload = []
-    for mention_id, (mention, candidates) in candidates_by_id.items():
-        payload.append(
-            {
-                "mention_id": mention_id,
-                "mention": mention,
-                "candidates": [
-                    {
-                        "index": idx,
-                        "display_name": c.display_name,
-                        "country_code": c.country_code,
-                        "osm_type": c.osm_type,
-                        "osm_id": c.osm_id,
-                    }
-                    for idx, c in enumerate(candidates)
-                ],
-            }
-        )
-    return payload
+from locitorium.pipeline.resolve_payload import ResolvePayload
+from locitorium.prompts.resolve import ResolveOutput
 
 
 def _default_results(
@@ -47,20 +29,168 @@ def _default_results(
     return results
 
 
+@dataclass(frozen=True)
+class FastPathPolicy:
+    """When a mention is settled without asking the LLM.
+
+    A mention with a single candidate takes it (``single_confidence``). With
+    several, the first candidate wins when its importance is at least
+    ``min_importance``, beats the runner-up by ``min_margin`` and is not a
+    smaller place (higher place_rank) than it; its confidence grows with
+    the margin.
+    """
+
+    min_importance: float = 0.5
+    min_margin: float = 0.2
+    single_confidence: float = 0.9
+
+    def pick(self, candidates: list[Candidate]) -> tuple[Candidate, float] | None:
+        if not candidates:
+            return None
+        if len(candidates) == 1:
+            return candidates[0], self.single_confidence
+        top, second = candidates[0], candidates[1]
+        top_importance = top.importance or 0.0
+        margin = top_importance - (second.importance or 0.0)
+        if top_importance < self.min_importance or margin < self.min_margin:
+            return None
+        if (top.place_rank or 30) > (second.place_rank or 30):
+            return None
+        return top, round(min(0.99, 0.5 + margin), 3)
+
+
+@dataclass(frozen=True)
+class ShardPolicy:
+    """When to split one resolve prompt into concurrent smaller ones.
+
+    Decode time grows with the number of results the model writes, so a
+    document with many mentions is resolved as up to ``slots`` prompts
+    (llama-server's parallel slots) of about ``shard_size`` mentions each,
+    every one with the full document text. Documents with fewer than
+    ``min_mentions`` mentions, or a server with a single slot, keep the
+    single prompt: the text is prefilled once per shard.
+    """
+
+    shard_size: int = 5
+    min_mentions: int = 8
+    slots: int = 1
+
+    def shards(self, mentions: int) -> int:
+        if self.slots <= 1 or mentions < max(self.min_mentions, 2):
+            return 1
+        return max(1, min(self.slots, math.ceil(mentions / self.shard_size)))
+
+    def split(self, mention_ids: list[str]) -> list[list[str]]:
+        """Contiguous groups of about equal size, in the original order."""
+        n = self.shards(len(mention_ids))
+        size, extra = divmod(len(mention_ids), n)
+        groups: list[list[str]] = []
+        start = 0
+        for i in range(n):
+            end = start + size + (1 if i < extra else 0)
+            groups.append(mention_ids[start:end])
+            start = end
+        return groups
+
+
+def _in_order(
+    results: list[PredResult], candidates_by_id: dict[str, tuple[str, list[Candidate]]]
+) -> list[PredResult]:
+    order = {mention_id: i for i, mention_id in enumerate(candidates_by_id)}
+    return sorted(results, key=lambda r: order.get(r.mention_id, len(order)))
+
+
+def _selected(cand: Candidate, confidence: float | None) -> SelectedCandidate:
+    return SelectedCandidate(
+        osm_type=cand.osm_type,
+        osm_id=cand.osm_id,
+        lat=cand.lat,
+        lon=cand.lon,
+        bbox=cand.bbox,
+        display_name=cand.display_name,
+        country_code=cand.country_code,
+        confidence=confidence,
+    )
+
+
+def fast_resolve(
+    candidates_by_id: dict[str, tuple[str, list[Candidate]]],
+    policy: FastPathPolicy,
+) -> tuple[list[PredResult], dict[str, tuple[str, list[Candidate]]]]:
+    """Settle the unambiguous mentions; return them and the remainder."""
+    settled: list[PredResult] = []
+    remaining: dict[str, tuple[str, list[Candidate]]] = {}
+    for mention_id, (mention, candidates) in candidates_by_id.items():
+        picked = policy.pick(candidates)
+        if picked is None:
+            remaining[mention_id] = (mention, candidates)
+            continue
+        cand, confidence = picked
+        settled.append(
+            PredResult(
+                mention_id=mention_id,
+                mention=mention,
+                status="resolved",
+                selected=_selected(cand, confidence),
+                candidates=candidates,
+                resolved_by="fast_path",
+            )
+        )
+    return settled, remaining
+
+
 async def resolve_candidates(
     client: LlmClient,
     text: str,
     candidates_by_id: dict[str, tuple[str, list[Candidate]]],
     tag: str,
+    fast_path: FastPathPolicy | None = None,
+    payload: ResolvePayload | None = None,
+    shards: ShardPolicy | None = None,
 ) -> list[PredResult]:
     if not candidates_by_id:
         return []
 
+    if fast_path is not None:
+        settled, remaining = fast_resolve(candidates_by_id, fast_path)
+        if settled:
+            counters.incr("resolve_fast_path", len(settled))
+            if not any(cands for _, cands in remaining.values()):
+                counters.incr("resolve_llm_skipped")
+            rest = await resolve_candidates(
+                client, text, remaining, tag, payload=payload, shards=shards
+            )
+            return _in_order(settled + rest, candidates_by_id)
+
     if all(len(cands) == 0 for _, cands in candidates_by_id.values()):
         return _default_results(candidates_by_id)
 
-    payload = _candidates_payload(candidates_by_id)
-    prompt = build_prompt(text, payload)
+    if shards is not None:
+        with_candidates = [mid for mid, (_, c) in candidates_by_id.items() if c]
+        groups = shards.split(with_candidates)
+        if len(groups) > 1:
+            counters.incr("resolve_shards", len(groups))
+            empty = {
+                mid: item for mid, item in candidates_by_id.items() if not item[1]
+            }
+            parts = await asyncio.gather(
+                *(
+                    resolve_candidates(
+                        client,
+                        text,
+                        {mid: candidates_by_id[mid] for mid in group},
+                        tag=f"{tag}_{i}",
+                        payload=payload,
+                    )
+                    for i, group in enumerate(groups)
+                )
+            )
+            merged = _default_results(empty)
+            for part in parts:
+                merged.extend(part)
+            return _in_order(merged, candidates_by_id)
+
+    prompt = await (payload or ResolvePayload()).prompt(text, candidates_by_id)
     schema = ResolveOutput.model_json_schema()
     data = await client.generate(prompt=prompt, schema=schema, tag=tag)
     parsed = ResolveOutput.model_validate(data)
@@ -76,17 +206,7 @@ async def resolve_candidates(
         selected = None
         status = item.status
         if item.choice >= 0 and item.choice < len(candidates):
-            cand = candidates[item.choice]
-            selected = SelectedCandidate(
-                osm_type=cand.osm_type,
-                osm_id=cand.osm_id,
-                lat=cand.lat,
-                lon=cand.lon,
-                bbox=cand.bbox,
-                display_name=cand.display_name,
-                country_code=cand.country_code,
-                confidence=None,
-            )
+            selected = _selected(candidates[item.choice], None)
             status = "resolved"
         elif not candidates:
             status = "no_candidate"
@@ -100,6 +220,7 @@ async def resolve_candidates(
                 status=status,
                 selected=selected,
                 candidates=candidates,
+                resolved_by="llm" if selected is not None else None,
             )
         )
 
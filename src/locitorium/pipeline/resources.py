@@ -0,0 +1,422 @@
+"""Process-wide clients shared by every document.
+
+``run_doc`` used to build its clients per document, so every extract and
+resolve call opened a fresh connection. A :class:`PipelineResources` is
+created once per process (the API lifespan, an eval run) and handed to
+``run_doc``; it is an async context manager so that the pools are closed
+exactly once on shutdown.
+
+``candidates`` is the candidate backend documents search: the
+:class:`SourceChain` configured by ``candidate_sources``, otherwise a
+:class:`GazetteerClient` when ``gazetteer_path`` is set, otherwise
+``nominatim``.
+"""
+
+from __future__ import annotations
+
+import itertools
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from locitorium.cache.memory import MemoryCache
+from locitorium.cache.sqlite import SqliteCache
+from locitorium.cache.tiered import Cache, TieredCache
+from locitorium.clients.concurrency import AdaptiveLimit, RateLimiter
+from locitorium.clients.gazetteer import GazetteerClient
+from locitorium.clients.http import PoolStats, build_async_client
+from locitorium.clients.llm import LlmClient, response_size
+from locitorium.clients.nominatim import (
+    NominatimClient,
+    cache_size,
+    decode_candidates,
+    encode_candidates,
+)
+from locitorium.config import AppConfig
+from locitorium.pipeline.batcher import BatchStats, ExtractBatcher
+from locitorium.pipeline.candidates import CandidateSource
+from locitorium.pipeline.dictionary import PlaceDictionary, build_dictionary
+from locitorium.pipeline.extractor import EXTRACT_MODES
+from locitorium.pipeline.resolve_payload import PAYLOAD_FORMATS, TOKENIZERS
+from locitorium.pipeline.sources import (
+    BudgetedSource,
+    CacheSource,
+    SourceChain,
+    SourceSpec,
+    parse_source_chain,
+)
+from locitorium.prompts import extract as extract_prompts
+from locitorium.prompts import resolve as resolve_prompts
+
+LLM_CACHE_BACKENDS = ("none", "memory", "disk")
+
+
+def parse_slots(value: str) -> tuple[int, ...]:
+    """Slot ids from ``"0,1"``; empty means no pinning."""
+    try:
+        return tuple(int(part) for part in value.split(",") if part.strip())
+    except ValueError as exc:
+        raise ValueError(f"invalid LLM slot list {value!r}") from exc
+
+
+class PipelineResources:
+    """Long-lived, pooled clients for one process."""
+
+    def __init__(self, config: AppConfig) -> None:
+        if config.extract_mode not in EXTRACT_MODES:
+            raise ValueError(
+                f"extract_mode must be one of {', '.join(EXTRACT_MODES)}"
+            )
+        if config.resolve_payload not in PAYLOAD_FORMATS:
+            raise ValueError(
+                f"resolve_payload must be one of {', '.join(PAYLOAD_FORMATS)}"
+            )
+        for slots in (config.llm_extract_slots, config.llm_resolve_slots):
+            parse_slots(slots)
+        if config.resolve_tokenizer not in TOKENIZERS:
+            raise ValueError(
+                f"resolve_tokenizer must be one of {', '.join(TOKENIZERS)}"
+            )
+        self.config = config
+        self._dictionary: PlaceDictionary | None = None
+        self._batchers: dict[tuple[Any, ...], ExtractBatcher] = {}
+        self._slot_cycles: dict[tuple[int, ...], Iterator[int]] = {}
+        self._warm_up: dict[str, int] | None = None
+        self.llm_pool_stats = PoolStats()
+        self.llm_http: httpx.AsyncClient = build_async_client(
+            timeout_s=config.llm_timeout_s,
+            max_connections=config.llm_max_connections,
+            max_keepalive_connections=config.llm_max_keepalive_connections,
+            keepalive_expiry_s=config.http_keepalive_expiry_s,
+            http2=config.llm_http2,
+            stats=self.llm_pool_stats,
+        )
+        self.nominatim_memory_cache: MemoryCache | None = None
+        self.nominatim_disk_cache: SqliteCache | None = None
+        if config.nominatim_cache_entries > 0:
+            self.nominatim_memory_cache = MemoryCache(
+                max_entries=config.nominatim_cache_entries,
+                max_bytes=config.nominatim_cache_max_bytes,
+                ttl_s=config.nominatim_cache_ttl_s,
+                sizeof=cache_size,
+            )
+        if config.cache_path:
+            self.nominatim_disk_cache = SqliteCache(
+                config.cache_path,
+                namespace="nominatim",
+                ttl_s=config.nominatim_cache_ttl_s,
+                max_entries=config.nominatim_disk_cache_max_entries,
+                max_bytes=config.nominatim_disk_cache_max_bytes,
+                encode=encode_candidates,
+                decode=decode_candidates,
+            )
+        self.nominatim_cache = _combine(
+            self.nominatim_memory_cache, self.nominatim_disk_cache
+        )
+        self.nominatim_limiter = RateLimiter(
+            rate_per_s=config.nominatim_rate_per_s,
+            burst=config.nominatim_burst,
+            max_in_flight=config.nominatim_max_in_flight,
+            max_wait_s=config.nominatim_max_wait_s,
+            adaptive=_adaptive_limit(config),
+            counter_prefix="nominatim",
+        )
+        self.llm_memory_cache, self.llm_disk_cache = _llm_caches(config)
+        self.llm_cache = _combine(self.llm_memory_cache, self.llm_disk_cache)
+        specs = (
+            parse_source_chain(config.candidate_sources)
+            if config.candidate_sources
+            else []
+        )
+        # A chain with a cache link does the caching for its Nominatim links.
+        client_cache = (
+            None
+            if any(spec.name == "cache" for spec in specs)
+            else self.nominatim_cache
+        )
+        self.nominatim = NominatimClient(
+            config.nominatim_base_url,
+            timeout_s=config.nominatim_timeout_s,
+            limit=config.nominatim_limit,
+            max_connections=config.nominatim_max_connections,
+            max_keepalive_connections=config.nominatim_max_keepalive_connections,
+            keepalive_expiry_s=config.http_keepalive_expiry_s,
+            cache=client_cache,
+            negative_ttl_s=config.nominatim_negative_ttl_s,
+            limiter=self.nominatim_limiter,
+        )
+        self.gazetteer: GazetteerClient | None = None
+        if config.gazetteer_path:
+            self.gazetteer = GazetteerClient(
+                config.gazetteer_path, limit=config.nominatim_limit
+            )
+        self.nominatim_secondary: NominatimClient | None = None
+        if config.nominatim_secondary_base_url:
+            self.nominatim_secondary = NominatimClient(
+                config.nominatim_secondary_base_url,
+                timeout_s=config.nominatim_timeout_s,
+                limit=config.nominatim_limit,
+                max_connections=config.nominatim_max_connections,
+                max_keepalive_connections=config.nominatim_max_keepalive_connections,
+                keepalive_expiry_s=config.http_keepalive_expiry_s,
+                cache=client_cache,
+                negative_ttl_s=config.nominatim_negative_ttl_s,
+            )
+        self.source_chain: SourceChain | None = None
+        if specs:
+            self.source_chain = self._source_chain(specs)
+        self.candidates: CandidateSource = (
+            self.source_chain or self.gazetteer or self.nominatim
+        )
+
+    def _source_chain(self, specs: list[SourceSpec]) -> SourceChain:
+        available: dict[str, CandidateSource | CacheSource | None] = {
+            "cache": (
+                CacheSource(
+                    self.nominatim_cache,
+                    self.config.nominatim_limit,
+                    self.config.nominatim_negative_ttl_s,
+                )
+                if self.nominatim_cache is not None
+                else None
+            ),
+            "gazetteer": self.gazetteer,
+            "nominatim": self.nominatim,
+            "nominatim_secondary": self.nominatim_secondary,
+        }
+        links: list[BudgetedSource] = []
+        for spec in specs:
+            source = available[spec.name]
+            if source is None:
+                raise ValueError(
+                    f"candidate source {spec.name!r} is not configured"
+                )
+            links.append(
+                BudgetedSource(spec.name, source, spec.timeout_s, spec.concurrency)
+            )
+        return SourceChain(links)
+
+    def dictionary(self) -> PlaceDictionary:
+        """The mention dictionary, compiled on first use."""
+        if self._dictionary is None:
+            self._dictionary = build_dictionary(
+                self.gazetteer.index if self.gazetteer is not None else None,
+                min_importance=self.config.extract_dictionary_min_importance,
+            )
+        return self._dictionary
+
+    def stage_slots(self, config: AppConfig, stage: str) -> tuple[int, ...]:
+        value = {
+            "extract": config.llm_extract_slots,
+            "resolve": config.llm_resolve_slots,
+        }[stage]
+        return parse_slots(value)
+
+    def _slot_cycle(self, slots: tuple[int, ...]) -> Iterator[int] | None:
+        if not slots:
+            return None
+        cycle = self._slot_cycles.get(slots)
+        if cycle is None:
+            cycle = self._slot_cycles[slots] = itertools.cycle(slots)
+        return cycle
+
+    def llm_client(self, config: AppConfig, stage: str | None = None) -> LlmClient:
+        """Return an LlmClient for ``config`` that uses the shared pool.
+
+        ``config`` may differ from the one the resources were built with
+        (the API overrides the model per request); only the pool is shared.
+        With a ``stage`` ("extract" or "resolve"), requests go round robin
+        to that stage's llama-server slots, shared by every client of it.
+        """
+        slots = self.stage_slots(config, stage) if stage is not None else ()
+        return LlmClient(
+            config.openai_base_url,
+            config.openai_model,
+            api_key=config.openai_api_key,
+            timeout_s=config.llm_timeout_s,
+            thinking=config.openai_thinking,
+            debug_dir=Path(config.debug_dir) if config.debug_dir else None,
+            http_client=self.llm_http,
+            cache=self.llm_cache,
+            use_cache=not config.llm_cache_bypass,
+            cache_prompt=config.llm_cache_prompt,
+            id_slots=self._slot_cycle(slots),
+        )
+
+    def extract_batcher(self, config: AppConfig) -> ExtractBatcher | None:
+        """The batcher shared by documents that extract with ``config``.
+
+        Only calls that would go to the same model with the same options
+        are batched together; ``None`` when batching is off.
+        """
+        if config.extract_batch_max_size <= 1:
+            return None
+        key = (
+            config.openai_base_url,
+            config.openai_model,
+            config.openai_thinking,
+            config.llm_cache_bypass,
+            config.debug_dir,
+        )
+        batcher = self._batchers.get(key)
+        if batcher is None:
+            batcher = self._batchers[key] = ExtractBatcher(
+                self.llm_client(config, stage="extract"),
+                max_size=config.extract_batch_max_size,
+                max_wait_s=config.extract_batch_max_wait_ms / 1000,
+            )
+        return batcher
+
+    def prompt_prefixes(self, config: AppConfig) -> dict[str, str]:
+        """The static prompt head each stage sends with ``config``."""
+        return {
+            "extract": (
+                extract_prompts.BATCH_PROMPT_PREFIX
+                if config.extract_batch_max_size > 1
+                else extract_prompts.PROMPT_PREFIX
+            ),
+            "resolve": (
+                resolve_prompts.COMPACT_PROMPT_PREFIX
+                if config.resolve_payload == "compact"
+                else resolve_prompts.PROMPT_PREFIX
+            ),
+        }
+
+    async def warm_up(self, config: AppConfig) -> dict[str, int]:
+        """Prefill every stage's prompt prefix into its slots.
+
+        A failed warm-up only costs the first requests their cache hit, so
+        errors are counted rather than raised.
+        """
+        result = {"requests": 0, "errors": 0}
+        for stage, prefix in self.prompt_prefixes(config).items():
+            client = self.llm_client(config)
+            for slot in self.stage_slots(config, stage) or (None,):
+                result["requests"] += 1
+                try:
+                    await client.warm_up(prefix, slot=slot)
+                except httpx.HTTPError:
+                    result["errors"] += 1
+        self._warm_up = result
+        return result
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """Connection pool and cache statistics, keyed by component."""
+        stats: dict[str, dict[str, Any]] = {
+            "llm_pool": self.llm_pool_stats.snapshot(),
+            "nominatim_pool": self.nominatim.pool_stats.snapshot(),
+            "nominatim_single_flight": {
+                "collapsed": self.nominatim.single_flight.collapsed,
+                "in_flight": len(self.nominatim.single_flight),
+            },
+            "nominatim_limiter": {
+                **self.nominatim_limiter.stats.snapshot(),
+                "in_flight": self.nominatim_limiter.in_flight,
+                "limit": self.nominatim_limiter.limit,
+            },
+        }
+        if self.nominatim_limiter.adaptive is not None:
+            stats["nominatim_adaptive"] = self.nominatim_limiter.adaptive.snapshot()
+        if self.nominatim_cache is not None:
+            stats["nominatim_cache"] = self.nominatim_cache.stats.snapshot()
+        if self.nominatim_memory_cache is not None:
+            stats["nominatim_memory_cache"] = {
+                **self.nominatim_memory_cache.stats.snapshot(),
+                "entries": len(self.nominatim_memory_cache),
+                "bytes": self.nominatim_memory_cache.total_bytes,
+            }
+        if self.nominatim_disk_cache is not None:
+            stats["nominatim_disk_cache"] = self.nominatim_disk_cache.stats.snapshot()
+        if self.llm_cache is not None:
+            stats["llm_cache"] = self.llm_cache.stats.snapshot()
+        if self.source_chain is not None:
+            stats["candidate_sources"] = self.source_chain.stats()
+        if self._warm_up is not None:
+            stats["llm_warm_up"] = self._warm_up
+        if self._batchers:
+            stats["extract_batcher"] = _merge_batch_stats(self._batchers.values())
+        if self.gazetteer is not None:
+            stats["gazetteer"] = {
+                "records": len(self.gazetteer.index),
+                "lookups": self.gazetteer.lookups,
+                "misses": self.gazetteer.misses,
+            }
+        return stats
+
+    async def aclose(self) -> None:
+        for batcher in self._batchers.values():
+            await batcher.aclose()
+        await self.llm_http.aclose()
+        await self.nominatim.aclose()
+        if self.nominatim_secondary is not None:
+            await self.nominatim_secondary.aclose()
+        if self.gazetteer is not None:
+            await self.gazetteer.aclose()
+        for disk in (self.nominatim_disk_cache, self.llm_disk_cache):
+            if disk is not None:
+                disk.close()
+
+    async def __aenter__(self) -> PipelineResources:
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.aclose()
+
+
+def _merge_batch_stats(batchers: Iterable[ExtractBatcher]) -> dict[str, Any]:
+    total = BatchStats()
+    for batcher in batchers:
+        total.batches += batcher.stats.batches
+        total.documents += batcher.stats.documents
+        total.fallbacks += batcher.stats.fallbacks
+        total.wait_s += batcher.stats.wait_s
+    return total.snapshot()
+
+
+def _combine(memory: MemoryCache | None, disk: SqliteCache | None) -> Cache | None:
+    if memory is not None and disk is not None:
+        return TieredCache(memory, disk)
+    return memory if memory is not None else disk
+
+
+def _adaptive_limit(config: AppConfig) -> AdaptiveLimit | None:
+    if not config.nominatim_adaptive:
+        return None
+    max_limit = config.nominatim_max_in_flight or config.nominatim_max_connections
+    min_limit = min(config.nominatim_min_in_flight, max_limit)
+    return AdaptiveLimit(
+        initial=max(min_limit, min(config.nominatim_initial_in_flight, max_limit)),
+        min_limit=min_limit,
+        max_limit=max_limit,
+    )
+
+
+def _llm_caches(
+    config: AppConfig,
+) -> tuple[MemoryCache | None, SqliteCache | None]:
+    if config.llm_cache not in LLM_CACHE_BACKENDS:
+        raise ValueError(
+            f"llm_cache must be one of {', '.join(LLM_CACHE_BACKENDS)}, "
+            f"got {config.llm_cache!r}"
+        )
+    if config.llm_cache == "none":
+        return None, None
+    memory = MemoryCache(
+        max_entries=config.llm_cache_max_entries,
+        max_bytes=config.llm_cache_max_bytes,
+        ttl_s=config.llm_cache_ttl_s,
+        sizeof=response_size,
+    )
+    if config.llm_cache == "memory":
+        return memory, None
+    if not config.cache_path:
+        raise ValueError("llm_cache='disk' needs cache_path (LOCITORIUM_CACHE_PATH)")
+    disk = SqliteCache(
+        config.cache_path,
+        namespace="llm",
+        ttl_s=config.llm_cache_ttl_s,
+        max_entries=config.llm_disk_cache_max_entries,
+    )
+    return memory, disk
@@ -4,17 +4,34 @@ import asyncio
 import hashlib
 import json
 import time
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable
 from typing import Any
 
-from locitorium.clients.nominatim import NominatimClient, NominatimServerError
-from pathlib import Path
-
+from locitorium import counters
 from locitorium.clients.llm import LlmClient
+from locitorium.clients.nominatim import NominatimServerError
 from locitorium.config import AppConfig
-from locitorium.models.schema import ModelInfo, PredDoc, PredMetrics, PredResult
-from locitorium.pipeline.candidates import generate_candidates
+from locitorium.models.schema import (
+    Candidate,
+    ModelInfo,
+    PredDoc,
+    PredMetrics,
+    PredResult,
+)
+from locitorium.pipeline.candidates import CandidatePrefetcher
 from locitorium.pipeline.extractor import extract_mentions
-from locitorium.pipeline.resolver import resolve_candidates
+from locitorium.pipeline.ordered import ordered_map
+from locitorium.pipeline.resolve_payload import CandidatesById, ResolvePayload
+from locitorium.pipeline.resolver import (
+    FastPathPolicy,
+    ShardPolicy,
+    resolve_candidates,
+)
+from locitorium.pipeline.resources import PipelineResources
+from locitorium.pipeline.staged import Stage, StagedExecutor
+
+
+DocEvents = Callable[[str, dict[str, Any]], None]
 
 
 def _config_hash(config: AppConfig) -> str:
@@ -26,6 +43,34 @@ def _mention_ids(doc_id: str, mentions: list[str]) -> list[tuple[str, str]]:
     return [(f"{doc_id}:{i}", mention) for i, mention in enumerate(mentions)]
 
 
+def _fast_path_policy(config: AppConfig) -> FastPathPolicy | None:
+    if not config.resolve_fast_path:
+        return None
+    return FastPathPolicy(
+        min_importance=config.resolve_fast_path_min_importance,
+        min_margin=config.resolve_fast_path_margin,
+    )
+
+
+def _shard_policy(config: AppConfig) -> ShardPolicy | None:
+    if config.llm_parallel_slots <= 1:
+        return None
+    return ShardPolicy(
+        shard_size=config.resolve_shard_size,
+        min_mentions=config.resolve_shard_min_mentions,
+        slots=config.llm_parallel_slots,
+    )
+
+
+def _resolve_payload(config: AppConfig, llm: LlmClient) -> ResolvePayload:
+    return ResolvePayload(
+        format=config.resolve_payload,
+        address_parts=config.resolve_address_parts,
+        token_budget=config.resolve_token_budget,
+        tokenizer=llm.count_tokens if config.resolve_tokenizer == "llama" else None,
+    )
+
+
 def _single_status(doc_id: str, status: str) -> list[PredResult]:
     return [
         PredResult(
@@ -38,111 +83,307 @@ def _single_status(doc_id: str, status: str) -> list[PredResult]:
     ]
 
 
-async def run_doc(text: str, doc_id: str, config: AppConfig) -> PredDoc:
-    if len(text) > config.max_chars:
-        raise ValueError("input too long")
+class DocRun:
+    """One document on its way through extract → candidates → resolve.
 
-    debug_dir = Path(config.debug_dir) if config.debug_dir else None
-    llm = LlmClient(
-        config.openai_base_url,
-        config.openai_model,
-        api_key=config.openai_api_key,
-        thinking=config.openai_thinking,
-        debug_dir=debug_dir,
-    )
-    nominatim = NominatimClient(
-        config.nominatim_base_url,
-        timeout_s=config.nominatim_timeout_s,
-        limit=config.nominatim_limit,
-    )
+    Each stage is a method, run through :meth:`step`: :func:`run_doc`
+    runs them back to back, the staged executor (``config.staged``) in
+    one worker pool per stage. ``deadline_s`` counts from the start of the
+    first stage, time spent queued between stages included; counters of
+    every stage go to the same per-document mapping.
+
+    ``events(name, data)``, when given, is told about progress as it
+    happens: ``mention`` for each mention while the LLM is still
+    generating (``extract_stream`` only), ``mentions`` for the final list
+    with ids, and ``candidates`` for each mention as its search returns.
+    """
+
+    def __init__(
+        self,
+        text: str,
+        doc_id: str,
+        config: AppConfig,
+        resources: PipelineResources,
+        events: DocEvents | None = None,
+    ) -> None:
+        if len(text) > config.max_chars:
+            raise ValueError("input too long")
+        self.text = text
+        self.doc_id = doc_id
+        self.config = config
+        self.resources = resources
+        self.events = events
+        self.llm = resources.llm_client(config, stage="extract")
+        self.resolve_llm = resources.llm_client(config, stage="resolve")
+        self.prefetcher = CandidatePrefetcher(
+            resources.candidates,
+            concurrency=config.nominatim_concurrency,
+            max_candidates=config.max_candidates_per_mention,
+        )
+        self.counters: counters.Counters = {}
+        self.mentions: list[tuple[str, str]] = []
+        self.candidates: CandidatesById = {}
+        self.results: list[PredResult] | None = None
+        self.extract_s: float | None = None
+        self.candidate_s: float | None = None
+        self.resolve_s: float | None = None
+        self.started: float | None = None
+        self.finished: float | None = None
 
-    extract_s: float | None = None
-    candidate_s: float | None = None
-    resolve_s: float | None = None
+    @property
+    def done(self) -> bool:
+        return self.results is not None
 
-    async def _run_pipeline() -> list[PredResult]:
-        nonlocal extract_s, candidate_s, resolve_s
+    def _on_mention(self, mention: str) -> None:
+        self.prefetcher.submit(mention)
+        if self.events is not None:
+            self.events("mention", {"mention": mention})
+
+    def _on_candidates(
+        self, mention_id: str, mention: str, items: list[Candidate]
+    ) -> None:
+        if self.events is not None:
+            self.events(
+                "candidates",
+                {
+                    "mention_id": mention_id,
+                    "mention": mention,
+                    "candidates": [c.model_dump(mode="json") for c in items],
+                },
+            )
+
+    async def extract(self) -> None:
+        config = self.config
         t0 = time.perf_counter()
         mentions = await extract_mentions(
-            llm, text, config.max_mentions, tag=f"{doc_id}_extract"
+            self.llm,
+            self.text,
+            config.max_mentions,
+            tag=f"{self.doc_id}_extract",
+            mode=config.extract_mode,
+            dictionary=(
+                self.resources.dictionary() if config.extract_mode != "llm" else None
+            ),
+            on_mention=self._on_mention if config.extract_stream else None,
+            batcher=self.resources.extract_batcher(config),
         )
-        extract_s = time.perf_counter() - t0
-        mention_pairs = _mention_ids(doc_id, mentions)
-        if not mention_pairs:
-            candidate_s = 0.0
-            resolve_s = 0.0
-            return []
+        self.extract_s = time.perf_counter() - t0
+        self.mentions = _mention_ids(self.doc_id, mentions)
+        if self.events is not None:
+            self.events(
+                "mentions",
+                {
+                    "mentions": [
+                        {"mention_id": mention_id, "mention": mention}
+                        for mention_id, mention in self.mentions
+                    ]
+                },
+            )
+        if not self.mentions:
+            self.candidate_s = 0.0
+            self.resolve_s = 0.0
+            self.results = []
+
+    async def find_candidates(self) -> None:
+        # With extract_stream, searches started while the LLM was still
+        # generating; this is only the time left waiting for them.
         t1 = time.perf_counter()
-        candidates = await generate_candidates(
-            nominatim,
-            mention_pairs,
-            concurrency=config.nominatim_concurrency,
-            max_candidates=config.max_candidates_per_mention,
-        )
-        candidate_s = time.perf_counter() - t1
+        try:
+            self.candidates = await self.prefetcher.collect(
+                self.mentions,
+                on_candidates=self._on_candidates if self.events else None,
+            )
+        finally:
+            self.prefetcher.cancel()
+        self.candidate_s = time.perf_counter() - t1
+
+    async def resolve(self) -> None:
         t2 = time.perf_counter()
-        results = await resolve_candidates(
-            llm, text, candidates, tag=f"{doc_id}_resolve"
+        self.results = await resolve_candidates(
+            self.resolve_llm,
+            self.text,
+            self.candidates,
+            tag=f"{self.doc_id}_resolve",
+            fast_path=_fast_path_policy(self.config),
+            payload=_resolve_payload(self.config, self.resolve_llm),
+            shards=_shard_policy(self.config),
         )
-        resolve_s = time.perf_counter() - t2
-        return results
+        self.resolve_s = time.perf_counter() - t2
 
-    start_total = time.perf_counter()
-    try:
-        results = await asyncio.wait_for(_run_pipeline(), timeout=config.deadline_s)
-    except asyncio.TimeoutError:
-        results = _single_status(doc_id, "timeout")
-    except NominatimServerError:
-        raise
-    except Exception:
-        results = _single_status(doc_id, "invalid_output")
-    total_s = time.perf_counter() - start_total
-
-    return PredDoc(
-        doc_id=doc_id,
-        model_info=ModelInfo(
-            llm_model=config.openai_model,
-            llm_base_url=config.openai_base_url,
-            nominatim_base_url=config.nominatim_base_url,
-            config_hash=_config_hash(config),
-        ),
-        results=results,
-        metrics=PredMetrics(
-            total_s=total_s,
-            extract_s=extract_s,
-            candidate_s=candidate_s,
-            resolve_s=resolve_s,
-        ),
-    )
+    async def run(self) -> None:
+        for stage in (self.extract, self.find_candidates, self.resolve):
+            if self.done:
+                return
+            await stage()
 
+    async def step(self, stage: Callable[[], Awaitable[None]]) -> None:
+        """Run ``stage`` within what is left of the deadline.
 
-async def run_dataset(docs: list[dict[str, Any]], config: AppConfig) -> list[PredDoc]:
-    nominatim = NominatimClient(
-        config.nominatim_base_url,
-        timeout_s=config.nominatim_timeout_s,
-        limit=config.nominatim_limit,
-    )
-    await nominatim.search("Tokyo")
+        A timeout or an unusable LLM answer settles the document with a
+        single status result; Nominatim server errors propagate.
+        """
+        if self.started is None:
+            self.started = time.perf_counter()
+        remaining = self.config.deadline_s - (time.perf_counter() - self.started)
+        with counters.collect(self.counters):
+            try:
+                if remaining <= 0:
+                    raise asyncio.TimeoutError
+                await asyncio.wait_for(stage(), timeout=remaining)
+            except asyncio.TimeoutError:
+                self.results = _single_status(self.doc_id, "timeout")
+            except (NominatimServerError, asyncio.CancelledError):
+                self.prefetcher.cancel()
+                raise
+            except Exception:
+                self.results = _single_status(self.doc_id, "invalid_output")
+        if self.done:
+            self.prefetcher.cancel()
+        self.finished = time.perf_counter()
+
+    def prediction(self) -> PredDoc:
+        config = self.config
+        total_s = 0.0
+        if self.started is not None and self.finished is not None:
+            total_s = self.finished - self.started
+        return PredDoc(
+            doc_id=self.doc_id,
+            model_info=ModelInfo(
+                llm_model=config.openai_model,
+                llm_base_url=config.openai_base_url,
+                nominatim_base_url=(
+                    f"gazetteer:{config.gazetteer_path}"
+                    if config.gazetteer_path
+                    else config.nominatim_base_url
+                ),
+                config_hash=_config_hash(config),
+            ),
+            results=self.results or [],
+            metrics=PredMetrics(
+                total_s=total_s,
+                extract_s=self.extract_s,
+                candidate_s=self.candidate_s,
+                resolve_s=self.resolve_s,
+                counters=self.counters,
+            ),
+        )
+
+
+async def run_doc(
+    text: str,
+    doc_id: str,
+    config: AppConfig,
+    resources: PipelineResources | None = None,
+) -> PredDoc:
+    """Run extract → candidates → resolve for one document.
+
+    ``resources`` carries the pooled clients shared across documents; when
+    omitted, short-lived ones are created and closed for this call only.
+    """
+    if len(text) > config.max_chars:
+        raise ValueError("input too long")
+
+    if resources is None:
+        async with PipelineResources(config) as owned:
+            return await run_doc(text, doc_id, config, owned)
+
+    doc = DocRun(text, doc_id, config, resources)
+    await doc.step(doc.run)
+    return doc.prediction()
+
+
+async def warm_up(resources: PipelineResources, config: AppConfig) -> None:
+    """Check the candidate backend and, if enabled, prime the LLM prefixes."""
+    await resources.candidates.search("Tokyo")
+    if config.llm_warm_up:
+        await resources.warm_up(config)
+
+
+async def run_dataset(
+    docs: Iterable[dict[str, Any]], config: AppConfig, concurrency: int = 1
+) -> list[PredDoc]:
     outputs: list[PredDoc] = []
-    for doc in docs:
-        outputs.append(await run_doc(doc["text"], doc["doc_id"], config))
+    async with PipelineResources(config) as resources:
+        await warm_up(resources, config)
+        async for pred in _run_ordered(docs, config, resources, concurrency):
+            outputs.append(pred)
     return outputs
 
 
 async def run_dataset_stream(
-    docs: list[dict[str, Any]],
+    docs: Iterable[dict[str, Any]],
     config: AppConfig,
     output_path: str,
-) -> None:
-    nominatim = NominatimClient(
-        config.nominatim_base_url,
-        timeout_s=config.nominatim_timeout_s,
-        limit=config.nominatim_limit,
+    concurrency: int = 1,
+    append: bool = False,
+) -> dict[str, dict[str, int | float]]:
+    """Write one prediction per line of ``output_path``, in input order.
+
+    With ``concurrency`` > 1 that many documents are in flight at once;
+    ``docs`` is consumed lazily, a bounded window ahead of the output.
+    With ``config.staged`` the stage worker pools set the parallelism
+    instead, and their stats (see :class:`StageStats`) are returned.
+    ``append`` adds to an existing file instead of replacing it.
+    """
+    stage_stats: dict[str, dict[str, int | float]] = {}
+    async with PipelineResources(config) as resources:
+        await warm_up(resources, config)
+        with open(output_path, "a" if append else "w", encoding="utf-8") as f:
+            async for pred in _run_ordered(
+                docs, config, resources, concurrency, stage_stats
+            ):
+                f.write(pred.model_dump_json())
+                f.write("\n")
+                f.flush()
+    return stage_stats
+
+
+def staged_executor(config: AppConfig) -> StagedExecutor[DocRun]:
+    """Executor with extract, candidates and resolve worker pools."""
+    return StagedExecutor(
+        [
+            Stage(
+                "extract",
+                lambda doc: doc.step(doc.extract),
+                config.stage_extract_workers,
+            ),
+            Stage(
+                "candidates",
+                lambda doc: doc.step(doc.find_candidates),
+                config.stage_candidate_workers,
+            ),
+            Stage(
+                "resolve",
+                lambda doc: doc.step(doc.resolve),
+                config.stage_resolve_workers,
+            ),
+        ],
+        queue_size=config.stage_queue_size,
+        done=lambda doc: doc.done,
     )
-    await nominatim.search("Tokyo")
-    with open(output_path, "w", encoding="utf-8") as f:
-        for doc in docs:
-            pred = await run_doc(doc["text"], doc["doc_id"], config)
-            f.write(pred.model_dump_json())
-            f.write("\n")
-            f.flush()
+
+
+async def _run_ordered(
+    docs: Iterable[dict[str, Any]],
+    config: AppConfig,
+    resources: PipelineResources,
+    concurrency: int,
+    stage_stats: dict[str, dict[str, int | float]] | None = None,
+) -> AsyncIterator[PredDoc]:
+    if not config.staged:
+
+        async def _one(doc: dict[str, Any]) -> PredDoc:
+            return await run_doc(doc["text"], doc["doc_id"], config, resources)
+
+        async for pred in ordered_map(_one, docs, concurrency):
+            yield pred
+        return
+
+    executor = staged_executor(config)
+    runs = (DocRun(d["text"], d["doc_id"], config, resources) for d in docs)
+    try:
+        async for doc in executor.map(runs):
+            yield doc.prediction()
+    finally:
+        if stage_stats is not None:
+            stage_stats.update(executor.snapshot())
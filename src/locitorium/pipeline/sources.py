@@ -0,0 +1,208 @@
+"""Ordered chain of candidate sources with per-source budgets.
+
+``candidate_sources`` (``LOCITORIUM_CANDIDATE_SOURCES``) lists the
+sources to try, fastest first, as ``name[:timeout_s[:concurrency]]``
+entries separated by commas, e.g.::
+
+    cache,gazetteer:0.05,nominatim:5:8,nominatim_secondary:10:4
+
+A search goes to the first source; only a miss (no candidates) or a
+failure (error, or no answer within the source's ``timeout_s``, queueing
+for its ``concurrency`` slots included) falls through to the next one.
+When a fast source can answer, the slow ones are never waited for.
+
+A ``cache`` link owns caching for the chain: it answers from the
+Nominatim result cache, and whatever the other links find is stored
+there (an empty answer for ``nominatim_negative_ttl_s``, and only when
+no link failed), so the Nominatim clients of such a chain do not read
+or write the cache themselves. A cached empty answer ends the search.
+
+Every attempt is counted per document as ``source_{name}_{outcome}``
+(``hits``, ``misses``, ``errors``, ``timeouts``) plus
+``source_{name}_latency_s``, and in :class:`SourceStats` for ``/api/stats``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+
+from locitorium import counters
+from locitorium.cache.tiered import Cache
+from locitorium.clients.nominatim import cache_key
+from locitorium.models.schema import Candidate
+from locitorium.pipeline.candidates import CandidateSource
+
+SOURCE_NAMES = ("cache", "gazetteer", "nominatim", "nominatim_secondary")
+
+
+@dataclass(frozen=True)
+class SourceSpec:
+    name: str
+    timeout_s: float | None = None
+    concurrency: int | None = None
+
+
+def parse_source_chain(value: str) -> list[SourceSpec]:
+    """Parse ``name[:timeout_s[:concurrency]]`` entries separated by commas."""
+    specs: list[SourceSpec] = []
+    for entry in value.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        name, *budget = entry.split(":")
+        if name not in SOURCE_NAMES:
+            raise ValueError(
+                f"unknown candidate source {name!r}; expected one of "
+                + ", ".join(SOURCE_NAMES)
+            )
+        if len(budget) > 2:
+            raise ValueError(f"invalid candidate source entry {entry!r}")
+        try:
+            timeout_s = float(budget[0]) if budget and budget[0] else None
+            concurrency = int(budget[1]) if len(budget) > 1 and budget[1] else None
+        except ValueError as exc:
+            raise ValueError(f"invalid candidate source entry {entry!r}") from exc
+        specs.append(SourceSpec(name, timeout_s, concurrency))
+    if not specs:
+        raise ValueError("candidate source chain is empty")
+    return specs
+
+
+class CacheSource:
+    """Answer from the Nominatim result cache only; never goes out.
+
+    ``search`` returns ``None`` on a miss, so that a cached empty answer
+    can be told apart from one that is not cached.
+    """
+
+    def __init__(
+        self, cache: Cache, limit: int, negative_ttl_s: float | None = None
+    ) -> None:
+        self.cache = cache
+        self.limit = limit
+        self.negative_ttl_s = negative_ttl_s
+
+    async def search(self, query: str) -> list[Candidate] | None:
+        cached = await self.cache.aget(cache_key(query, self.limit))
+        return list(cached) if cached is not None else None
+
+    async def store(self, query: str, candidates: list[Candidate]) -> None:
+        ttl_s = self.negative_ttl_s if not candidates else None
+        evicted = await self.cache.aset(
+            cache_key(query, self.limit), tuple(candidates), ttl_s=ttl_s
+        )
+        if evicted:
+            counters.incr("nominatim_cache_evictions", evicted)
+
+
+@dataclass
+class SourceStats:
+    hits: int = 0
+    misses: int = 0
+    errors: int = 0
+    timeouts: int = 0
+    latency_s: float = 0.0
+
+    def snapshot(self) -> dict[str, int | float]:
+        calls = self.hits + self.misses + self.errors + self.timeouts
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "hit_rate": self.hits / calls if calls else 0.0,
+            "avg_latency_s": round(self.latency_s / calls, 6) if calls else 0.0,
+        }
+
+
+class BudgetedSource:
+    """One link of the chain: a source with its own timeout and slots."""
+
+    def __init__(
+        self,
+        name: str,
+        source: CandidateSource | CacheSource,
+        timeout_s: float | None = None,
+        concurrency: int | None = None,
+    ) -> None:
+        self.name = name
+        self.source = source
+        self.timeout_s = timeout_s
+        self.stats = SourceStats()
+        self._slots = asyncio.Semaphore(concurrency) if concurrency else None
+
+    async def _search(self, query: str) -> list[Candidate] | None:
+        if self._slots is None:
+            return await self.source.search(query)
+        async with self._slots:
+            return await self.source.search(query)
+
+    async def search(self, query: str) -> list[Candidate] | None:
+        start = time.perf_counter()
+        # A search cancelled from outside (deadline, unused prefetch) says
+        # nothing about the source's health, so it is not counted.
+        outcome: str | None = None
+        try:
+            candidates = await asyncio.wait_for(self._search(query), self.timeout_s)
+            outcome = "hits" if candidates else "misses"
+            return candidates
+        except asyncio.TimeoutError:
+            outcome = "timeouts"
+            raise
+        except Exception:
+            outcome = "errors"
+            raise
+        finally:
+            if outcome is not None:
+                elapsed = time.perf_counter() - start
+                setattr(self.stats, outcome, getattr(self.stats, outcome) + 1)
+                self.stats.latency_s += elapsed
+                counters.incr(f"source_{self.name}_{outcome}")
+                counters.incr(f"source_{self.name}_latency_s", elapsed)
+
+
+class SourceChain:
+    """Try each source in order until one returns candidates.
+
+    Returns ``[]`` when every source answered but none had candidates;
+    re-raises the last failure when no source answered at all.
+    """
+
+    def __init__(self, sources: list[BudgetedSource]) -> None:
+        if not sources:
+            raise ValueError("SourceChain needs at least one source")
+        self.sources = sources
+        self.cache = next(
+            (s.source for s in sources if isinstance(s.source, CacheSource)), None
+        )
+
+    async def search(self, query: str) -> list[Candidate]:
+        error: BaseException | None = None
+        answered = False
+        for source in self.sources:
+            try:
+                candidates = await source.search(query)
+            except Exception as exc:
+                error = exc
+                continue
+            if source.source is self.cache and candidates is not None:
+                return candidates
+            if candidates:
+                await self._store(query, candidates)
+                return candidates
+            answered = True
+        if error is None:
+            await self._store(query, [])
+            return []
+        if answered:
+            return []
+        raise error
+
+    async def _store(self, query: str, candidates: list[Candidate]) -> None:
+        if self.cache is not None:
+            await self.cache.store(query, candidates)
+
+    def stats(self) -> dict[str, dict[str, int | float]]:
+        return {source.name: source.stats.snapshot() for source in self.sources}
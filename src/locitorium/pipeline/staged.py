@@ -0,0 +1,163 @@
+"""Stage-pipelined execution with one worker pool per stage.
+
+:func:`ordered_map` gives every document a slot for its whole run, so the
+LLM and the candidate backend are busy in turns: a slot waiting on a
+resolve call holds nothing for the searches or extractions of other
+documents. A :class:`StagedExecutor` runs each stage with its own number
+of workers instead, joined by bounded queues: later documents are being
+extracted while earlier ones wait for candidates or resolution, and each
+backend gets a steady load capped by its stage's worker count.
+
+A full queue blocks the stage feeding it (backpressure), and intake
+stops once ``window`` items are in the pipeline or waiting to be
+yielded, so memory stays bounded whatever the input size. Results come
+out in input order. An item for which ``done`` is true skips the stages
+left.
+
+Per stage, :class:`StageStats` records the items processed, the busy
+time of its workers (utilization is busy time over workers × wall time)
+and the depth of the queue in front of it, sampled at every put.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable, Sequence
+from dataclasses import dataclass
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class StageStats:
+    workers: int
+    processed: int = 0
+    busy_s: float = 0.0
+    queue_max: int = 0
+    queue_total: int = 0
+    queue_samples: int = 0
+
+    def record_depth(self, depth: int) -> None:
+        self.queue_max = max(self.queue_max, depth)
+        self.queue_total += depth
+        self.queue_samples += 1
+
+    def snapshot(self, wall_s: float) -> dict[str, int | float]:
+        return {
+            "workers": self.workers,
+            "processed": self.processed,
+            "busy_s": round(self.busy_s, 3),
+            "utilization": (
+                round(self.busy_s / (self.workers * wall_s), 3) if wall_s else 0.0
+            ),
+            "queue_max": self.queue_max,
+            "avg_queue_depth": (
+                round(self.queue_total / self.queue_samples, 3)
+                if self.queue_samples
+                else 0.0
+            ),
+        }
+
+
+@dataclass
+class Stage(Generic[T]):
+    name: str
+    func: Callable[[T], Awaitable[None]]
+    workers: int = 1
+
+
+class StagedExecutor(Generic[T]):
+    def __init__(
+        self,
+        stages: Sequence[Stage[T]],
+        queue_size: int = 8,
+        window: int | None = None,
+        done: Callable[[T], bool] | None = None,
+    ) -> None:
+        if not stages:
+            raise ValueError("at least one stage is required")
+        if any(stage.workers < 1 for stage in stages):
+            raise ValueError("every stage needs at least one worker")
+        if queue_size < 1:
+            raise ValueError("queue_size must be at least 1")
+        self.stages = list(stages)
+        self.queue_size = queue_size
+        # Default: twice what the workers and queues can hold at once.
+        capacity = sum(s.workers for s in stages) + queue_size * len(stages)
+        self.window = window or 2 * capacity
+        self.done = done or (lambda item: False)
+        self.stats = {stage.name: StageStats(stage.workers) for stage in stages}
+        self._started: float | None = None
+        self._finished: float | None = None
+
+    def snapshot(self) -> dict[str, dict[str, int | float]]:
+        if self._started is None:
+            wall_s = 0.0
+        else:
+            wall_s = (self._finished or time.perf_counter()) - self._started
+        return {name: stats.snapshot(wall_s) for name, stats in self.stats.items()}
+
+    async def map(self, items: Iterable[T]) -> AsyncIterator[T]:
+        """Yield every item once it has passed all stages, in input order.
+
+        An exception from a stage is raised when its item's turn comes;
+        the workers and the items still in the pipeline are cancelled.
+        """
+        loop = asyncio.get_running_loop()
+        queues: list[asyncio.Queue[tuple[T, asyncio.Future[T]]]] = [
+            asyncio.Queue(maxsize=self.queue_size) for _ in self.stages
+        ]
+
+        async def _put(index: int, item: T, future: asyncio.Future[T]) -> None:
+            if index == len(self.stages) or self.done(item):
+                if not future.done():
+                    future.set_result(item)
+                return
+            await queues[index].put((item, future))
+            self.stats[self.stages[index].name].record_depth(queues[index].qsize())
+
+        async def _worker(index: int) -> None:
+            stage = self.stages[index]
+            stats = self.stats[stage.name]
+            while True:
+                item, future = await queues[index].get()
+                if future.done():
+                    continue
+                t0 = time.perf_counter()
+                try:
+                    await stage.func(item)
+                except Exception as exc:
+                    future.set_exception(exc)
+                    continue
+                finally:
+                    stats.busy_s += time.perf_counter() - t0
+                    stats.processed += 1
+                await _put(index + 1, item, future)
+
+        self._started = time.perf_counter()
+        self._finished = None
+        workers = [
+            asyncio.create_task(_worker(index))
+            for index, stage in enumerate(self.stages)
+            for _ in range(stage.workers)
+        ]
+        pending: deque[asyncio.Future[T]] = deque()
+        try:
+            for item in items:
+                future: asyncio.Future[T] = loop.create_future()
+                pending.append(future)
+                await _put(0, item, future)
+                if len(pending) >= self.window:
+                    yield await pending.popleft()
+            while pending:
+                yield await pending.popleft()
+        finally:
+            self._finished = time.perf_counter()
+            for task in workers:
+                task.cancel()
+            for future in pending:
+                future.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
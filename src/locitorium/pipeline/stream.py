@@ -10,13 +10,17 @@ from __future__ import annotations
 
 import json
 import sys
-from collections.abc import AsyncIterator, Callable, Iterable
+import time
+from collections.abc import AsyncIterator, Callable, Iterable, Iterator
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
 import httpx
 
+from locitorium.pipeline.balancer import ServerPool
+from locitorium.pipeline.ordered import ordered_map
+
 DEFAULT_SERVER_URL = "http://127.0.0.1:30101"
 
 # Statuses produced by this module (locitorium itself produces
@@ -175,17 +179,58 @@ def rows_from_pred(
 
 async def resolve_text(
     client: httpx.AsyncClient,
-    server_url: str,
+    server_url: str | ServerPool,
     text: str,
     model: str | None = None,
 ) -> dict[str, Any]:
-    """Call ``GET /api`` on a locitorium server and return the raw PredDoc."""
+    """Call ``GET /api`` on a locitorium server and return the raw PredDoc.
+
+    With a :class:`ServerPool`, the request goes to its least busy server
+    and is retried on another one if that fails.
+    """
     params: dict[str, str] = {"q": text}
     if model:
         params["model"] = model
-    resp = await client.get(f"{server_url.rstrip('/')}/api", params=params)
-    resp.raise_for_status()
-    return resp.json()
+    if not isinstance(server_url, ServerPool):
+        server_url = ServerPool([server_url])
+    return await server_url.get_json(client, "/api", params)
+
+
+class BatchItemError(RuntimeError):
+    """A document of a batch that the server could not resolve."""
+
+
+async def resolve_batch(
+    client: httpx.AsyncClient,
+    server_url: str | ServerPool,
+    texts: list[str],
+    model: str | None = None,
+) -> list[dict[str, Any] | Exception]:
+    """Resolve ``texts`` with one ``POST /api/batch``.
+
+    Returns the raw PredDoc of every text, in order, or a
+    :class:`BatchItemError` in its place.
+    """
+    params = {"model": model} if model else None
+    if not isinstance(server_url, ServerPool):
+        server_url = ServerPool([server_url])
+    lines = await server_url.post_ndjson(
+        client,
+        "/api/batch",
+        [{"id": i, "text": text} for i, text in enumerate(texts)],
+        params,
+    )
+    by_id = {line.get("id"): line for line in lines if isinstance(line, dict)}
+    answers: list[dict[str, Any] | Exception] = []
+    for i in range(len(texts)):
+        line = by_id.get(i)
+        if line is None:
+            answers.append(BatchItemError("missing from the batch response"))
+        elif "error" in line:
+            answers.append(BatchItemError(line["error"]))
+        else:
+            answers.append(line)
+    return answers
 
 
 def _record_id(record: dict[str, Any], options: StreamOptions, line_no: int) -> str:
@@ -195,6 +240,90 @@ def _record_id(record: dict[str, Any], options: StreamOptions, line_no: int) ->
     return str(value)
 
 
+@dataclass
+class _Work:
+    """One unit of output, in input order: rows ready as is, or a chunk."""
+
+    line_no: int
+    input_id: str
+    rows: list[dict[str, Any]] | None = None
+    message: str | None = None
+    chunk: str = ""
+    chunk_index: int = 0
+    n_chunks: int = 1
+
+
+def _work_items(
+    records: Iterable[dict[str, Any]],
+    options: StreamOptions,
+    resume_rows: dict[str, list[dict[str, Any]]],
+) -> Iterator[_Work]:
+    for line_no, record in enumerate(records, start=1):
+        input_id = _record_id(record, options, line_no)
+
+        cached = resume_rows.get(input_id)
+        if cached is not None:
+            message = f"[{line_no}] {input_id}: reused {len(cached)} row(s)"
+            yield _Work(line_no, input_id, rows=cached, message=message)
+            continue
+
+        text = record.get(options.text_field)
+        if not isinstance(text, str) or not text.strip():
+            row = _base_row(input_id, 0, STATUS_MISSING_TEXT)
+            row["error"] = f"field {options.text_field!r} missing or empty"
+            message = f"[{line_no}] {input_id}: missing text"
+            yield _Work(line_no, input_id, rows=[row], message=message)
+            continue
+
+        text = text.strip()
+        chunks: list[str]
+        if len(text) <= options.max_chars:
+            chunks = [text]
+        elif options.on_too_long == "split":
+            chunks = split_text(text, options.max_chars)
+        elif options.on_too_long == "truncate":
+            chunks = [text[: options.max_chars]]
+        else:
+            row = _base_row(input_id, 0, STATUS_INPUT_TOO_LONG)
+            row["error"] = (
+                f"{len(text)} chars exceeds max_chars={options.max_chars}; "
+                "use --on-too-long split or truncate"
+            )
+            message = (
+                f"[{line_no}] {input_id}: too long "
+                f"({len(text)} > {options.max_chars})"
+            )
+            yield _Work(line_no, input_id, rows=[row], message=message)
+            continue
+
+        for chunk_index, chunk in enumerate(chunks):
+            yield _Work(
+                line_no,
+                input_id,
+                chunk=chunk,
+                chunk_index=chunk_index,
+                n_chunks=len(chunks),
+            )
+
+
+def _groups(items: Iterable[_Work], size: int) -> Iterator[list[_Work]]:
+    """Consecutive work items with up to ``size`` chunks to send per group."""
+    group: list[_Work] = []
+    chunks = 0
+    for work in items:
+        if work.rows is not None and not group:
+            yield [work]
+            continue
+        group.append(work)
+        if work.rows is None:
+            chunks += 1
+            if chunks == size:
+                yield group
+                group, chunks = [], 0
+    if group:
+        yield group
+
+
 async def resolve_records(
     records: Iterable[dict[str, Any]],
     options: StreamOptions,
@@ -204,80 +333,101 @@ async def resolve_records(
     resume_rows: dict[str, list[dict[str, Any]]] | None = None,
     progress: Callable[[str], None] | None = None,
     client: httpx.AsyncClient | None = None,
+    concurrency: int = 1,
+    servers: ServerPool | None = None,
+    batch_size: int = 1,
 ) -> AsyncIterator[dict[str, Any]]:
     """Resolve every input record and yield output rows, one per mention.
 
     Failures are reported as rows with a non-``resolved`` status; nothing
     is silently dropped. Records whose ``input_id`` is present in
     ``resume_rows`` are copied through without touching the server.
+
+    With ``concurrency`` > 1 that many requests are in flight on the one
+    client; rows still come out in input order (chunks in ``chunk_index``
+    order), through a bounded reorder window. ``servers`` spreads them
+    over several replicas instead of ``server_url``. With ``batch_size``
+    > 1 each request is a ``POST /api/batch`` of up to that many chunks.
     """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
     owns_client = client is None
     if client is None:
-        client = httpx.AsyncClient(timeout=timeout_s)
-    resume_rows = resume_rows or {}
-    try:
-        for line_no, record in enumerate(records, start=1):
-            input_id = _record_id(record, options, line_no)
-
-            cached = resume_rows.get(input_id)
-            if cached is not None:
-                if progress:
-                    progress(f"[{line_no}] {input_id}: reused {len(cached)} row(s)")
-                for row in cached:
-                    yield row
-                continue
+        client = httpx.AsyncClient(
+            timeout=timeout_s,
+            limits=httpx.Limits(
+                max_connections=concurrency,
+                max_keepalive_connections=concurrency,
+            ),
+        )
+    if servers is None:
+        servers = ServerPool([server_url])
+    state = {"in_flight": 0, "sent": 0}
+    started = time.perf_counter()
+
+    async def _fetch(chunks: list[_Work]) -> list[dict[str, Any] | Exception]:
+        texts = [work.chunk for work in chunks]
+        try:
+            if batch_size == 1:
+                return [await resolve_text(client, servers, texts[0], model)]
+            return await resolve_batch(client, servers, texts, model)
+        except Exception as exc:  # network / HTTP / decode failures
+            return [exc] * len(chunks)
+
+    def _chunk_rows(
+        work: _Work, answer: dict[str, Any] | Exception
+    ) -> list[dict[str, Any]]:
+        label = f"[{work.line_no}] {work.input_id}"
+        if isinstance(answer, Exception):
+            row = _base_row(work.input_id, work.chunk_index, STATUS_SERVER_ERROR)
+            row["error"] = f"{type(answer).__name__}: {answer}"
+            if progress:
+                progress(f"{label}: server error {answer}")
+            return [row]
+        rows = rows_from_pred(work.input_id, answer, work.chunk_index, options)
+        if progress:
+            statuses = ", ".join(sorted({r["status"] for r in rows}))
+            message = (
+                f"{label} chunk {work.chunk_index + 1}/"
+                f"{work.n_chunks} ({len(work.chunk)} chars): "
+                f"{len(rows)} row(s) [{statuses}]"
+            )
+            if concurrency > 1 or batch_size > 1:
+                rate = state["sent"] / max(time.perf_counter() - started, 1e-9)
+                message += (
+                    f" ({state['in_flight']} in flight, {rate:.1f} chunks/s)"
+                )
+            progress(message)
+        return rows
 
-            text = record.get(options.text_field)
-            if not isinstance(text, str) or not text.strip():
-                row = _base_row(input_id, 0, STATUS_MISSING_TEXT)
-                row["error"] = f"field {options.text_field!r} missing or empty"
-                if progress:
-                    progress(f"[{line_no}] {input_id}: missing text")
-                yield row
+    async def _rows(group: list[_Work]) -> list[dict[str, Any]]:
+        chunks = [work for work in group if work.rows is None]
+        answers: list[dict[str, Any] | Exception] = []
+        if chunks:
+            state["in_flight"] += len(chunks)
+            try:
+                answers = await _fetch(chunks)
+            finally:
+                state["in_flight"] -= len(chunks)
+                state["sent"] += len(chunks)
+        pending = iter(answers)
+        rows: list[dict[str, Any]] = []
+        for work in group:
+            if work.rows is None:
+                rows.extend(_chunk_rows(work, next(pending)))
                 continue
+            if progress and work.message:
+                progress(work.message)
+            rows.extend(work.rows)
+        return rows
 
-            text = text.strip()
-            chunks: list[str]
-            if len(text) <= options.max_chars:
-                chunks = [text]
-            elif options.on_too_long == "split":
-                chunks = split_text(text, options.max_chars)
-            elif options.on_too_long == "truncate":
-                chunks = [text[: options.max_chars]]
-            else:
-                row = _base_row(input_id, 0, STATUS_INPUT_TOO_LONG)
-                row["error"] = (
-                    f"{len(text)} chars exceeds max_chars={options.max_chars}; "
-                    "use --on-too-long split or truncate"
-                )
-                if progress:
-                    progress(
-                        f"[{line_no}] {input_id}: too long "
-                        f"({len(text)} > {options.max_chars})"
-                    )
+    groups = _groups(_work_items(records, options, resume_rows or {}), batch_size)
+    try:
+        async for rows in ordered_map(_rows, groups, concurrency):
+            for row in rows:
                 yield row
-                continue
-
-            for chunk_index, chunk in enumerate(chunks):
-                try:
-                    pred = await resolve_text(client, server_url, chunk, model)
-                except Exception as exc:  # network / HTTP / decode failures
-                    row = _base_row(input_id, chunk_index, STATUS_SERVER_ERROR)
-                    row["error"] = f"{type(exc).__name__}: {exc}"
-                    if progress:
-                        progress(f"[{line_no}] {input_id}: server error {exc}")
-                    yield row
-                    continue
-                rows = rows_from_pred(input_id, pred, chunk_index, options)
-                if progress:
-                    statuses = ", ".join(sorted({r["status"] for r in rows}))
-                    progress(
-                        f"[{line_no}] {input_id} chunk {chunk_index + 1}/"
-                        f"{len(chunks)} ({len(chunk)} chars): "
-                        f"{len(rows)} row(s) [{statuses}]"
-                    )
-                for row in rows:
-                    yield row
     finally:
         if owns_client:
             await client.aclose()
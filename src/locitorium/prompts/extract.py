@@ -11,16 +11,55 @@ class ExtractOutput(BaseModel):
     mentions: list[ExtractedMention]
 
 
+class ExtractBatchDocument(BaseModel):
+    document: int = Field(..., description="Number of the DOCUMENT block")
+    mentions: list[ExtractedMention]
+
+
+class ExtractBatchOutput(BaseModel):
+    documents: list[ExtractBatchDocument]
+
+
+# Everything before the document text. It never changes between calls,
+# so llama-server (cache_prompt) can reuse its KV cache across documents;
+# keep anything per-call out of it.
+PROMPT_PREFIX = (
+    "Extract location-like mentions from the text. "
+    "Return only likely toponyms (including country names). "
+    "Mentions must appear verbatim in the input text; do not infer or translate. "
+    "Do not add countries unless they are explicitly present in the text. "
+    "Prefer returning administrative areas and venues when present. "
+    "Return JSON only, matching the provided schema.\n\n"
+    "EXAMPLES:\n"
+    "Text: 大会は広島県で開催。会場は広島市の広島国際会議場。\n"
+    "Output: {\"mentions\":[{\"mention\":\"広島県\"},{\"mention\":\"広島市\"},{\"mention\":\"広島国際会議場\"}]}\n\n"
+    "TEXT:\n"
+)
+
+
 def build_prompt(text: str) -> str:
-    return (
-        "Extract location-like mentions from the text. "
-        "Return only likely toponyms (including country names). "
-        "Mentions must appear verbatim in the input text; do not infer or translate. "
-        "Do not add countries unless they are explicitly present in the text. "
-        "Prefer returning administrative areas and venues when present. "
-        "Return JSON only, matching the provided schema.\n\n"
-        "EXAMPLES:\n"
-        "Text: 大会は広島県で開催。会場は広島市の広島国際会議場。\n"
-        "Output: {\"mentions\":[{\"mention\":\"広島県\"},{\"mention\":\"広島市\"},{\"mention\":\"広島国際会議場\"}]}\n\n"
-        f"TEXT:\n{text}"
+    return PROMPT_PREFIX + text
+
+
+BATCH_PROMPT_PREFIX = (
+    "Extract location-like mentions from each of the documents below. "
+    "Return only likely toponyms (including country names). "
+    "Mentions must appear verbatim in their own document; "
+    "do not infer or translate. "
+    "Do not add countries unless they are explicitly present in the document. "
+    "Prefer returning administrative areas and venues when present. "
+    "Return one entry per document, with its number, even if it has no mentions. "
+    "Return JSON only, matching the provided schema.\n\n"
+    "EXAMPLES:\n"
+    "DOCUMENT 1:\n大会は広島県で開催。\n\nDOCUMENT 2:\nNo places here.\n"
+    "Output: {\"documents\":["
+    "{\"document\":1,\"mentions\":[{\"mention\":\"広島県\"}]},"
+    "{\"document\":2,\"mentions\":[]}]}\n\n"
+    "DOCUMENTS:\n"
+)
+
+
+def build_batch_prompt(texts: list[str]) -> str:
+    return BATCH_PROMPT_PREFIX + "\n\n".join(
+        f"DOCUMENT {i}:\n{text}" for i, text in enumerate(texts, start=1)
     )
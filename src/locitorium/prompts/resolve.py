@@ -17,14 +17,33 @@ class ResolveOutput(BaseModel):
     results: list[ResolveResult]
 
 
+# Static prompt heads, see locitorium.prompts.extract.PROMPT_PREFIX.
+PROMPT_PREFIX = (
+    "You are selecting the best candidate for each mention based on context. "
+    "You must return one result for every mention_id in CANDIDATES. "
+    "If none match, choose -1 and status 'rejected'. "
+    "Return JSON only, matching the provided schema.\n\n"
+    "TEXT:\n"
+)
+
+COMPACT_PROMPT_PREFIX = (
+    "You are selecting the best candidate for each mention based on context. "
+    "You must return one result for every mention_id in MENTIONS. "
+    "choice is the position of the chosen id in that mention's list. "
+    "If none match, choose -1 and status 'rejected'. "
+    "Return JSON only, matching the provided schema.\n\n"
+    "TEXT:\n"
+)
+
+
 def build_prompt(text: str, candidates_payload: list[dict]) -> str:
     payload_json = json.dumps(candidates_payload, ensure_ascii=False)
     return (
-        "You are selecting the best candidate for each mention based on context. "
-        "You must return one result for every mention_id in CANDIDATES. "
-        "If none match, choose -1 and status 'rejected'. "
-        "Return JSON only, matching the provided schema.\n\n"
-        f"TEXT:\n{text}\n\n"
+        f"{PROMPT_PREFIX}{text}\n\n"
         "CANDIDATES (index starts at 0):\n"
         f"{payload_json}"
     )
+
+
+def build_compact_prompt(text: str, table: str) -> str:
+    return f"{COMPACT_PROMPT_PREFIX}{text}\n\n{table}"
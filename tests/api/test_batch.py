@@ -0,0 +1,67 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from locitorium.api import app as api
+from locitorium.api import batch
+from locitorium.models.schema import ModelInfo, PredDoc, PredMetrics
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def fake_run_doc(text, doc_id, config, resources):
+        await asyncio.sleep(0.05 if text == "slow" else 0.0)
+        if text == "boom":
+            raise RuntimeError("backend down")
+        return PredDoc(
+            doc_id=doc_id,
+            model_info=ModelInfo(
+                llm_model="m", llm_base_url="u", nominatim_base_url="n", config_hash="h"
+            ),
+            results=[],
+            metrics=PredMetrics(total_s=0.0),
+        )
+
+    monkeypatch.setattr(batch, "run_doc", fake_run_doc)
+    # No lifespan: the backends it would check are not there.
+    api.app.state.resources = None
+    api.app.state.batch_slots = asyncio.Semaphore(4)
+    return TestClient(api.app)
+
+
+def _lines(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_ndjson_batch_streams_each_record_as_it_finishes(client):
+    records = [
+        {"id": "a", "text": "slow"},
+        {"id": "b", "text": "Tokyo"},
+        {"id": "c", "text": "boom"},
+        {"text": ""},
+    ]
+    body = "\n".join(json.dumps(r) for r in records)
+    response = client.post(
+        "/api/batch", content=body, headers={"content-type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = _lines(response)
+    by_id = {line["id"]: line for line in lines}
+    assert set(by_id) == {"a", "b", "c", 3}
+    assert lines[-1]["id"] == "a"  # the slow record finished last
+    assert by_id["b"]["results"] == [] and "doc_id" in by_id["b"]
+    assert by_id["c"]["error"] == "backend down"
+    assert by_id[3]["error"] == "missing text"
+
+
+def test_json_body_and_limits(client, monkeypatch):
+    response = client.post("/api/batch", json={"records": [{"id": 1, "text": "x"}]})
+    assert [line["id"] for line in _lines(response)] == [1]
+
+    assert client.post("/api/batch", content=b"{not json").status_code == 400
+    monkeypatch.setenv("LOCITORIUM_BATCH_MAX_RECORDS", "2")
+    records = [{"id": i, "text": "x"} for i in range(3)]
+    assert client.post("/api/batch", json=records).status_code == 413
@@ -0,0 +1,221 @@
+import asyncio
+import json
+import threading
+
+import httpx
+
+from locitorium.api import app as api
+from locitorium.api import batch
+from locitorium.api.jobs import JobManager, JobStore, job_units
+from locitorium.config import AppConfig
+from locitorium.models.schema import ModelInfo, PredDoc, PredMetrics
+
+
+def _fake_run_doc(calls, release=None):
+    async def run_doc(text, doc_id, config, resources):
+        calls.append(text)
+        if text == "slow":
+            await release.wait()
+        if text == "boom":
+            raise RuntimeError("backend down")
+        return PredDoc(
+            doc_id=doc_id,
+            model_info=ModelInfo(
+                llm_model="m", llm_base_url="u", nominatim_base_url="n", config_hash="h"
+            ),
+            results=[],
+            metrics=PredMetrics(total_s=0.0),
+        )
+
+    return run_doc
+
+
+async def _wait_for(manager, job_id, statuses=("done", "cancelled", "failed")):
+    for _ in range(200):
+        job = await manager.get(job_id)
+        if job["status"] in statuses:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job stuck in {job['status']}")
+
+
+def _manager(store, clock=None, **config):
+    kwargs = {"clock": clock} if clock else {}
+    return JobManager(store, AppConfig(**config), None, asyncio.Semaphore(4), **kwargs)
+
+
+def test_long_texts_are_split_into_chunks():
+    units = job_units([{"id": "a", "text": "Tokyo. " * 10}, {"text": " "}], 30)
+    assert [u["chunk_index"] for u in units if u["id"] == "a"] == [0, 1, 2]
+    assert units[-1] == {"id": 1, "chunk_index": 0, "error": "missing text"}
+
+
+def test_submit_poll_and_stream(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(batch, "run_doc", _fake_run_doc(calls))
+
+    async def run():
+        manager = _manager(JobStore(tmp_path / "jobs.sqlite"))
+        await manager.start()
+        api.app.state.jobs = manager
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+            records = [{"id": "a", "text": "Tokyo"}, {"id": "b", "text": "boom"}]
+            response = await c.post("/api/jobs", json=records)
+            assert response.status_code == 202
+            job = response.json()
+            assert response.headers["location"] == f"/api/jobs/{job['id']}"
+            assert (job["status"], job["total"]) == ("queued", 2)
+
+            streamed = await c.get(f"/api/jobs/{job['id']}", params={"stream": 1})
+            lines = [json.loads(line) for line in streamed.text.splitlines()]
+            assert {line["id"] for line in lines} == {"a", "b"}
+
+            polled = (await c.get(f"/api/jobs/{job['id']}")).json()
+            url = f"/api/jobs/{job['id']}"
+            first = (await c.get(url, params={"limit": 1})).json()
+            params = {"after": first["next_after"], "limit": 1}
+            second = (await c.get(url, params=params)).json()
+            params["after"] = second["next_after"]
+            last = (await c.get(url, params=params)).json()
+            too_many = await c.get(url, params={"limit": 1001})
+            single = await c.post("/api/jobs", json={"text": "Osaka"})
+            missing = await c.get("/api/jobs/nope")
+        await manager.stop()
+        return polled, [first, second, last], too_many, single, missing
+
+    polled, pages, too_many, single, missing = asyncio.run(run())
+    assert (polled["status"], polled["done"], polled["errors"]) == ("done", 2, 1)
+    by_id = {r["id"]: r for r in polled["results"]}
+    assert by_id.keys() == {"a", "b"} and by_id["b"]["error"] == "backend down"
+    assert [page["results"] for page in pages] == [
+        polled["results"][:1],
+        polled["results"][1:],
+        [],
+    ]
+    assert pages[-1]["next_after"] == pages[1]["next_after"]
+    assert too_many.status_code == 422
+    assert single.json()["total"] == 1
+    assert missing.status_code == 404
+
+
+def test_a_job_works_on_at_most_batch_concurrency_chunks(tmp_path, monkeypatch):
+    monkeypatch.setenv("LOCITORIUM_BATCH_CONCURRENCY", "2")
+    running = []
+    peaks = []
+
+    async def run_doc(text, doc_id, config, resources):
+        running.append(text)
+        peaks.append(len(running) + len(asyncio.all_tasks()))
+        await asyncio.sleep(0.001)
+        running.remove(text)
+        return await _fake_run_doc([])(text, doc_id, config, resources)
+
+    monkeypatch.setattr(batch, "run_doc", run_doc)
+
+    async def run():
+        manager = _manager(JobStore(tmp_path / "jobs.sqlite"))
+        await manager.start()
+        records = [{"text": f"place {i}"} for i in range(50)]
+        job = await manager.submit(job_units(records, 2000), {})
+        finished = await _wait_for(manager, job["id"])
+        await manager.stop()
+        return finished
+
+    assert asyncio.run(run())["done"] == 50
+    # Two chunks in flight, plus a handful of manager and pool tasks.
+    assert max(peaks) < 12
+
+
+def test_store_calls_run_off_the_event_loop(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch, "run_doc", _fake_run_doc([]))
+    loop_threads = set()
+    store_threads = set()
+
+    class Store(JobStore):
+        def __getattribute__(self, name):
+            attr = super().__getattribute__(name)
+            if callable(attr) and not name.startswith("_"):
+
+                def call(*args, **kwargs):
+                    store_threads.add(threading.get_ident())
+                    return attr(*args, **kwargs)
+
+                return call
+            return attr
+
+    async def run():
+        loop_threads.add(threading.get_ident())
+        manager = _manager(Store(tmp_path / "jobs.sqlite"))
+        await manager.start()
+        job = await manager.submit(job_units([{"text": "Tokyo"}], 2000), {})
+        finished = await _wait_for(manager, job["id"])
+        streamed = [result async for result in manager.follow(job["id"])]
+        await manager.cancel(job["id"])
+        await manager.stop()
+        return finished, streamed
+
+    finished, streamed = asyncio.run(run())
+    assert finished["done"] == 1 and len(streamed) == 1
+    assert store_threads and not store_threads & loop_threads
+
+
+def test_a_finished_job_is_not_settled_again(tmp_path):
+    store = JobStore(tmp_path / "jobs.sqlite")
+    job = store.create(job_units([{"text": "Tokyo"}], 2000), {}, 0.0)
+    assert store.finish(job["id"], "cancelled", None, 1.0, 60.0)
+    assert not store.start(job["id"], 2.0)
+    assert not store.finish(job["id"], "done", None, 3.0, 60.0)
+    assert store.get(job["id"], 4.0)["status"] == "cancelled"
+
+
+def test_cancel_a_running_job(tmp_path, monkeypatch):
+    calls = []
+
+    async def run():
+        release = asyncio.Event()
+        monkeypatch.setattr(batch, "run_doc", _fake_run_doc(calls, release))
+        manager = _manager(JobStore(tmp_path / "jobs.sqlite"))
+        await manager.start()
+        job = await manager.submit(job_units([{"text": "slow"}], 2000), {})
+        await _wait_for(manager, job["id"], ("running",))
+        await asyncio.sleep(0.01)
+        cancelled = await manager.cancel(job["id"])
+        await asyncio.sleep(0.01)
+        after = await manager.get(job["id"])
+        await manager.stop()
+        return cancelled, after
+
+    cancelled, after = asyncio.run(run())
+    assert cancelled["status"] == "cancelled"
+    assert after["status"] == "cancelled" and after["done"] == 0
+
+
+def test_unfinished_jobs_resume_after_restart_and_expire(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(batch, "run_doc", _fake_run_doc(calls))
+    now = [1000.0]
+    path = tmp_path / "jobs.sqlite"
+
+    # A previous process finished one chunk of two before it went away.
+    store = JobStore(path)
+    records = [{"id": "a", "text": "Tokyo"}, {"id": "b", "text": "Osaka"}]
+    units = job_units(records, 2000)
+    job = store.create(units, {}, now[0])
+    store.update(job["id"], status="running", started_at=now[0])
+    store.add_result(job["id"], 0, {"id": "a", "chunk_index": 0, "results": []})
+    store.close()
+
+    async def run():
+        manager = _manager(JobStore(path), clock=lambda: now[0], jobs_ttl_s=60)
+        await manager.start()
+        finished = await _wait_for(manager, job["id"])
+        now[0] += 61
+        expired = await manager.get(job["id"])
+        await manager.stop()
+        return finished, expired
+
+    finished, expired = asyncio.run(run())
+    assert calls == ["Osaka"]
+    assert (finished["status"], finished["done"]) == ("done", 2)
+    assert expired is None
@@ -0,0 +1,105 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from locitorium.api import app as api
+from locitorium.clients.llm import LlmClient
+from locitorium.config import AppConfig
+from locitorium.models.schema import Candidate
+from locitorium.pipeline.resources import PipelineResources
+
+
+class StreamingLlm(LlmClient):
+    def __init__(self):
+        super().__init__("http://llm/v1", "m")
+
+    async def generate(self, prompt, schema, tag="", use_cache=None, listener=None):
+        if tag.endswith("_resolve"):
+            return {"results": []}
+        if listener is not None:
+            listener.reset()
+            for piece in ['{"mentions":[', '{"mention":"Tokyo"}', "]}"]:
+                listener.feed(piece)
+        return {"mentions": [{"mention": "Tokyo"}]}
+
+
+class Source:
+    def __init__(self, fail=False):
+        self.fail = fail
+
+    async def search(self, query):
+        if self.fail:
+            raise RuntimeError("backend down")
+        return [
+            Candidate(
+                rank=1,
+                osm_type="relation",
+                osm_id=1,
+                display_name=query,
+                lat="35.6",
+                lon="139.7",
+                bbox=[],
+                country_code="jp",
+            )
+        ]
+
+
+@pytest.fixture
+def resources():
+    async def open_resources():
+        owned = PipelineResources(AppConfig())
+        await owned.__aenter__()
+        owned.llm_client = lambda _config, stage=None: StreamingLlm()
+        return owned
+
+    owned = asyncio.run(open_resources())
+    # No lifespan: the backends it would check are not there.
+    api.app.state.resources = owned
+    yield owned
+    asyncio.run(owned.__aexit__(None, None, None))
+
+
+def _events(response):
+    events = []
+    for block in response.text.split("\n\n"):
+        if block.strip():
+            event, data = block.split("\n")
+            events.append((event.removeprefix("event: "), json.loads(data[6:])))
+    return events
+
+
+def test_events_follow_the_pipeline(resources, monkeypatch):
+    monkeypatch.setenv("LOCITORIUM_EXTRACT_STREAM", "1")
+    resources.candidates = Source()
+    response = TestClient(api.app).get("/api/stream", params={"q": "Tokyo"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _events(response)
+    assert [name for name, _ in events] == [
+        "mention",
+        "mentions",
+        "candidates",
+        "result",
+    ]
+    assert events[0][1] == {"mention": "Tokyo"}
+    mention_id = events[1][1]["mentions"][0]["mention_id"]
+    assert events[2][1]["mention_id"] == mention_id
+    assert events[2][1]["candidates"][0]["display_name"] == "Tokyo"
+    result = events[-1][1]
+    assert result["results"][0]["mention_id"] == mention_id
+    assert result["metrics"]["total_s"] >= 0
+
+
+def test_failed_search_still_ends_with_a_result(resources):
+    resources.candidates = Source(fail=True)
+    client = TestClient(api.app)
+    events = _events(client.get("/api/stream", params={"q": "Tokyo"}))
+    # Without extract_stream there is no early mention event; a failing
+    # search settles the document as invalid_output.
+    assert [name for name, _ in events] == ["mentions", "result"]
+    assert events[-1][1]["results"][0]["status"] == "invalid_output"
+
+    response = client.get("/api/stream", params={"q": "x" * 2001})
+    assert response.status_code == 400
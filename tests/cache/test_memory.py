@@ -0,0 +1,49 @@
+import pytest
+
+from locitorium.cache.memory import MemoryCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_hit_miss_and_lru_eviction_by_entries():
+    cache = MemoryCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # a becomes most recently used
+    assert cache.set("c", 3) == 1  # evicts b
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert cache.stats.hits == 2
+    assert cache.stats.misses == 1
+    assert cache.stats.evictions == 1
+
+
+def test_evicts_by_total_size():
+    cache = MemoryCache(max_entries=None, max_bytes=100)
+    cache.set("a", "x", size=60)
+    cache.set("b", "y", size=60)
+    assert len(cache) == 1
+    assert cache.get("a") is None
+    assert cache.total_bytes == 60
+
+
+def test_per_entry_ttl_expires_entries():
+    clock = FakeClock()
+    cache = MemoryCache(ttl_s=100, clock=clock)
+    cache.set("long", [1])
+    cache.set("short", [], ttl_s=10)
+    clock.now = 50
+    assert cache.get("short") is None
+    assert cache.get("long") == [1]
+    assert cache.stats.expirations == 1
+
+
+def test_none_cannot_be_cached():
+    with pytest.raises(ValueError):
+        MemoryCache().set("a", None)
@@ -0,0 +1,160 @@
+import asyncio
+import json
+import sqlite3
+import threading
+
+from typer.testing import CliRunner
+
+from locitorium.cache.memory import MemoryCache
+from locitorium.cache.sqlite import SqliteCache
+from locitorium.cache.tiered import TieredCache
+from locitorium.cli import app
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_are_shared_between_connections(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    writer = SqliteCache(path, namespace="nominatim")
+    reader = SqliteCache(path, namespace="nominatim")
+    other = SqliteCache(path, namespace="llm")
+
+    writer.set("1:tokyo", [{"osm_id": 1}])
+
+    assert reader.get("1:tokyo") == [{"osm_id": 1}]
+    assert other.get("1:tokyo") is None
+    assert reader.stats.hits == 1
+
+
+def test_expired_entries_are_misses(tmp_path):
+    clock = FakeClock()
+    cache = SqliteCache(tmp_path / "c.sqlite", namespace="n", ttl_s=60, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl_s=3600)
+    clock.now += 120
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert cache.stats.expirations == 1
+
+
+def test_prune_keeps_most_recently_accessed(tmp_path):
+    clock = FakeClock()
+    cache = SqliteCache(
+        tmp_path / "c.sqlite", namespace="n", touch_interval_s=0, clock=clock
+    )
+    for key in ("a", "b", "c"):
+        clock.now += 1
+        cache.set(key, key)
+    clock.now += 1
+    cache.get("a")
+
+    result = cache.prune(max_entries=2)
+
+    assert result == {"expired": 0, "evicted": 1}
+    assert cache.get("b") is None
+    assert cache.get("a") == "a"
+    assert cache.get("c") == "c"
+
+
+def test_tiered_cache_promotes_disk_hits_to_memory(tmp_path):
+    disk = SqliteCache(tmp_path / "c.sqlite", namespace="n")
+    disk.set("k", [1, 2])
+    memory = MemoryCache()
+    cache = TieredCache(memory, disk)
+
+    assert cache.get("k") == [1, 2]
+    assert memory.get("k") == [1, 2]
+    assert cache.stats.hits == 1
+
+
+def test_promoted_entries_keep_their_remaining_ttl(tmp_path):
+    clock = FakeClock()
+    disk = SqliteCache(tmp_path / "c.sqlite", namespace="n", ttl_s=86_400, clock=clock)
+    disk.set("empty", [], ttl_s=3600)
+    clock.now += 600
+    memory = MemoryCache(ttl_s=86_400, clock=clock)
+    cache = TieredCache(memory, disk)
+
+    assert cache.get("empty") == []
+    assert memory.lookup("empty") == ([], 3000)
+    clock.now += 3000
+    assert memory.get("empty") is None
+
+
+def test_undecodable_entries_and_failed_prunes_do_not_raise(tmp_path):
+    def decode(text):
+        raise ValueError("not a cached value")
+
+    cache = SqliteCache(tmp_path / "c.sqlite", namespace="n", decode=decode)
+    cache.set("k", [1])
+    assert cache.get("k") is None
+    assert cache.stats.misses == 1
+
+    cache = SqliteCache(tmp_path / "c.sqlite", namespace="n", prune_every=1)
+
+    def locked(*args, **kwargs):
+        raise sqlite3.OperationalError("database is locked")
+
+    cache.prune = locked
+    assert cache.set("k", [2]) == 0
+    assert cache.get("k") == [2]
+
+
+def test_async_access_runs_off_the_event_loop_and_prunes_in_background(tmp_path):
+    clock = FakeClock()
+    disk = SqliteCache(
+        tmp_path / "c.sqlite", namespace="n", max_entries=2, prune_every=3, clock=clock
+    )
+    threads = set()
+    store = disk._store
+
+    def recording_store(*args):
+        threads.add(threading.get_ident())
+        return store(*args)
+
+    disk._store = recording_store
+    memory = MemoryCache(clock=clock)
+    cache = TieredCache(memory, disk)
+
+    async def run():
+        for key in ("a", "b", "c"):
+            clock.now += 1
+            await cache.aset(key, key, ttl_s=60)
+        await disk._pruning
+        memory.clear()
+        return await cache.aget("c"), await cache.aget("a")
+
+    assert asyncio.run(run()) == ("c", None)
+    assert threading.get_ident() not in threads
+    assert disk.stats.evictions == 1
+    assert memory.lookup("c") == ("c", 60)
+
+
+def test_cache_cli_stats_prune_and_export(tmp_path):
+    path = tmp_path / "c.sqlite"
+    cache = SqliteCache(path, namespace="nominatim")
+    cache.set("1:tokyo", [{"osm_id": 1}])
+    cache.set("1:osaka", [{"osm_id": 2}])
+    cache.close()
+    runner = CliRunner()
+
+    result = runner.invoke(app, ["cache", "stats", "--path", str(path)])
+    assert result.exit_code == 0
+    assert "nominatim: entries=2" in result.stdout
+
+    result = runner.invoke(app, ["cache", "export", "--path", str(path)])
+    rows = [json.loads(line) for line in result.stdout.splitlines()]
+    assert [row["key"] for row in rows] == ["1:osaka", "1:tokyo"]
+    assert rows[1]["value"] == [{"osm_id": 1}]
+
+    result = runner.invoke(
+        app, ["cache", "prune", "--path", str(path), "--max-entries", "1"]
+    )
+    assert result.exit_code == 0
+    assert "evicted: 1" in result.stdout
@@ -0,0 +1,230 @@
+import asyncio
+
+import pytest
+
+from locitorium import counters
+from locitorium.clients.concurrency import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight(counter="collapsed")
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return ["Tokyo"]
+
+    async def _run():
+        with counters.collect() as doc_counters:
+            results = await asyncio.gather(*(flight.do("k", fetch) for _ in range(5)))
+        return results, doc_counters
+
+    results, doc_counters = asyncio.run(_run())
+    assert calls == [1]
+    assert all(r == ["Tokyo"] for r in results)
+    assert flight.collapsed == 4
+    assert doc_counters == {"collapsed": 4}
+    assert len(flight) == 0
+
+
+def test_errors_reach_every_waiter():
+    flight = SingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    async def _run():
+        return await asyncio.gather(
+            *(flight.do("k", fetch) for _ in range(3)), return_exceptions=True
+        )
+
+    results = asyncio.run(_run())
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_cancelled_waiter_does_not_cancel_the_others():
+    flight = SingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.05)
+        return 42
+
+    async def _run():
+        first = asyncio.ensure_future(flight.do("k", fetch))
+        second = asyncio.ensure_future(flight.do("k", fetch))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(_run()) == 42
+
+
+def test_call_is_cancelled_when_every_waiter_leaves():
+    flight = SingleFlight()
+    state = {"cancelled": False}
+
+    async def fetch():
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            state["cancelled"] = True
+            raise
+
+    async def _run():
+        waiter = asyncio.ensure_future(flight.do("k", fetch))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.sleep(0.01)
+
+    asyncio.run(_run())
+    assert state["cancelled"] is True
+    assert len(flight) == 0
+
+
+def test_caller_after_the_last_waiter_left_starts_a_new_call():
+    flight = SingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(1)
+        return 1
+
+    async def fetch_again():
+        return 2
+
+    async def _run():
+        waiter = asyncio.ensure_future(flight.do("k", fetch))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        # The waiter has left and cancelled the call, which has not
+        # unwound yet.
+        await asyncio.sleep(0)
+        return await flight.do("k", fetch_again)
+
+    assert asyncio.run(_run()) == 2
+    assert len(flight) == 0
+
+
+def test_rate_limiter_caps_in_flight_calls():
+    from locitorium.clients.concurrency import RateLimiter
+
+    limiter = RateLimiter(max_in_flight=2)
+    state = {"active": 0, "peak": 0}
+
+    async def call():
+        async with limiter:
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+            await asyncio.sleep(0.01)
+            state["active"] -= 1
+
+    async def _run():
+        await asyncio.gather(*(call() for _ in range(6)))
+
+    asyncio.run(_run())
+    assert state["peak"] == 2
+    assert limiter.stats.admitted == 6
+    assert limiter.in_flight == 0
+
+
+def test_rate_limiter_spaces_calls_by_token_rate():
+    from locitorium.clients.concurrency import RateLimiter
+
+    limiter = RateLimiter(rate_per_s=100, burst=1, counter_prefix="n")
+
+    async def _run():
+        with counters.collect() as doc_counters:
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            for _ in range(4):
+                async with limiter:
+                    pass
+            return loop.time() - start, doc_counters
+
+    elapsed, doc_counters = asyncio.run(_run())
+    assert elapsed >= 0.025
+    assert doc_counters["n_queue_s"] > 0
+
+
+def test_rate_limiter_fails_fast_past_max_wait():
+    from locitorium.clients.concurrency import LimiterTimeout, RateLimiter
+
+    limiter = RateLimiter(max_in_flight=1, max_wait_s=0.01, counter_prefix="n")
+
+    async def _run():
+        await limiter.acquire()
+        with counters.collect() as doc_counters:
+            with pytest.raises(LimiterTimeout):
+                await limiter.acquire()
+        limiter.release()
+        return doc_counters
+
+    assert asyncio.run(_run()) == {"n_rejected": 1}
+    assert limiter.stats.rejected == 1
+
+
+def test_rate_limiter_rejects_waits_beyond_the_token_budget():
+    from locitorium.clients.concurrency import LimiterTimeout, RateLimiter
+
+    limiter = RateLimiter(rate_per_s=1, burst=1, max_wait_s=0.1)
+
+    async def _run():
+        await limiter.acquire()
+        limiter.release()
+        with pytest.raises(LimiterTimeout):
+            await limiter.acquire()
+
+    asyncio.run(_run())
+
+
+def test_adaptive_limit_grows_while_fast_and_halves_on_failure():
+    from locitorium.clients.concurrency import AdaptiveLimit
+
+    adaptive = AdaptiveLimit(initial=4, min_limit=1, max_limit=8)
+    for _ in range(40):
+        adaptive.on_success(0.01)
+    assert adaptive.limit == 8
+
+    adaptive.on_failure(started_at=float("inf"))
+    assert adaptive.limit == 4
+    # Calls sent before the cut do not cut again.
+    adaptive.on_failure(started_at=0.0)
+    assert adaptive.limit == 4
+    assert adaptive.cuts == 1
+
+
+def test_adaptive_limit_holds_when_latency_rises():
+    from locitorium.clients.concurrency import AdaptiveLimit
+
+    adaptive = AdaptiveLimit(initial=4, max_limit=8, tolerance=2.0)
+    adaptive.on_success(0.01)
+    before = adaptive._limit
+    for _ in range(20):
+        adaptive.on_success(0.5)
+    assert adaptive._limit == before
+
+
+def test_rate_limiter_admits_more_when_adaptive_limit_grows():
+    from locitorium.clients.concurrency import AdaptiveLimit, RateLimiter
+
+    adaptive = AdaptiveLimit(initial=1, max_limit=3)
+    limiter = RateLimiter(adaptive=adaptive, counter_prefix="n")
+
+    async def _run():
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+        for _ in range(5):
+            limiter.on_success(0.01)
+        await asyncio.sleep(0)
+        assert waiter.done()
+        assert limiter.in_flight == 2
+        with counters.collect() as doc_counters:
+            await limiter.acquire()
+        assert doc_counters["n_concurrency_limit"] == limiter.limit
+
+    asyncio.run(_run())
@@ -119,3 +119,219 @@ class TestLlmClientGenerate:
         client = LlmClient("http://llama:8080/v1", "gvt-llm", api_key="secret")
         asyncio.run(client.generate("prompt", {}))
         assert stub.last_payload is not None  # request reached the stub
+
+
+class ClosableStub(StubAsyncClient):
+    def __init__(self, response_json):
+        super().__init__(response_json)
+        self.posts = 0
+        self.closed = False
+
+    async def post(self, url, *, json=None, headers=None):
+        self.posts += 1
+        return await super().post(url, json=json, headers=headers)
+
+    async def aclose(self):
+        self.closed = True
+
+
+class TestLlmClientPooling:
+    def test_shared_http_client_is_reused_and_not_closed(self, monkeypatch):
+        created = []
+        monkeypatch.setattr(
+            "httpx.AsyncClient", lambda **kw: created.append(kw) or None
+        )
+        shared = ClosableStub(_openai_resp('{"k": "v"}'))
+        client = LlmClient("http://llama:8080/v1", "gvt-llm", http_client=shared)
+
+        async def _run():
+            await client.generate("a", {})
+            await client.generate("b", {})
+            await client.aclose()
+
+        asyncio.run(_run())
+        assert shared.posts == 2
+        assert shared.closed is False
+        assert created == []
+
+    def test_owned_http_client_is_created_once_and_closed(self, monkeypatch):
+        stubs = []
+
+        def factory(**kw):
+            stubs.append(ClosableStub(_openai_resp('{"k": "v"}')))
+            return stubs[-1]
+
+        monkeypatch.setattr("httpx.AsyncClient", factory)
+        client = LlmClient("http://llama:8080/v1", "gvt-llm")
+
+        async def _run():
+            await client.generate("a", {})
+            await client.generate("b", {})
+            await client.aclose()
+
+        asyncio.run(_run())
+        assert len(stubs) == 1
+        assert stubs[0].posts == 2
+        assert stubs[0].closed is True
+
+
+class TestLlmClientCache:
+    def _client(self, stub, **kwargs):
+        from locitorium.cache.memory import MemoryCache
+
+        return LlmClient(
+            "http://llama:8080/v1",
+            "gvt-llm",
+            http_client=stub,
+            cache=MemoryCache(),
+            **kwargs,
+        )
+
+    def test_identical_calls_are_served_from_cache(self):
+        from locitorium import counters
+
+        stub = ClosableStub(_openai_resp('{"mentions": []}'))
+        client = self._client(stub)
+
+        async def _run():
+            with counters.collect() as doc_counters:
+                first = await client.generate("prompt", {"type": "object"})
+                first["mentions"].append("mutated by caller")
+                second = await client.generate("prompt", {"type": "object"})
+            return second, doc_counters
+
+        second, doc_counters = asyncio.run(_run())
+        assert stub.posts == 1
+        assert second == {"mentions": []}
+        assert doc_counters == {"llm_cache_misses": 1, "llm_cache_hits": 1}
+
+    def test_key_covers_prompt_schema_and_thinking(self):
+        from locitorium.clients.llm import response_cache_key
+
+        base = response_cache_key("m", "p", {"type": "object"}, False)
+        assert base != response_cache_key("m2", "p", {"type": "object"}, False)
+        assert base != response_cache_key("m", "p2", {"type": "object"}, False)
+        assert base != response_cache_key("m", "p", {"type": "array"}, False)
+        assert base != response_cache_key("m", "p", {"type": "object"}, True)
+
+    def test_bypass_skips_lookup_but_refreshes_entry(self):
+        stub = ClosableStub(_openai_resp('{"k": "v"}'))
+        client = self._client(stub)
+
+        async def _run():
+            await client.generate("prompt", {})
+            await client.generate("prompt", {}, use_cache=False)
+            await client.generate("prompt", {})
+
+        asyncio.run(_run())
+        assert stub.posts == 2
+
+
+class _Collector:
+    def __init__(self):
+        self.resets = 0
+        self.deltas = []
+
+    def reset(self):
+        self.resets += 1
+
+    def feed(self, delta):
+        self.deltas.append(delta)
+
+
+class TestLlmClientStreaming:
+    def _client(self, handler):
+        import httpx
+
+        http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        return LlmClient("http://llama:8080/v1", "gvt-llm", http_client=http)
+
+    def test_feeds_sse_deltas_and_returns_parsed_object(self):
+        import httpx
+
+        pieces = ['{"mentions": [', '{"mention": "Tokyo"}', "]}"]
+        seen = {}
+
+        def handler(request):
+            seen["payload"] = json.loads(request.content)
+            lines = [
+                "data: " + json.dumps({"choices": [{"delta": {"content": p}}]})
+                for p in pieces
+            ]
+            body = "\n\n".join(lines + ["data: [DONE]"]) + "\n\n"
+            return httpx.Response(
+                200, text=body, headers={"content-type": "text/event-stream"}
+            )
+
+        collector = _Collector()
+        client = self._client(handler)
+        out = asyncio.run(
+            client.generate("prompt", {"type": "object"}, listener=collector)
+        )
+        assert out == {"mentions": [{"mention": "Tokyo"}]}
+        assert seen["payload"]["stream"] is True
+        assert collector.resets == 1
+        assert collector.deltas == pieces
+
+    def test_plain_json_answer_to_stream_request(self):
+        import httpx
+
+        def handler(request):
+            return httpx.Response(200, json=_openai_resp('{"k": "v"}'))
+
+        collector = _Collector()
+        client = self._client(handler)
+        out = asyncio.run(
+            client.generate("prompt", {"type": "object"}, listener=collector)
+        )
+        assert out == {"k": "v"}
+        assert collector.deltas == []
+
+
+def test_count_tokens_uses_llama_server_tokenize_endpoint():
+    import httpx
+
+    seen = {}
+
+    def handler(request):
+        seen["url"] = str(request.url)
+        seen["body"] = json.loads(request.content)
+        return httpx.Response(200, json={"tokens": [1, 2, 3]})
+
+    http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    client = LlmClient("http://llama:8080/v1", "gvt-llm", http_client=http)
+    assert asyncio.run(client.count_tokens("東京")) == 3
+    assert seen["url"] == "http://llama:8080/tokenize"
+    assert seen["body"] == {"content": "東京"}
+
+
+def test_cache_prompt_and_slot_hints():
+    import itertools
+
+    import httpx
+
+    payloads = []
+
+    def handler(request):
+        payloads.append(json.loads(request.content))
+        return httpx.Response(200, json=_openai_resp('{"k": "v"}'))
+
+    http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    client = LlmClient(
+        "http://llama:8080/v1",
+        "gvt-llm",
+        http_client=http,
+        cache_prompt=True,
+        id_slots=itertools.cycle([2, 3]),
+    )
+
+    async def run():
+        await client.generate("a", {"type": "object"})
+        await client.generate("b", {"type": "object"})
+        await client.warm_up("prefix", slot=0)
+
+    asyncio.run(run())
+    assert [p["id_slot"] for p in payloads] == [2, 3, 0]
+    assert all(p["cache_prompt"] is True for p in payloads)
+    assert payloads[2]["max_tokens"] == 1
+    assert payloads[2]["messages"][0]["content"] == "prefix"
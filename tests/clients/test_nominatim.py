@@ -60,3 +60,169 @@ def test_nominatim_search_params(monkeypatch):
     assert capture["params"]["addressdetails"] == 1
     assert capture["params"]["limit"] == 5
     assert results[0].country_code == "JP"
+
+
+def test_nominatim_client_keeps_one_pool_until_closed(monkeypatch):
+    capture = {}
+    created = []
+
+    class ClosableStub(StubAsyncClient):
+        closed = False
+
+        async def aclose(self):
+            self.closed = True
+
+    def stub_client(*args, **kwargs):
+        created.append(kwargs)
+        return ClosableStub([], capture)
+
+    monkeypatch.setattr("httpx.AsyncClient", stub_client)
+    client = NominatimClient(
+        "https://nominatim.yuiseki.net", max_connections=7, max_keepalive_connections=3
+    )
+
+    async def _run():
+        await client.search("Tokyo")
+        await client.search("Osaka")
+        http = client._http
+        await client.aclose()
+        return http
+
+    http = asyncio.run(_run())
+    assert len(created) == 1
+    assert created[0]["limits"].max_connections == 7
+    assert created[0]["limits"].max_keepalive_connections == 3
+    assert http.closed is True
+    assert client._http is None
+
+
+def test_nominatim_cache_serves_normalized_repeats(monkeypatch):
+    from locitorium import counters
+    from locitorium.cache.memory import MemoryCache
+
+    queries = []
+
+    class CountingStub(StubAsyncClient):
+        async def get(self, url, params=None):
+            queries.append(params["q"])
+            return await super().get(url, params=params)
+
+    response = [
+        {
+            "osm_type": "relation",
+            "osm_id": 1,
+            "display_name": "Tokyo",
+            "lat": "35",
+            "lon": "139",
+            "address": {"country_code": "jp"},
+        }
+    ]
+    monkeypatch.setattr(
+        "httpx.AsyncClient", lambda *a, **kw: CountingStub(response, {})
+    )
+    client = NominatimClient("https://nominatim.yuiseki.net", cache=MemoryCache())
+
+    async def _run():
+        with counters.collect() as doc_counters:
+            first = await client.search("Tokyo")
+            second = await client.search("  ＴＯＫＹＯ ")
+        return first, second, doc_counters
+
+    first, second, doc_counters = asyncio.run(_run())
+    assert queries == ["Tokyo"]
+    assert second[0].osm_id == first[0].osm_id
+    assert doc_counters == {"nominatim_cache_misses": 1, "nominatim_cache_hits": 1}
+
+
+def test_nominatim_cache_keeps_empty_results_negatively(monkeypatch):
+    from locitorium.cache.memory import MemoryCache
+
+    queries = []
+
+    class CountingStub(StubAsyncClient):
+        async def get(self, url, params=None):
+            queries.append(params["q"])
+            return await super().get(url, params=params)
+
+    monkeypatch.setattr("httpx.AsyncClient", lambda *a, **kw: CountingStub([], {}))
+    cache = MemoryCache()
+    client = NominatimClient(
+        "https://nominatim.yuiseki.net", cache=cache, negative_ttl_s=60
+    )
+
+    async def _run():
+        await client.search("Alex Pretti")
+        return await client.search("Alex Pretti")
+
+    assert asyncio.run(_run()) == []
+    assert queries == ["Alex Pretti"]
+
+
+def test_concurrent_identical_searches_share_one_request(monkeypatch):
+    queries = []
+
+    class SlowStub(StubAsyncClient):
+        async def get(self, url, params=None):
+            queries.append(params["q"])
+            await asyncio.sleep(0.01)
+            return await super().get(url, params=params)
+
+    monkeypatch.setattr("httpx.AsyncClient", lambda *a, **kw: SlowStub([], {}))
+    client = NominatimClient("https://nominatim.yuiseki.net")
+
+    async def _run():
+        return await asyncio.gather(
+            client.search("Tokyo"), client.search("tokyo"), client.search("Osaka")
+        )
+
+    asyncio.run(_run())
+    assert sorted(queries) == ["Osaka", "Tokyo"]
+    assert client.single_flight.collapsed == 1
+
+
+def test_saturated_limiter_raises_overloaded_without_retrying(monkeypatch):
+    import pytest
+
+    from locitorium.clients.concurrency import RateLimiter
+    from locitorium.clients.nominatim import NominatimOverloadedError
+
+    monkeypatch.setattr(
+        "httpx.AsyncClient", lambda *a, **kw: StubAsyncClient([], {})
+    )
+    limiter = RateLimiter(max_in_flight=1, max_wait_s=0.01)
+    client = NominatimClient("https://nominatim.yuiseki.net", limiter=limiter)
+
+    async def _run():
+        await limiter.acquire()
+        with pytest.raises(NominatimOverloadedError):
+            await client.search("Tokyo")
+
+    asyncio.run(_run())
+    assert limiter.stats.rejected == 1
+
+
+def test_server_errors_cut_the_adaptive_limit(monkeypatch):
+    import pytest
+    from tenacity import RetryError
+
+    from locitorium.clients.concurrency import AdaptiveLimit, RateLimiter
+
+    class FailingClient(StubAsyncClient):
+        async def get(self, url, params=None):
+            resp = await super().get(url, params=params)
+            resp.status_code = 503
+            return resp
+
+    monkeypatch.setattr(
+        "httpx.AsyncClient", lambda *a, **kw: FailingClient([], {})
+    )
+    adaptive = AdaptiveLimit(initial=8, max_limit=8)
+    client = NominatimClient(
+        "https://nominatim.yuiseki.net", limiter=RateLimiter(adaptive=adaptive)
+    )
+
+    with pytest.raises(RetryError):
+        asyncio.run(client.search("Tokyo"))
+    # The retries were sent after the first cut, so they cut again.
+    assert adaptive.limit == 1
+    assert adaptive.cuts == 3
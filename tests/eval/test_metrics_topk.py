@@ -68,3 +68,67 @@ def test_topk_metrics_basic():
     metrics = topk_accuracy(gold, preds, 3)
     assert metrics["top1"] == 1.0
     assert metrics["topk"] == 1.0
+
+
+def _pred_doc(country, resolved_by, resolve_s, counters=None):
+    return PredDoc.model_validate(
+        {
+            "doc_id": "d1",
+            "model_info": {
+                "llm_model": "m",
+                "llm_base_url": "http://llm/v1",
+                "nominatim_base_url": "https://example.com",
+                "config_hash": "abc",
+            },
+            "results": [
+                {
+                    "mention_id": "d1:0",
+                    "mention": "Georgia",
+                    "status": "resolved",
+                    "resolved_by": resolved_by,
+                    "selected": {
+                        "osm_type": "relation",
+                        "osm_id": 1,
+                        "lat": "0",
+                        "lon": "0",
+                        "bbox": [],
+                        "display_name": "Georgia",
+                        "country_code": country,
+                        "confidence": None,
+                    },
+                }
+            ],
+            "metrics": {
+                "total_s": resolve_s + 1.0,
+                "resolve_s": resolve_s,
+                "counters": counters or {},
+            },
+        }
+    )
+
+
+def test_fast_path_report_counts_lost_mentions_and_time_saved():
+    from locitorium.eval.metrics import fast_path_report
+
+    gold = [
+        GoldDoc.model_validate(
+            {
+                "doc_id": "d1",
+                "text": "Georgia",
+                "mentions": [
+                    {"mention_id": "d1:0", "mention": "Georgia", "iso_country": "GE"}
+                ],
+            }
+        )
+    ]
+    baseline = [_pred_doc("GE", "llm", 2.0)]
+    fast = [_pred_doc("US", "fast_path", 0.0, {"resolve_llm_skipped": 1})]
+
+    report = fast_path_report(gold, baseline, fast)
+    assert report["fast_path_mentions"] == 1
+    assert report["fast_path_lost"] == 1
+    assert report["fast_path_gained"] == 0
+    assert report["top1_delta"] == -1.0
+    assert report["resolve_s_saved"] == 2.0
+    assert report["total_s_saved"] == 2.0
+    assert report["resolve_llm_skipped_docs"] == 1
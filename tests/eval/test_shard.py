@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+from locitorium.config import AppConfig
+from locitorium.eval import shard
+from locitorium.eval.io import read_jsonl, write_jsonl
+
+
+def _fake_run(tmp_path):
+    """Stands in for run_dataset_stream in the (forked) shard processes."""
+
+    async def fake_run_dataset_stream(docs, config, output_path, concurrency, append):
+        with open(output_path, "a" if append else "w", encoding="utf-8") as f:
+            for doc in docs:
+                if doc["doc_id"] == "d7" and (tmp_path / "fail").exists():
+                    raise RuntimeError("backend down")
+                with (tmp_path / "calls.log").open("a") as log:
+                    log.write(doc["doc_id"] + "\n")
+                row = {"doc_id": doc["doc_id"], "results": [{"status": "resolved"}]}
+                f.write(json.dumps(row) + "\n")
+        return {}
+
+    return fake_run_dataset_stream
+
+
+def _dataset(tmp_path, n=20):
+    path = tmp_path / "dataset.jsonl"
+    write_jsonl(path, [{"doc_id": f"d{i}", "text": "t"} for i in range(n)])
+    return path
+
+
+def test_shard_of_is_stable_and_spreads_ids():
+    shards = [shard.shard_of(f"d{i}", 4) for i in range(200)]
+    assert shards == [shard.shard_of(f"d{i}", 4) for i in range(200)]
+    assert set(shards) == {0, 1, 2, 3}
+
+
+def test_completed_rows_drops_a_torn_last_line(tmp_path):
+    path = tmp_path / "shard.jsonl"
+    path.write_text('{"doc_id": "a"}\n{"doc_id": "b"}\n{"doc_', encoding="utf-8")
+    assert shard.completed_rows(path) == 2
+    assert path.read_text(encoding="utf-8").endswith("}\n")
+
+
+def test_shards_merge_in_input_order(monkeypatch, tmp_path):
+    monkeypatch.setattr(shard, "run_dataset_stream", _fake_run(tmp_path))
+    dataset = _dataset(tmp_path)
+    out = tmp_path / "predictions.jsonl"
+    summary = shard.run_sharded(dataset, out, AppConfig(), workers=3)
+    assert [row["doc_id"] for row in read_jsonl(out)] == [f"d{i}" for i in range(20)]
+    assert summary == {"docs": 20, "resolved": 20}
+    assert not shard.shard_dir(out).exists()
+
+
+def test_failed_shard_resumes_where_it_stopped(monkeypatch, tmp_path):
+    monkeypatch.setattr(shard, "run_dataset_stream", _fake_run(tmp_path))
+    dataset = _dataset(tmp_path)
+    out = tmp_path / "predictions.jsonl"
+    (tmp_path / "fail").touch()
+    with pytest.raises(shard.ShardError) as excinfo:
+        shard.run_sharded(dataset, out, AppConfig(), workers=3)
+    assert list(excinfo.value.failures) == [shard.shard_of("d7", 3)]
+    assert not out.exists()
+
+    (tmp_path / "fail").unlink()
+    shard.run_sharded(dataset, out, AppConfig(), workers=3)
+    assert [row["doc_id"] for row in read_jsonl(out)] == [f"d{i}" for i in range(20)]
+    calls = (tmp_path / "calls.log").read_text().split()
+    # Nothing was computed twice: the failed shard resumed at d7.
+    assert sorted(calls) == sorted(f"d{i}" for i in range(20))
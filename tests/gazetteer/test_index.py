@@ -0,0 +1,102 @@
+import asyncio
+import json
+
+from typer.testing import CliRunner
+
+from locitorium.cli import app
+from locitorium.clients.gazetteer import GazetteerClient
+from locitorium.gazetteer.index import GazetteerIndex, Place, build_index
+from locitorium.gazetteer.sources import read_geonames
+
+TSV = (
+    "name\talternate_names\tosm_type\tosm_id\tlat\tlon\tcountry_code\t"
+    "place_rank\timportance\n"
+    "Tokyo\t東京,Tōkyō\trelation\t1543125\t35.68\t139.76\tjp\t8\t0.82\n"
+    "Tokyo\t\tnode\t99\t36.0\t-95.0\tus\t20\t0.1\n"
+    "Osaka\t大阪\trelation\t358674\t34.69\t135.50\tjp\t8\t0.7\n"
+)
+
+
+def _place(name, osm_id, importance, place_rank=16):
+    return Place(
+        names=[name],
+        osm_type="relation",
+        osm_id=osm_id,
+        display_name=name,
+        lat="0",
+        lon="0",
+        place_rank=place_rank,
+        importance=importance,
+    )
+
+
+def test_lookup_ranks_by_importance_then_place_rank(tmp_path):
+    path = tmp_path / "g.idx"
+    stats = build_index(
+        [
+            _place("Springfield", 1, 0.2),
+            _place("Springfield", 2, 0.6),
+            _place("Springfield", 3, 0.6, place_rank=8),
+            _place("Shelbyville", 4, 0.5),
+        ],
+        path,
+    )
+    assert stats["records"] == 4 and stats["names"] == 2
+
+    index = GazetteerIndex(path)
+    candidates = index.lookup("  SPRINGFIELD ", limit=2)
+    assert [c.osm_id for c in candidates] == [3, 2]
+    assert [c.rank for c in candidates] == [1, 2]
+    assert index.lookup("Nowhere") == []
+    index.close()
+
+
+def test_record_payloads_are_streamed_through_a_temporary_file(tmp_path):
+    path = tmp_path / "g.idx"
+    places = (_place(f"Place {i}", i, i / 1000) for i in range(500))
+    assert build_index(places, path)["records"] == 500
+
+    index = GazetteerIndex(path)
+    assert index.record(0)[1] == 0 and index.record(499)[2] == "Place 499"
+    assert [c.osm_id for c in index.lookup("place 250")] == [250]
+    index.close()
+    assert [p.name for p in tmp_path.iterdir()] == ["g.idx"]
+
+
+def test_geonames_reader_derives_rank_and_importance(tmp_path):
+    path = tmp_path / "JP.txt"
+    row = [
+        "1850147", "Tokyo", "Tokyo", "Tokio,東京", "35.6895", "139.69171",
+        "P", "PPLC", "JP", "", "40", "", "", "", "8336599",
+    ]
+    path.write_text("\t".join(row) + "\n", encoding="utf-8")
+    (place,) = read_geonames(path)
+    assert place.names == ["Tokyo", "Tokyo", "Tokio", "東京"]
+    assert place.place_rank == 16
+    assert place.country_code == "jp"
+    assert 0.8 < place.importance <= 1.0
+
+
+def test_gazetteer_cli_build_and_client_search(tmp_path):
+    source = tmp_path / "places.tsv"
+    source.write_text(TSV, encoding="utf-8")
+    index_path = tmp_path / "places.idx"
+    runner = CliRunner()
+
+    result = runner.invoke(
+        app, ["gazetteer", "build", str(source), "--output", str(index_path)]
+    )
+    assert result.exit_code == 0, result.stdout
+    assert "records: 3" in result.stdout
+
+    result = runner.invoke(
+        app, ["gazetteer", "lookup", "東京", "--index", str(index_path)]
+    )
+    assert json.loads(result.stdout.splitlines()[0])["osm_id"] == 1543125
+
+    client = GazetteerClient(index_path, limit=5)
+    candidates = asyncio.run(client.search("tokyo"))
+    assert [c.country_code for c in candidates] == ["JP", "US"]
+    assert asyncio.run(client.search("Kyoto")) == []
+    assert (client.lookups, client.misses) == (2, 1)
+    asyncio.run(client.aclose())
@@ -0,0 +1,101 @@
+import asyncio
+
+import httpx
+import pytest
+
+from locitorium.pipeline.balancer import ServerPool, read_server_urls
+
+
+def _client(handler):
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def _pred(request):
+    return httpx.Response(200, json={"host": request.url.host, "results": []})
+
+
+def test_requests_go_to_the_least_busy_server():
+    release = asyncio.Event()
+    hosts = []
+
+    async def handler(request):
+        hosts.append(request.url.host)
+        if request.url.host == "a":
+            await release.wait()
+        return _pred(request)
+
+    async def run():
+        pool = ServerPool(["http://a", "http://b"])
+        async with _client(handler) as client:
+            slow = asyncio.create_task(pool.get_json(client, "/api", {"q": "x"}))
+            await asyncio.sleep(0)
+            # a is busy with the first request, so b takes the next three.
+            for _ in range(3):
+                await pool.get_json(client, "/api", {"q": "x"})
+            release.set()
+            await slow
+        return pool
+
+    pool = asyncio.run(run())
+    assert hosts == ["a", "b", "b", "b"]
+    assert [s.requests for s in pool.servers] == [1, 3]
+
+
+def test_failing_server_is_ejected_and_request_retried_elsewhere():
+    now = [0.0]
+    messages = []
+
+    def handler(request):
+        if request.url.host == "a":
+            raise httpx.ConnectError("refused", request=request)
+        return _pred(request)
+
+    async def run(pool):
+        async with _client(handler) as client:
+            return [
+                (await pool.get_json(client, "/api", {"q": "x"}))["host"]
+                for _ in range(3)
+            ]
+
+    pool = ServerPool(
+        ["http://a", "http://b"],
+        eject_s=10,
+        progress=messages.append,
+        clock=lambda: now[0],
+    )
+    assert asyncio.run(run(pool)) == ["b", "b", "b"]
+    a, b = pool.servers
+    assert (a.requests, a.errors, a.ejections) == (1, 1, 1)
+    assert b.requests == 3
+    assert "ejected" in messages[0]
+
+    now[0] = 11.0  # a is back in rotation once its ejection ends
+    asyncio.run(run(pool))
+    assert a.ejections == 2
+
+
+def test_client_errors_are_not_retried_and_exhaustion_raises():
+    def handler(request):
+        status = 400 if request.url.host == "a" else 503
+        return httpx.Response(status, json={})
+
+    async def run(pool):
+        async with _client(handler) as client:
+            await pool.get_json(client, "/api", {"q": "x"})
+
+    pool = ServerPool(["http://a", "http://b"])
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(run(pool))
+    assert [s.requests for s in pool.servers] == [1, 0]
+    assert pool.servers[0].ejections == 0
+
+    pool = ServerPool(["http://b", "http://c"])
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(run(pool))
+    assert [s.ejections for s in pool.servers] == [1, 1]
+
+
+def test_server_urls_file_skips_comments(tmp_path):
+    path = tmp_path / "servers.txt"
+    path.write_text("# fleet\nhttp://a:30101\n\nhttp://b:30101  # spare\n")
+    assert read_server_urls(path) == ["http://a:30101", "http://b:30101"]
@@ -0,0 +1,77 @@
+import asyncio
+import re
+
+from locitorium import counters
+from locitorium.clients.llm import LlmClient
+from locitorium.pipeline.batcher import ExtractBatcher
+from locitorium.pipeline.extractor import extract_mentions
+
+_DOCUMENT = re.compile(r"DOCUMENT (\d+):\n(.*?)(?=\n\nDOCUMENT |\Z)", re.S)
+
+
+class BatchClient(LlmClient):
+    """Answers every document with its first word; optionally drops one."""
+
+    def __init__(self, drop=None):
+        self.prompts = []
+        self.drop = drop
+
+    async def generate(self, prompt, schema, tag=""):
+        self.prompts.append(prompt)
+        if "DOCUMENTS:" not in prompt:
+            return {"mentions": [{"mention": prompt.rsplit("\n", 1)[-1].split()[0]}]}
+        docs = _DOCUMENT.findall(prompt.split("DOCUMENTS:\n", 1)[1])
+        return {
+            "documents": [
+                {"document": int(n), "mentions": [{"mention": text.split()[0]}]}
+                for n, text in docs
+                if int(n) != self.drop
+            ]
+        }
+
+
+async def _extract_all(batcher, texts):
+    async def one(text):
+        with counters.collect() as collected:
+            mentions = await extract_mentions(
+                batcher.client, text, 20, tag="t", batcher=batcher
+            )
+        return mentions, collected
+
+    return await asyncio.gather(*(one(t) for t in texts))
+
+
+TEXTS = ["Tokyo is big", "Osaka is loud", "Kyoto is old"]
+
+
+def test_concurrent_documents_share_one_call():
+    client = BatchClient()
+    batcher = ExtractBatcher(client, max_size=8, max_wait_s=0.01)
+    outputs = asyncio.run(_extract_all(batcher, TEXTS))
+    assert len(client.prompts) == 1
+    assert [mentions for mentions, _ in outputs] == [["Tokyo"], ["Osaka"], ["Kyoto"]]
+    assert all(c["extract_batch_size"] == 3 for _, c in outputs)
+    assert all(c["extract_batch_wait_s"] >= 0 for _, c in outputs)
+    assert batcher.stats.snapshot()["avg_batch_size"] == 3.0
+
+
+def test_full_batch_is_sent_without_waiting():
+    client = BatchClient()
+    batcher = ExtractBatcher(client, max_size=2, max_wait_s=10.0)
+
+    async def run():
+        return await asyncio.wait_for(_extract_all(batcher, TEXTS[:2]), 1.0)
+
+    outputs = asyncio.run(run())
+    assert [mentions for mentions, _ in outputs] == [["Tokyo"], ["Osaka"]]
+
+
+def test_document_missing_from_batch_falls_back_to_its_own_call():
+    client = BatchClient(drop=2)
+    batcher = ExtractBatcher(client, max_size=8, max_wait_s=0.01)
+    outputs = asyncio.run(_extract_all(batcher, TEXTS))
+    assert [mentions for mentions, _ in outputs] == [["Tokyo"], ["Osaka"], ["Kyoto"]]
+    assert len(client.prompts) == 2
+    assert "DOCUMENTS:" not in client.prompts[1]
+    assert outputs[1][1]["extract_batch_size"] == 1
+    assert batcher.stats.fallbacks == 1
@@ -0,0 +1,124 @@
+import asyncio
+
+from locitorium import counters
+from locitorium.gazetteer.index import GazetteerIndex, Place, build_index
+from locitorium.pipeline.dictionary import (
+    AhoCorasick,
+    DictionaryEntry,
+    PlaceDictionary,
+    build_dictionary,
+)
+from locitorium.pipeline.extractor import extract_mentions
+
+
+def test_aho_corasick_reports_overlapping_patterns():
+    automaton = AhoCorasick()
+    for i, pattern in enumerate(["he", "she", "hers", "his"]):
+        automaton.add(pattern, i)
+    matches = sorted(automaton.iter_matches("ushers"))
+    assert matches == [(1, 4, 1), (2, 4, 0), (2, 6, 2)]
+
+
+def test_country_names_respect_case_boundaries_and_longest_match():
+    dictionary = build_dictionary()
+    mentions, ambiguous = dictionary.extract(
+        "Guinea-Bissau says US study suspended; let us talk turkey in Nigeria",
+        max_mentions=10,
+    )
+    assert mentions == ["Guinea-Bissau", "US", "Nigeria"]
+    assert not ambiguous
+    assert dictionary.extract("Chad wins in Georgia", 10) == (["Chad", "Georgia"], True)
+
+
+def test_cjk_names_match_without_spaces():
+    dictionary = PlaceDictionary(
+        [DictionaryEntry("広島県", "JP"), DictionaryEntry("広島", "JP")]
+    )
+    matches = dictionary.find("大会は広島県で開催。")
+    assert [(m.surface, m.country_code) for m in matches] == [("広島県", "JP")]
+
+
+def _place(name, osm_id, **kwargs):
+    return Place([name], "node", osm_id, name, "0", "0", **kwargs)
+
+
+def test_gazetteer_names_join_the_dictionary(tmp_path):
+    path = tmp_path / "g.idx"
+    build_index(
+        [
+            _place("Minneapolis", 1, importance=0.7, country_code="us"),
+            _place("Who", 2, importance=0.9),
+            _place("Smallville", 3, importance=0.1),
+        ],
+        path,
+    )
+    index = GazetteerIndex(path)
+    dictionary = build_dictionary(index, min_importance=0.5)
+    matches = dictionary.find("Who shot in Minneapolis near Smallville?")
+    assert [(m.surface, m.country_code) for m in matches] == [("Minneapolis", "US")]
+    index.close()
+
+
+def test_names_shared_by_several_gazetteer_places_are_ambiguous(tmp_path):
+    path = tmp_path / "g.idx"
+    build_index(
+        [
+            _place("Springfield", 1, importance=0.6, country_code="us"),
+            _place("Springfield", 2, importance=0.5, country_code="us"),
+            _place("Minneapolis", 3, importance=0.7, country_code="us"),
+        ],
+        path,
+    )
+    index = GazetteerIndex(path)
+    dictionary = build_dictionary(index, min_importance=0.5)
+    assert dictionary.extract("Minneapolis", 20) == (["Minneapolis"], False)
+    assert dictionary.extract("Springfield", 20) == (["Springfield"], True)
+    index.close()
+
+
+class FailingLlm:
+    async def generate(self, prompt, schema, tag=""):
+        raise AssertionError("the LLM must not be called")
+
+
+class EchoLlm:
+    def __init__(self, mentions):
+        self.calls = 0
+        self.mentions = mentions
+
+    async def generate(self, prompt, schema, tag=""):
+        self.calls += 1
+        return {"mentions": [{"mention": m} for m in self.mentions]}
+
+
+def test_hybrid_mode_skips_the_llm_unless_ambiguous_or_empty():
+    dictionary = build_dictionary()
+
+    async def _run():
+        with counters.collect() as doc_counters:
+            fast = await extract_mentions(
+                FailingLlm(),
+                "Floods sweep Mozambique",
+                20,
+                "t",
+                mode="hybrid",
+                dictionary=dictionary,
+            )
+        assert fast == ["Mozambique"]
+        assert doc_counters == {"extract_dictionary": 1}
+
+        llm = EchoLlm(["Minneapolis"])
+        with counters.collect() as doc_counters:
+            slow = await extract_mentions(
+                llm,
+                "Shooting in Minneapolis",
+                20,
+                "t",
+                mode="hybrid",
+                dictionary=dictionary,
+            )
+        assert slow == ["Minneapolis"]
+        assert llm.calls == 1
+        assert doc_counters == {"extract_llm_fallback": 1}
+
+    asyncio.run(_run())
@@ -9,3 +9,26 @@ def test_filter_mentions_requires_verbatim_or_casefold_match():
     assert "広島国際会議場" in filtered
     assert "Hiroshima" not in filtered
     assert "Japan" not in filtered
+
+
+def test_mention_stream_emits_each_mention_when_its_object_closes():
+    from locitorium.pipeline.extractor import MentionStream
+
+    emitted = []
+    stream = MentionStream("会場は広島市の広島国際会議場 {A}", emitted.append)
+    response = (
+        '{"mentions":[{"mention":"広島市"},{"mention":"Tokyo"},'
+        '{"mention":"{A}"},{"mention":"広島国際会議場"}]}'
+    )
+    seen_at = []
+    for i, ch in enumerate(response):
+        stream.feed(ch)
+        if len(emitted) > len(seen_at):
+            seen_at.append(i)
+    # "Tokyo" is not in the text; the brace inside a string is not a close.
+    assert emitted == ["広島市", "{A}", "広島国際会議場"]
+    assert seen_at[0] == response.index("}")
+
+    stream.reset()
+    stream.feed('{"mention":"広島市"}')
+    assert emitted[-1] == "広島市"
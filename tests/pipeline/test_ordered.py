@@ -0,0 +1,88 @@
+import asyncio
+import json
+
+import pytest
+
+from locitorium.config import AppConfig
+from locitorium.models.schema import ModelInfo, PredDoc, PredMetrics
+from locitorium.pipeline import runner
+from locitorium.pipeline.ordered import ordered_map
+
+
+def _collect(func, items, concurrency, window=None):
+    async def run():
+        return [r async for r in ordered_map(func, items, concurrency, window)]
+
+    return asyncio.run(run())
+
+
+def test_results_come_in_input_order_with_bounded_concurrency():
+    state = {"active": 0, "max": 0}
+
+    async def work(i):
+        state["active"] += 1
+        state["max"] = max(state["max"], state["active"])
+        await asyncio.sleep(0.02 if i % 3 == 0 else 0.001)
+        state["active"] -= 1
+        return i * 10
+
+    assert _collect(work, range(12), concurrency=4) == [i * 10 for i in range(12)]
+    assert state["max"] == 4
+
+
+def test_input_is_read_at_most_a_window_ahead():
+    pulled = []
+
+    def items():
+        for i in range(100):
+            pulled.append(i)
+            yield i
+
+    async def run():
+        gen = ordered_map(asyncio.sleep, items(), concurrency=2, window=3)
+        first = await gen.__anext__()
+        await gen.aclose()
+        return first
+
+    asyncio.run(run())
+    assert len(pulled) <= 4
+
+
+def test_error_surfaces_at_its_position():
+    async def work(i):
+        if i == 2:
+            raise RuntimeError("boom")
+        return i
+
+    async def run():
+        seen = []
+        with pytest.raises(RuntimeError):
+            async for r in ordered_map(work, range(6), concurrency=3):
+                seen.append(r)
+        return seen
+
+    assert asyncio.run(run()) == [0, 1]
+
+
+def test_run_dataset_stream_writes_input_order(monkeypatch, tmp_path):
+    async def fake_run_doc(text, doc_id, config, resources):
+        await asyncio.sleep(0.03 if doc_id == "d0" else 0.0)
+        return PredDoc(
+            doc_id=doc_id,
+            model_info=ModelInfo(
+                llm_model="m", llm_base_url="u", nominatim_base_url="n", config_hash="h"
+            ),
+            results=[],
+            metrics=PredMetrics(total_s=0.0),
+        )
+
+    async def fake_warm_up(resources, config):
+        return None
+
+    monkeypatch.setattr(runner, "run_doc", fake_run_doc)
+    monkeypatch.setattr(runner, "warm_up", fake_warm_up)
+    docs = ({"doc_id": f"d{i}", "text": "t"} for i in range(5))
+    out = tmp_path / "predictions.jsonl"
+    asyncio.run(runner.run_dataset_stream(docs, AppConfig(), str(out), concurrency=3))
+    lines = out.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["doc_id"] for line in lines] == [f"d{i}" for i in range(5)]
@@ -0,0 +1,96 @@
+import asyncio
+
+from locitorium import counters
+from locitorium.models.schema import Candidate
+from locitorium.pipeline.resolve_payload import (
+    ResolvePayload,
+    compact_payload,
+    estimate_tokens,
+    short_name,
+)
+
+
+def _cand(osm_id, name, country="jp"):
+    return Candidate(
+        rank=1,
+        osm_type="relation",
+        osm_id=osm_id,
+        display_name=name,
+        lat="0",
+        lon="0",
+        bbox=[],
+        country_code=country,
+        category="boundary",
+    )
+
+
+HIROSHIMA = _cand(
+    1, "Hiroshima, Naka Ward, Hiroshima, Hiroshima Prefecture, 730-0011, Japan"
+)
+KURE = _cand(2, "Kure, Hiroshima Prefecture, Japan")
+FUKUYAMA = _cand(3, "Fukuyama | city, Hiroshima Prefecture, Japan")
+
+
+def test_short_name_keeps_leading_parts_and_country():
+    assert short_name(HIROSHIMA.display_name, 2) == "Hiroshima, Naka Ward, …, Japan"
+    assert short_name(KURE.display_name, 3) == KURE.display_name
+    assert short_name(KURE.display_name, 0) == KURE.display_name
+
+
+def test_compact_payload_lists_shared_places_once():
+    table = compact_payload(
+        {
+            "d1:0": ("広島", [HIROSHIMA, KURE]),
+            "d1:1": ("Hiroshima", [HIROSHIMA, FUKUYAMA]),
+        },
+        address_parts=2,
+    )
+    places, mentions = table.split("\n\n")
+    assert places.splitlines()[1:] == [
+        "p1|Hiroshima, Naka Ward, …, Japan|JP|boundary",
+        "p2|Kure, Hiroshima Prefecture, Japan|JP|boundary",
+        "p3|Fukuyama / city, Hiroshima Prefecture, Japan|JP|boundary",
+    ]
+    assert mentions.splitlines()[1:] == ["d1:0|広島|p1 p2", "d1:1|Hiroshima|p1 p3"]
+
+
+def test_token_budget_trims_lowest_ranked_candidates_first():
+    candidates = {
+        "d1:0": ("広島", [HIROSHIMA, KURE, FUKUYAMA]),
+        "d1:1": ("Kure", [KURE]),
+    }
+    calls = []
+
+    async def tokenizer(prompt):
+        calls.append(prompt)
+        return 1000 if "Fukuyama" in prompt else 10
+
+    payload = ResolvePayload(format="compact", token_budget=100, tokenizer=tokenizer)
+
+    async def run():
+        with counters.collect() as collected:
+            prompt = await payload.prompt("text", candidates)
+        return prompt, collected
+
+    prompt, collected = asyncio.run(run())
+    assert "Fukuyama" not in prompt
+    assert "d1:0|広島|p1 p2" in prompt
+    assert len(calls) == 2
+    assert collected["resolve_candidates_trimmed"] == 1
+    assert collected["resolve_prompt_tokens"] == 10
+
+
+def test_failing_tokenizer_falls_back_to_estimate():
+    async def tokenizer(prompt):
+        raise RuntimeError("no /tokenize here")
+
+    payload = ResolvePayload(token_budget=10_000, tokenizer=tokenizer)
+
+    async def run():
+        with counters.collect() as collected:
+            prompt = await payload.prompt("text", {"d1:0": ("Kure", [KURE])})
+        return prompt, collected
+
+    prompt, collected = asyncio.run(run())
+    assert collected["resolve_tokenize_errors"] == 1
+    assert collected["resolve_prompt_tokens"] == estimate_tokens(prompt)
@@ -0,0 +1,91 @@
+import asyncio
+
+from locitorium import counters
+from locitorium.clients.llm import LlmClient
+from locitorium.models.schema import Candidate
+from locitorium.pipeline.resolver import FastPathPolicy, resolve_candidates
+
+
+def _cand(osm_id: int, country: str, importance: float, place_rank: int = 16):
+    return Candidate(
+        rank=osm_id,
+        osm_type="relation",
+        osm_id=osm_id,
+        display_name=f"place {osm_id}",
+        lat="0",
+        lon="0",
+        bbox=[],
+        country_code=country,
+        place_rank=place_rank,
+        importance=importance,
+    )
+
+
+class RecordingClient(LlmClient):
+    def __init__(self):
+        self.prompts = []
+
+    async def generate(self, prompt, schema, tag=""):
+        self.prompts.append(prompt)
+        return {
+            "results": [
+                {
+                    "mention_id": "d1:1",
+                    "mention": "Springfield",
+                    "choice": 1,
+                    "status": "resolved",
+                }
+            ]
+        }
+
+
+def _resolve(client, candidates, policy):
+    async def run():
+        with counters.collect() as collected:
+            results = await resolve_candidates(
+                client, "text", candidates, tag="t", fast_path=policy
+            )
+        return results, collected
+
+    return asyncio.run(run())
+
+
+def test_fast_path_skips_llm_when_everything_is_unambiguous():
+    client = RecordingClient()
+    candidates = {
+        "d1:0": ("Japan", [_cand(1, "jp", 0.9, 4), _cand(2, "us", 0.3, 16)]),
+        "d1:1": ("Hiroshima", [_cand(3, "jp", 0.6)]),
+    }
+    results, collected = _resolve(client, candidates, FastPathPolicy())
+    assert client.prompts == []
+    assert [r.mention_id for r in results] == ["d1:0", "d1:1"]
+    assert all(r.resolved_by == "fast_path" for r in results)
+    assert results[0].selected.country_code == "JP"
+    assert results[0].selected.confidence == 0.99
+    assert results[1].selected.confidence == 0.9
+    assert collected["resolve_fast_path"] == 2
+    assert collected["resolve_llm_skipped"] == 1
+
+
+def test_fast_path_sends_only_ambiguous_mentions_to_llm():
+    client = RecordingClient()
+    candidates = {
+        "d1:0": ("Japan", [_cand(1, "jp", 0.9, 4), _cand(2, "us", 0.3, 16)]),
+        "d1:1": ("Springfield", [_cand(4, "us", 0.5), _cand(5, "us", 0.45)]),
+    }
+    results, collected = _resolve(client, candidates, FastPathPolicy())
+    assert len(client.prompts) == 1
+    assert "Springfield" in client.prompts[0]
+    assert "place 1" not in client.prompts[0]
+    assert [r.resolved_by for r in results] == ["fast_path", "llm"]
+    assert results[1].selected.osm_id == 5
+    assert collected["resolve_fast_path"] == 1
+    assert "resolve_llm_skipped" not in collected
+
+
+def test_policy_keeps_smaller_dominant_place_for_the_llm():
+    policy = FastPathPolicy()
+    # The top candidate is more important but a smaller place than the runner-up.
+    assert policy.pick([_cand(1, "us", 0.9, 16), _cand(2, "us", 0.2, 8)]) is None
+    assert policy.pick([_cand(1, "us", 0.4, 8), _cand(2, "us", 0.1, 8)]) is None
+    assert policy.pick([]) is None
@@ -0,0 +1,80 @@
+import asyncio
+import re
+
+from locitorium import counters
+from locitorium.clients.llm import LlmClient
+from locitorium.models.schema import Candidate
+from locitorium.pipeline.resolver import ShardPolicy, resolve_candidates
+
+
+def _cand(osm_id):
+    return Candidate(
+        rank=1,
+        osm_type="relation",
+        osm_id=osm_id,
+        display_name=f"place {osm_id}",
+        lat="0",
+        lon="0",
+        bbox=[],
+        country_code="jp",
+    )
+
+
+class ConcurrentClient(LlmClient):
+    """Picks the first candidate for every mention in the prompt."""
+
+    def __init__(self):
+        self.tags = []
+        self.active = 0
+        self.max_active = 0
+
+    async def generate(self, prompt, schema, tag=""):
+        self.tags.append(tag)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        ids = re.findall(r'"mention_id": "([^"]+)"', prompt)
+        return {
+            "results": [
+                {"mention_id": mid, "mention": mid, "choice": 0, "status": "resolved"}
+                for mid in ids
+            ]
+        }
+
+
+def test_policy_splits_by_mention_count_and_slots():
+    policy = ShardPolicy(shard_size=5, min_mentions=8, slots=3)
+    assert policy.shards(7) == 1
+    assert policy.shards(8) == 2
+    assert policy.shards(40) == 3
+    assert ShardPolicy(slots=1).shards(40) == 1
+    ids = [f"d1:{i}" for i in range(11)]
+    groups = policy.split(ids)
+    assert [len(g) for g in groups] == [4, 4, 3]
+    assert sum(groups, []) == ids
+
+
+def test_sharded_resolve_runs_groups_concurrently_in_mention_order():
+    candidates = {f"d1:{i}": (f"m{i}", [_cand(i)]) for i in range(10)}
+    candidates["d1:10"] = ("nowhere", [])
+    client = ConcurrentClient()
+
+    async def run():
+        with counters.collect() as collected:
+            results = await resolve_candidates(
+                client,
+                "text",
+                candidates,
+                tag="d1_resolve",
+                shards=ShardPolicy(shard_size=5, min_mentions=8, slots=4),
+            )
+        return results, collected
+
+    results, collected = asyncio.run(run())
+    assert sorted(client.tags) == ["d1_resolve_0", "d1_resolve_1"]
+    assert client.max_active == 2
+    assert collected["resolve_shards"] == 2
+    assert [r.mention_id for r in results] == list(candidates)
+    assert [r.selected.osm_id for r in results[:10]] == list(range(10))
+    assert results[10].status == "no_candidate"
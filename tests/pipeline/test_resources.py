@@ -0,0 +1,58 @@
+import asyncio
+import json
+
+import httpx
+
+from locitorium.config import AppConfig
+from locitorium.pipeline.resources import PipelineResources
+from locitorium.prompts import extract, resolve
+
+
+def test_warm_up_primes_each_stage_prefix_into_its_slots():
+    payloads = []
+
+    def handler(request):
+        payloads.append(json.loads(request.content))
+        if len(payloads) == 3:
+            return httpx.Response(503)
+        return httpx.Response(200, json={"choices": []})
+
+    config = AppConfig(
+        llm_cache_prompt=True,
+        llm_extract_slots="0,1",
+        llm_resolve_slots="2",
+        resolve_payload="compact",
+    )
+
+    async def run():
+        async with PipelineResources(config) as resources:
+            await resources.llm_http.aclose()
+            resources.llm_http = httpx.AsyncClient(
+                transport=httpx.MockTransport(handler)
+            )
+            result = await resources.warm_up(config)
+            slots = [next(resources.llm_client(config, "extract").id_slots)]
+            slots.append(next(resources.llm_client(config, "extract").id_slots))
+            return result, resources.stats()["llm_warm_up"], slots
+
+    result, stats, slots = asyncio.run(run())
+    assert [(p["id_slot"], p["messages"][0]["content"]) for p in payloads] == [
+        (0, extract.PROMPT_PREFIX),
+        (1, extract.PROMPT_PREFIX),
+        (2, resolve.COMPACT_PROMPT_PREFIX),
+    ]
+    assert result == stats == {"requests": 3, "errors": 1}
+    # Clients of one stage share the round robin over its slots.
+    assert slots == [0, 1]
+
+
+def test_a_cache_link_takes_over_nominatim_caching():
+    async def run(sources):
+        config = AppConfig(candidate_sources=sources)
+        async with PipelineResources(config) as resources:
+            return resources.nominatim.cache, resources.source_chain.cache
+
+    client_cache, chain_cache = asyncio.run(run("cache,nominatim"))
+    assert client_cache is None and chain_cache is not None
+    client_cache, chain_cache = asyncio.run(run("nominatim"))
+    assert client_cache is not None and chain_cache is None
@@ -0,0 +1,82 @@
+import asyncio
+
+from locitorium.clients.llm import LlmClient
+from locitorium.config import AppConfig
+from locitorium.models.schema import Candidate
+from locitorium.pipeline import runner
+from locitorium.pipeline.resources import PipelineResources
+
+
+class StreamingLlm(LlmClient):
+    """Streams the extraction slowly; answers the resolve prompt at once."""
+
+    def __init__(self, events):
+        super().__init__("http://llm/v1", "m")
+        self.events = events
+
+    async def generate(self, prompt, schema, tag="", use_cache=None, listener=None):
+        if tag.endswith("_resolve"):
+            return {"results": []}
+        pieces = [
+            '{"mentions":[',
+            '{"mention":"Tokyo"}',
+            ",",
+            '{"mention":"Osaka"}',
+            "]}",
+        ]
+        if listener is not None:
+            listener.reset()
+        for piece in pieces:
+            await asyncio.sleep(0.05)
+            if listener is not None:
+                listener.feed(piece)
+        self.events.append("extract_done")
+        return {"mentions": [{"mention": "Tokyo"}, {"mention": "Osaka"}]}
+
+
+class SlowSource:
+    def __init__(self, events):
+        self.events = events
+
+    async def search(self, query):
+        self.events.append(f"search:{query}")
+        await asyncio.sleep(0.1)
+        return [
+            Candidate(
+                rank=1,
+                osm_type="relation",
+                osm_id=1,
+                display_name=query,
+                lat="0",
+                lon="0",
+                bbox=[],
+                country_code="jp",
+            )
+        ]
+
+
+def _run(config):
+    events = []
+
+    async def go():
+        async with PipelineResources(config) as resources:
+            resources.candidates = SlowSource(events)
+            resources.llm_client = lambda _config, stage=None: StreamingLlm(events)
+            return await runner.run_doc("Tokyo and Osaka", "d1", config, resources)
+
+    return asyncio.run(go()), events
+
+
+def test_streamed_extraction_starts_searches_before_it_ends():
+    pred, events = _run(AppConfig(extract_stream=True))
+    assert events.index("search:Tokyo") < events.index("extract_done")
+    assert events.index("search:Osaka") < events.index("extract_done")
+    assert pred.metrics.counters["candidate_prefetched"] == 2
+    # The searches overlapped extraction, so less than one search is left.
+    assert pred.metrics.candidate_s < 0.1
+
+
+def test_without_streaming_searches_wait_for_extraction():
+    pred, events = _run(AppConfig())
+    assert events.index("extract_done") < events.index("search:Tokyo")
+    assert "candidate_prefetched" not in pred.metrics.counters
@@ -0,0 +1,153 @@
+import asyncio
+
+import pytest
+
+from locitorium import counters
+from locitorium.cache.memory import MemoryCache
+from locitorium.models.schema import Candidate
+from locitorium.pipeline.sources import (
+    BudgetedSource,
+    CacheSource,
+    SourceChain,
+    parse_source_chain,
+)
+
+
+def _candidate(name):
+    return Candidate(
+        rank=1,
+        osm_type="node",
+        osm_id=1,
+        display_name=name,
+        lat="0",
+        lon="0",
+        bbox=[],
+    )
+
+
+class StubSource:
+    def __init__(self, result=None, delay_s=0.0, error=None):
+        self.result = result or []
+        self.delay_s = delay_s
+        self.error = error
+        self.calls = 0
+
+    async def search(self, query):
+        self.calls += 1
+        await asyncio.sleep(self.delay_s)
+        if self.error is not None:
+            raise self.error
+        return list(self.result)
+
+
+def test_parse_source_chain():
+    specs = parse_source_chain("cache, gazetteer:0.05, nominatim:5:8")
+    assert [(s.name, s.timeout_s, s.concurrency) for s in specs] == [
+        ("cache", None, None),
+        ("gazetteer", 0.05, None),
+        ("nominatim", 5.0, 8),
+    ]
+    with pytest.raises(ValueError):
+        parse_source_chain("photon")
+    with pytest.raises(ValueError):
+        parse_source_chain("nominatim:fast")
+
+
+def test_chain_stops_at_the_first_hit():
+    fast = StubSource([_candidate("Tokyo")])
+    slow = StubSource([_candidate("Tokyo, slow")])
+    chain = SourceChain([BudgetedSource("fast", fast), BudgetedSource("slow", slow)])
+
+    with counters.collect() as doc_counters:
+        result = asyncio.run(chain.search("Tokyo"))
+
+    assert result[0].display_name == "Tokyo"
+    assert slow.calls == 0
+    assert doc_counters["source_fast_hits"] == 1
+    assert "source_fast_latency_s" in doc_counters
+
+
+def test_chain_falls_through_on_miss_error_and_timeout():
+    chain = SourceChain(
+        [
+            BudgetedSource("miss", StubSource([])),
+            BudgetedSource("broken", StubSource(error=RuntimeError("down"))),
+            BudgetedSource("slow", StubSource([_candidate("x")], delay_s=1), 0.01),
+            BudgetedSource("last", StubSource([_candidate("Tokyo")])),
+        ]
+    )
+
+    result = asyncio.run(chain.search("Tokyo"))
+
+    assert result[0].display_name == "Tokyo"
+    stats = chain.stats()
+    assert stats["miss"]["misses"] == 1
+    assert stats["broken"]["errors"] == 1
+    assert stats["slow"]["timeouts"] == 1
+    assert stats["last"]["hit_rate"] == 1.0
+
+
+def test_chain_raises_only_when_no_source_answered():
+    misses = SourceChain(
+        [
+            BudgetedSource("broken", StubSource(error=RuntimeError("down"))),
+            BudgetedSource("miss", StubSource([])),
+        ]
+    )
+    assert asyncio.run(misses.search("Atlantis")) == []
+
+    failures = SourceChain(
+        [BudgetedSource("broken", StubSource(error=RuntimeError("down")))]
+    )
+    with pytest.raises(RuntimeError):
+        asyncio.run(failures.search("Tokyo"))
+
+
+def test_cache_link_stores_what_the_chain_finds():
+    cache = MemoryCache()
+    found = StubSource([_candidate("Tokyo")])
+    empty = StubSource([])
+    broken = StubSource(error=RuntimeError("down"))
+
+    def chain(*sources):
+        links = [BudgetedSource("cache", CacheSource(cache, 5, negative_ttl_s=60))]
+        links += [BudgetedSource(f"s{i}", s) for i, s in enumerate(sources)]
+        return SourceChain(links)
+
+    async def run():
+        results = []
+        for query, sources in [
+            ("Tokyo", [found]),
+            ("Atlantis", [empty]),
+            # A failed link may have missed a result: nothing is stored.
+            ("Lemuria", [broken, empty]),
+        ]:
+            for _ in range(2):
+                results.append(await chain(*sources).search(query))
+        return results
+
+    results = asyncio.run(run())
+    assert [[c.display_name for c in r] for r in results] == [
+        ["Tokyo"],
+        ["Tokyo"],
+        [],
+        [],
+        [],
+        [],
+    ]
+    assert (found.calls, empty.calls, broken.calls) == (1, 3, 2)
+
+
+def test_cancelled_searches_are_not_counted_as_errors():
+    source = BudgetedSource("slow", StubSource([_candidate("x")], delay_s=1), 5.0)
+
+    async def run():
+        task = asyncio.create_task(source.search("Tokyo"))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    assert source.stats.snapshot()["errors"] == 0
+    assert source.stats.snapshot()["timeouts"] == 0
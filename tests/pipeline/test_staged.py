@@ -0,0 +1,151 @@
+import asyncio
+
+import pytest
+
+from locitorium.clients.llm import LlmClient
+from locitorium.config import AppConfig
+from locitorium.models.schema import Candidate
+from locitorium.pipeline import runner
+from locitorium.pipeline.resources import PipelineResources
+from locitorium.pipeline.staged import Stage, StagedExecutor
+
+
+def _collect(executor, items):
+    async def run():
+        return [item async for item in executor.map(items)]
+
+    return asyncio.run(run())
+
+
+def test_stages_keep_input_order_within_worker_limits():
+    active = {"a": 0, "b": 0}
+    peak = {"a": 0, "b": 0}
+
+    def stage(name, delay):
+        async def func(item):
+            active[name] += 1
+            peak[name] = max(peak[name], active[name])
+            await asyncio.sleep(delay(item))
+            item.append(name)
+            active[name] -= 1
+
+        return func
+
+    executor = StagedExecutor(
+        [
+            Stage("a", stage("a", lambda item: 0.01 if item[0] % 2 else 0.0), 2),
+            Stage("b", stage("b", lambda item: 0.02 if item[0] == 0 else 0.0), 3),
+        ],
+        queue_size=2,
+    )
+    items = _collect(executor, [[i] for i in range(10)])
+    assert items == [[i, "a", "b"] for i in range(10)]
+    assert peak == {"a": 2, "b": 3}
+    stats = executor.snapshot()
+    assert stats["a"]["processed"] == stats["b"]["processed"] == 10
+    assert stats["b"]["queue_max"] <= 2
+    assert 0 < stats["a"]["utilization"] <= 1
+
+
+def test_done_items_skip_the_remaining_stages():
+    async def first(item):
+        item["seen"].append("first")
+        item["done"] = item["id"] == 1
+
+    async def second(item):
+        item["seen"].append("second")
+
+    executor = StagedExecutor(
+        [Stage("first", first), Stage("second", second)],
+        done=lambda item: item["done"],
+    )
+    items = _collect(executor, [{"id": i, "seen": [], "done": False} for i in range(3)])
+    assert [item["seen"] for item in items] == [
+        ["first", "second"],
+        ["first"],
+        ["first", "second"],
+    ]
+    assert executor.snapshot()["second"]["processed"] == 2
+
+
+def test_stage_error_surfaces_at_its_position():
+    async def work(item):
+        if item == 2:
+            raise RuntimeError("boom")
+
+    async def run():
+        seen = []
+        with pytest.raises(RuntimeError):
+            async for item in StagedExecutor([Stage("work", work, 3)]).map(range(6)):
+                seen.append(item)
+        return seen
+
+    assert asyncio.run(run()) == [0, 1]
+
+
+class StubLlm(LlmClient):
+    def __init__(self):
+        super().__init__("http://llm/v1", "m")
+
+    async def generate(self, prompt, schema, tag="", use_cache=None, listener=None):
+        doc_id = tag.split("_")[0]
+        if tag.endswith("_extract"):
+            await asyncio.sleep(0.01)
+            if doc_id == "d2":
+                return {"mentions": []}
+            return {"mentions": [{"mention": "Tokyo"}]}
+        await asyncio.sleep(0.03 if doc_id == "d0" else 0.0)
+        return {
+            "results": [
+                {
+                    "mention_id": f"{doc_id}:0",
+                    "mention": "Tokyo",
+                    "choice": 0,
+                    "status": "resolved",
+                }
+            ]
+        }
+
+
+class StubSource:
+    async def search(self, query):
+        await asyncio.sleep(0.01)
+        return [
+            Candidate(
+                rank=1,
+                osm_type="relation",
+                osm_id=1,
+                display_name=query,
+                lat="0",
+                lon="0",
+                bbox=[],
+                country_code="jp",
+            )
+        ]
+
+
+def test_staged_dataset_run_matches_document_order():
+    config = AppConfig(staged=True, stage_extract_workers=2, stage_queue_size=2)
+    docs = [{"doc_id": f"d{i}", "text": "Tokyo"} for i in range(6)]
+
+    async def go():
+        stage_stats = {}
+        async with PipelineResources(config) as resources:
+            resources.candidates = StubSource()
+            resources.llm_client = lambda _config, stage=None: StubLlm()
+            preds = [
+                pred
+                async for pred in runner._run_ordered(
+                    docs, config, resources, 1, stage_stats
+                )
+            ]
+        return preds, stage_stats
+
+    preds, stage_stats = asyncio.run(go())
+    assert [p.doc_id for p in preds] == [d["doc_id"] for d in docs]
+    assert preds[0].results[0].status == "resolved"
+    assert preds[0].metrics.resolve_s is not None
+    assert preds[2].results == []
+    assert stage_stats["extract"]["processed"] == 6
+    # d2 had no mentions, so it never reached the later stages.
+    assert stage_stats["resolve"]["processed"] == 5
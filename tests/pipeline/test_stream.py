@@ -205,3 +205,107 @@ def test_resume_reuses_rows_without_calling_server(tmp_path):
     assert len(client.queries) == 1
     assert client.queries[0][1]["q"] == "Osaka"
     assert [row["input_id"] for row in rows] == ["a", "b"]
+
+
+class SlowEchoClient:
+    """Answers each query with its text as the mention, slowest first."""
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+
+    async def get(self, url, params=None):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        text = params["q"]
+        await asyncio.sleep(0.05 / len(text))
+        self.active -= 1
+        return StubResponse(_pred(text, [_result(f"{text}:0", text, "resolved", 1)]))
+
+    async def aclose(self):
+        return None
+
+
+def test_concurrent_requests_keep_input_and_chunk_order(tmp_path):
+    previous = tmp_path / "out.jsonl"
+    previous.write_text(
+        json.dumps(
+            {"input_id": "r1", "chunk_index": 0, "status": "resolved", "mention": "x"}
+        )
+        + "\n",
+        encoding="utf-8",
+    )
+    records = [
+        {"id": "r0", "text": "a"},
+        {"id": "r1", "text": "bb"},
+        {"id": "r2", "text": "ccc。dddd。eeeee"},
+        {"id": "r3"},
+        {"id": "r4", "text": "ff"},
+    ]
+    client = SlowEchoClient()
+    messages = []
+    rows = _collect(
+        records,
+        StreamOptions(max_chars=5, on_too_long="split"),
+        client,
+        resume_rows=stream.load_resolved_rows(previous),
+        progress=messages.append,
+        concurrency=4,
+    )
+
+    assert [(row["input_id"], row["chunk_index"], row["mention"]) for row in rows] == [
+        ("r0", 0, "a"),
+        ("r1", 0, "x"),
+        ("r2", 0, "ccc。"),
+        ("r2", 1, "dddd。"),
+        ("r2", 2, "eeeee"),
+        ("r3", 0, None),
+        ("r4", 0, "ff"),
+    ]
+    assert rows[5]["status"] == stream.STATUS_MISSING_TEXT
+    assert client.peak > 1
+    assert any("in flight" in message for message in messages)
+
+
+class BatchClient:
+    """Answers POST /api/batch in reverse order; "bad" texts get an error."""
+
+    def __init__(self):
+        self.batches = []
+
+    async def post(self, url, params=None, content=b"", headers=None):
+        records = [json.loads(line) for line in content.decode().splitlines()]
+        self.batches.append([r["text"] for r in records])
+        lines = []
+        for r in reversed(records):
+            if r["text"] == "bad":
+                lines.append({"id": r["id"], "error": "input too long"})
+            else:
+                pred = _pred("d", [_result("d:0", r["text"], "resolved", 1)])
+                lines.append({"id": r["id"], **pred})
+        response = StubResponse(None)
+        response.text = "".join(json.dumps(line) + "\n" for line in lines)
+        return response
+
+    async def aclose(self):
+        return None
+
+
+def test_batches_are_posted_and_mapped_back_in_order():
+    client = BatchClient()
+    records = [
+        {"id": "r0", "text": "Tokyo"},
+        {"id": "r1"},
+        {"id": "r2", "text": "bad"},
+        {"id": "r3", "text": "Osaka"},
+    ]
+    rows = _collect(records, StreamOptions(), client, batch_size=2, concurrency=2)
+
+    assert client.batches == [["Tokyo", "bad"], ["Osaka"]]
+    assert [(row["input_id"], row["status"]) for row in rows] == [
+        ("r0", "resolved"),
+        ("r1", stream.STATUS_MISSING_TEXT),
+        ("r2", stream.STATUS_SERVER_ERROR),
+        ("r3", "resolved"),
+    ]
+    assert "input too long" in rows[2]["error"]
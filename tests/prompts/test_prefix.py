@@ -0,0 +1,18 @@
+from locitorium.prompts import extract, resolve
+
+
+def test_prompts_start_with_their_static_prefix():
+    for text in ("Tokyo", "大会は広島県で開催。"):
+        assert extract.build_prompt(text).startswith(extract.PROMPT_PREFIX)
+        assert extract.build_batch_prompt([text, "x"]).startswith(
+            extract.BATCH_PROMPT_PREFIX
+        )
+        assert resolve.build_prompt(text, []).startswith(resolve.PROMPT_PREFIX)
+        assert resolve.build_compact_prompt(text, "").startswith(
+            resolve.COMPACT_PROMPT_PREFIX
+        )
+
+
+def test_prefix_ends_where_the_document_starts():
+    prompt = extract.build_prompt("Tokyo")
+    assert prompt[len(extract.PROMPT_PREFIX) :] == "Tokyo"
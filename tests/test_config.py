@@ -0,0 +1,17 @@
+from locitorium.config import AppConfig, config_from_env
+
+
+def test_optional_nominatim_limits_are_turned_off_with_none(monkeypatch):
+    monkeypatch.setenv("LOCITORIUM_NOMINATIM_MAX_IN_FLIGHT", "none")
+    monkeypatch.setenv("LOCITORIUM_NOMINATIM_RATE_PER_S", "None")
+    config = config_from_env()
+    assert config.nominatim_max_in_flight is None
+    assert config.nominatim_rate_per_s is None
+
+    monkeypatch.setenv("LOCITORIUM_NOMINATIM_MAX_IN_FLIGHT", "3")
+    assert config_from_env().nominatim_max_in_flight == 3
+    monkeypatch.setenv("LOCITORIUM_NOMINATIM_MAX_IN_FLIGHT", "")
+    assert (
+        config_from_env().nominatim_max_in_flight
+        == AppConfig.nominatim_max_in_flight
+    )